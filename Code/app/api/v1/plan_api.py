@@ -15,6 +15,8 @@ if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
 # 导入配置
 from config.settings import API_HOST, PROJECT_PLAN_API_PORT
 from app.utils.Log.log_utils import add_api_logging, log_request_body
+from app.data.connection import invalidate_query_cache
+from starlette.concurrency import run_in_threadpool
 
 # 创建FastAPI应用
 app = FastAPI(title="TianBa AI - Project Plan API")
@@ -28,6 +30,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace"],  # 前端可读取各阶段耗时
 )
 
 # 创建API路由
@@ -39,6 +42,7 @@ class ProjectPlanRequest(BaseModel):
     language: str     # 模板语言chinese, english
     function: Optional[str] = "generate"# 要执行的函数名，如 generate, download，默认为generate
     content: Optional[Dict[str, Any]] = None  # 请求内容，如项目编号等
+    bypass_cache: Optional[bool] = False  # 是否跳过SQL查询结果缓存（直接查库，结果仍写入缓存）
 
 # 动态执行项目方案函数
 @router.post("/execute")
@@ -63,6 +67,14 @@ async def execute_project_plan_function(request: ProjectPlanRequest):
     except ImportError:
         raise HTTPException(status_code=404, detail=f"不支持的疾病类型或语言: {request.disease}_{request.language}")
 
+# 清除SQL查询结果缓存
+@router.delete("/query-cache")
+async def delete_plan_query_cache(project_code: Optional[str] = None):
+    """清除某项目的缓存查询结果（项目信息/给药方案/受试品信息），不传项目编号则全部清除；缓存由项目方案与项目报告共用"""
+    project_code = project_code.strip() if project_code else None
+    removed = await run_in_threadpool(invalidate_query_cache, project_code)
+    return {"success": True, "project_code": project_code, "removed": removed}
+
 # 注册API路由
 app.include_router(router)
 
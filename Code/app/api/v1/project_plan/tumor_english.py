@@ -1,10 +1,23 @@
 # -*- coding: utf-8 -*-
 """肿瘤-英文项目方案接口"""
+import json
 from fastapi import HTTPException
 from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
+from app.tasks.single_flight import plan_flight
+from app.data.connection import bypass_query_cache
+from app.utils.Log.trace import tracing
 from app.services.project_plan.tumor.english.master import generate_project_plan
 
+def build_plan_result(project_code, bypass_cache=False):
+    """生成项目方案并记录各阶段耗时（写入项目方案日志），返回 (Word路径, 明细路径, trace)"""
+    with tracing(f"tumor-english-{project_code}", api_type="project-plan", project_code=project_code) as trace, bypass_query_cache(bypass_cache):
+        # 同项目的并发请求只生成一次并共享结果（跳过缓存的请求不与普通请求合并）
+        word_path, excel_path = plan_flight.do(("tumor", "english", project_code, None, bool(bypass_cache)),
+                                               generate_project_plan, project_code, lock_name=f"plan-{project_code}")
+    return word_path, excel_path, trace
+
 async def generate(request) -> FileResponse:
     """生成项目计划并直接返回文件"""
     if not request.content:
@@ -15,15 +28,17 @@ async def generate(request) -> FileResponse:
         raise HTTPException(status_code=400, detail="项目编号不能为空")
     
     try:
-        # 生成项目计划
-        word_path, excel_path = generate_project_plan(project_code)
+        # 生成项目计划（在线程池中执行，不阻塞事件循环）
+        word_path, excel_path, trace = await run_in_threadpool(build_plan_result, project_code, bool(request.bypass_cache))
         
         # 直接返回Word文件（使用FastAPI的FileResponse，相当于Flask的send_file）
         word_filename = f"{project_code}_Study Protocol.docx"
         return FileResponse(
             path=word_path,
             filename=word_filename,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            # 各阶段耗时随响应头返回（ASCII编码的JSON）
+            headers={"X-Trace": json.dumps(trace.to_dict(), ensure_ascii=True)}
         )
         
     except Exception as e:
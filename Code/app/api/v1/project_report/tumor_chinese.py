@@ -3,10 +3,58 @@
 from fastapi import HTTPException
 from fastapi.responses import FileResponse
 from pathlib import Path
-from app.services.project_report.tumor.chinese.master import generate_project_report
+from app.tasks.job_queue import report_jobs
+from app.tasks.single_flight import report_flight
+from app.data.connection import bypass_query_cache
+from starlette.concurrency import run_in_threadpool
+from app.utils.Log.trace import tracing
+from app.services.project_report.tumor.chinese.master import generate_project_report, switch_report_end_day
+
+def build_report_result(project_code, end_day=None, progress=None, bypass_cache=False):
+    """在后台任务中生成项目报告，返回包含文件信息的结果"""
+    # 生成项目报告（同项目同结束天的并发请求只生成一次，跳过缓存的请求不与普通请求合并；同项目的生成互斥，避免写同一临时文件）
+    with bypass_query_cache(bypass_cache):   # 后台任务线程不继承请求上下文，在此设置是否跳过查询结果缓存
+        result = report_flight.do(("tumor", "chinese", project_code, end_day, bool(bypass_cache)),
+                                  generate_project_report, project_code, end_day, progress=progress,
+                                  lock_name=f"report-{project_code}")
+    # 生成失败时异常直接抛出，后台任务把异常信息记入 error 字段
+    word_path, excel_path, final_path, actual_end_day = result
+        
+    # 构建文件信息
+    files = {
+        "word_document": {
+            "exists": True,
+            "name": f"{project_code}_项目报告.docx",
+            "url": f"/api/v1/download/file?path={word_path}&filename={project_code}_项目报告.docx"
+        },
+        "final_excel": {
+            "exists": True if final_path else False,
+            "name": f"{project_code}_终版.xlsx" if final_path else "",
+            "url": f"/api/v1/download/file?path={final_path}&filename={project_code}_终版.xlsx" if final_path else ""
+        },
+        "details_excel": {
+            "exists": True if excel_path else False,
+            "name": f"{project_code}_明细.xlsx" if excel_path else "",
+            "url": f"/api/v1/download/file?path={excel_path}&filename={project_code}_明细.xlsx" if excel_path else ""
+        },
+        "images_zip": {
+            "exists": True,  # 返回占位图片
+            "name": f"占位表情包_Peppa.jpg",
+            "url": f"/api/v1/download/file?path={Path(__file__).parent.parent.parent.parent.parent / 'public' / 'Peppa.jpg'}&filename=Peppa.jpg"
+        }
+    }
+    
+    # 返回包含文件信息的JSON响应
+    return {
+        "success": True,
+        "message": "项目报告生成成功",
+        "project_code": project_code,
+        "end_day": actual_end_day,
+        "files": files
+    }
 
 async def generate(request):
-    """生成项目报告并返回包含文件信息的JSON响应"""
+    """校验参数并提交后台生成任务，立即返回任务ID（通过 /project-report/jobs/{job_id} 查询进度与结果）"""
     if not request.content:
         raise HTTPException(status_code=400, detail="请求内容不能为空")
     
@@ -22,51 +70,67 @@ async def generate(request):
         except ValueError:
             raise HTTPException(status_code=400, detail="结束天数必须是整数")
     
+    # 提交后台任务，避免阻塞事件循环
+    job = report_jobs.submit(
+        f"{request.disease}-{request.language}-{project_code}",
+        build_report_result, project_code, end_day,
+        bypass_cache=bool(request.bypass_cache),
+        key=(request.disease, request.language, project_code, end_day, bool(request.bypass_cache)),
+        meta={"disease": request.disease, "language": request.language,
+              "project_code": project_code, "end_day": end_day, "bypass_cache": bool(request.bypass_cache)},
+    )
+    return {
+        "success": True,
+        "message": "项目报告任务已提交",
+        "project_code": project_code,
+        "job_id": job.id,
+        "state": job.state,
+    }
+
+
+def build_switch_result(project_code, end_day):
+    """切换结束天并记录各阶段耗时；同项目同结束天的并发请求只渲染一次（与报告生成的互斥由 switch_report_end_day 自行加锁）"""
+    with tracing(f"tumor-chinese-{project_code}-D{end_day}", api_type="project-report",
+                 project_code=project_code, end_day=end_day) as trace:
+        word_path, days = report_flight.do(("tumor", "chinese", project_code, "switch", end_day),
+                                           switch_report_end_day, project_code, end_day)
+    return word_path, days, trace
+
+async def switch_end_day(request):
+    """切换结束天：使用已生成报告时预计算的各天表格，只重新渲染Word，直接返回结果（不提交后台任务）"""
+    if not request.content:
+        raise HTTPException(status_code=400, detail="请求内容不能为空")
+    
+    project_code = str(request.content.get("project_code", "")).strip()
+    if not project_code:
+        raise HTTPException(status_code=400, detail="项目编号不能为空")
+    try:
+        end_day = int(request.content.get("end_day"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="结束天数必须是整数")
+    
     try:
-        # 生成项目报告
-        result = generate_project_report(project_code, end_day)
-        
-        # 检查返回值是否有效
-        if not result or len(result) < 4:
-            raise HTTPException(status_code=500, detail="项目报告生成失败")
-            
-        word_path, excel_path, final_path, actual_end_day = result
-        
-        if not word_path:
-            raise HTTPException(status_code=500, detail="项目报告生成失败")
-        
-        # 构建文件信息
-        files = {
+        word_path, days, trace = await run_in_threadpool(build_switch_result, project_code, end_day)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"切换结束天失败: {str(e)}")
+    
+    word_name = f"{project_code}_项目报告_D{end_day}.docx"
+    return {
+        "success": True,
+        "message": "结束天已切换",
+        "project_code": project_code,
+        "end_day": end_day,
+        "available_days": days,
+        "files": {
             "word_document": {
                 "exists": True,
-                "name": f"{project_code}_项目报告.docx",
-                "url": f"/api/v1/download/file?path={word_path}&filename={project_code}_项目报告.docx"
-            },
-            "final_excel": {
-                "exists": True if final_path else False,
-                "name": f"{project_code}_终版.xlsx" if final_path else "",
-                "url": f"/api/v1/download/file?path={final_path}&filename={project_code}_终版.xlsx" if final_path else ""
-            },
-            "details_excel": {
-                "exists": True if excel_path else False,
-                "name": f"{project_code}_明细.xlsx" if excel_path else "",
-                "url": f"/api/v1/download/file?path={excel_path}&filename={project_code}_明细.xlsx" if excel_path else ""
-            },
-            "images_zip": {
-                "exists": True,  # 返回占位图片
-                "name": f"占位表情包_Peppa.jpg",
-                "url": f"/api/v1/download/file?path={Path(__file__).parent.parent.parent.parent.parent / 'public' / 'Peppa.jpg'}&filename=Peppa.jpg"
+                "name": word_name,
+                "url": f"/api/v1/download/file?path={word_path}&filename={word_name}"
             }
-        }
-        
-        # 返回包含文件信息的JSON响应
-        return {
-            "success": True,
-            "message": "项目报告生成成功",
-            "project_code": project_code,
-            "end_day": actual_end_day,
-            "files": files
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"生成项目报告失败: {str(e)}")
\ No newline at end of file
+        },
+        "trace": trace.to_dict(),
+    }
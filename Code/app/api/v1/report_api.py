@@ -17,6 +17,9 @@ if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
 # 导入配置
 from config.settings import API_HOST, PROJECT_REPORT_API_PORT
 from app.utils.Log.log_utils import add_api_logging, log_request_body
+from app.data.connection import invalidate_query_cache
+from starlette.concurrency import run_in_threadpool
+from app.tasks.job_queue import report_jobs
 
 # 创建FastAPI应用
 app = FastAPI(title="TianBa AI - Project Report API")
@@ -41,6 +44,7 @@ class ProjectReportRequest(BaseModel):
     language: str     # 模板语言chinese, english
     function: Optional[str] = "generate"# 要执行的函数名，如 generate, download，默认为generate
     content: Optional[Dict[str, Any]] = None  # 请求内容，如项目编号等
+    bypass_cache: Optional[bool] = False  # 是否跳过SQL查询结果缓存（直接查库，结果仍写入缓存）
 
 # 动态执行项目报告函数
 @router.post("/execute")
@@ -65,6 +69,32 @@ async def execute_project_report_function(request: ProjectReportRequest):
     except ImportError:
         raise HTTPException(status_code=404, detail=f"不支持的疾病类型或语言: {request.disease}_{request.language}")
 
+# 清除SQL查询结果缓存
+@router.delete("/query-cache")
+async def delete_report_query_cache(project_code: Optional[str] = None):
+    """清除某项目的缓存查询结果（项目信息/给药方案/受试品信息），不传项目编号则全部清除；缓存由项目方案与项目报告共用"""
+    project_code = project_code.strip() if project_code else None
+    removed = await run_in_threadpool(invalidate_query_cache, project_code)
+    return {"success": True, "project_code": project_code, "removed": removed}
+
+# 查询后台任务状态
+@router.get("/jobs/{job_id}")
+async def get_project_report_job(job_id: str):
+    """查询报告生成任务的状态、各步骤进度及结果文件"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    return job.to_dict()
+
+# 取消/清除后台任务
+@router.delete("/jobs/{job_id}")
+async def delete_project_report_job(job_id: str):
+    """取消未完成的任务（执行中的任务在当前步骤结束后中止），或清除已结束任务的记录"""
+    job = report_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    return job.to_dict()
+
 # 文件下载端点
 @app.get("/api/v1/download/file")
 async def download_file(path: str, filename: str):
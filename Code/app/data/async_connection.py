@@ -0,0 +1,115 @@
+"""
+异步数据库连接工具（execute_query_to_df 的异步版本）：API 接口与后台任务可在同一个事件循环上并发执行多个项目的查询
+生产环境使用 MySQL（aiomysql / asyncmy 驱动）；本地可用 SQLite 替身库（sqlite_config）在没有生产库时运行
+"""
+import asyncio
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote_plus
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from app.utils.Log.trace import stage
+from config.settings import ASYNC_DB_DRIVER, ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW, ASYNC_DB_QUERY_TIMEOUT
+
+# 异步引擎按事件循环分别创建（连接池中的连接只能在创建它的事件循环中使用）：事件循环 → {库: 引擎}
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncEngine]]" = weakref.WeakKeyDictionary()
+
+
+def sqlite_config(path) -> Dict[str, Any]:
+    """SQLite 替身库的连接配置，可代替 PROJECT_DB / SUPPLIES_DB 传入各查询函数"""
+    return {"sqlite": str(Path(path)), "database": Path(path).stem}
+
+
+def _db_key(db_config: Dict[str, Any]) -> str:
+    if "sqlite" in db_config:
+        return f"sqlite:{db_config['sqlite']}"
+    return f"{db_config['host']}:{db_config['port']}/{db_config['database']}"
+
+
+def get_async_engine(db_config: Dict[str, Any]) -> AsyncEngine:
+    """获取当前事件循环的异步引擎（池大小取配置 ASYNC_DB_POOL_SIZE / ASYNC_DB_MAX_OVERFLOW）"""
+    engines = _engines.setdefault(asyncio.get_running_loop(), {})
+    db_key = _db_key(db_config)
+    if db_key not in engines:
+        if "sqlite" in db_config:
+            engines[db_key] = create_async_engine(f"sqlite+aiosqlite:///{db_config['sqlite']}")
+        else:
+            # 对密码进行URL编码，处理特殊字符
+            password = quote_plus(db_config['password'])
+            engines[db_key] = create_async_engine(
+                f"mysql+{ASYNC_DB_DRIVER}://{db_config['user']}:{password}"
+                f"@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+                f"?charset={db_config.get('charset', 'utf8mb4')}",
+                pool_size=ASYNC_DB_POOL_SIZE,
+                max_overflow=ASYNC_DB_MAX_OVERFLOW,
+                pool_pre_ping=True,     # 取连接前先 ping，自动丢弃坏连接
+                pool_recycle=10800,     # 超过 3 小时（10800 秒）强制重建连接
+            )
+    return engines[db_key]
+
+
+async def dispose_async_engines() -> None:
+    """关闭当前事件循环的全部异步引擎（应用关闭时调用）"""
+    engines = _engines.pop(asyncio.get_running_loop(), {})
+    for engine in engines.values():
+        await engine.dispose()
+
+
+async def _execute(query: str, db_config: Dict[str, Any], params: Optional[Dict[str, Any]], timeout: Optional[float]):
+    """执行查询 → (列名, 行)；超时抛出 TimeoutError，超时的连接直接作废（不放回连接池）"""
+    timeout = ASYNC_DB_QUERY_TIMEOUT if timeout is None else timeout
+    engine = get_async_engine(db_config)
+    async with engine.connect() as conn:
+        try:
+            result = await asyncio.wait_for(conn.execute(text(query), params or {}), timeout)
+        except asyncio.TimeoutError:
+            await conn.invalidate()
+            raise TimeoutError(f"SQL查询超时（{timeout}秒）: {db_config['database']}") from None
+        return list(result.keys()), result.fetchall()
+
+
+async def fetch_df(query: str, db_config: Dict[str, Any], params: Dict[str, Any] = None,
+                   timeout: Optional[float] = None) -> pd.DataFrame:
+    """执行查询并返回DataFrame（与 execute_query_to_df 的结果一致）；timeout 为单条查询超时（秒），默认取配置 ASYNC_DB_QUERY_TIMEOUT"""
+    with stage("SQL查询", database=db_config['database'], mode="async") as st:
+        columns, rows = await _execute(query, db_config, params, timeout)
+        df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        st.set(rows=len(df))
+    return df
+
+
+async def fetch_rows(query: str, db_config: Dict[str, Any], params: Dict[str, Any] = None,
+                     timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """执行查询并返回行字典列表（列名 → 值）"""
+    with stage("SQL查询", database=db_config['database'], mode="async") as st:
+        columns, rows = await _execute(query, db_config, params, timeout)
+        st.set(rows=len(rows))
+    return [dict(zip(columns, row)) for row in rows]
+
+
+if __name__ == "__main__":
+    # 本地演示：SQLite 替身库上并发执行多个项目的查询（在 Code 目录下运行 python -m app.data.async_connection）
+    import tempfile
+    import time
+
+    async def demo():
+        path = Path(tempfile.gettempdir()) / "tianba_standin.sqlite3"
+        path.unlink(missing_ok=True)
+        db = sqlite_config(path)
+        async with get_async_engine(db).begin() as conn:
+            await conn.execute(text("CREATE TABLE project (id INTEGER PRIMARY KEY, snum TEXT, name TEXT)"))
+            await conn.execute(text("INSERT INTO project (snum, name) VALUES (:snum, :name)"),
+                               [{"snum": f"25P{1100 + i}01", "name": f"项目{i}"} for i in range(50)])
+
+        query = "SELECT id AS `项目ID`, snum AS `实验编号`, name AS `项目名称` FROM project WHERE snum LIKE :code"
+        t = time.perf_counter()
+        frames = await asyncio.gather(*(fetch_df(query, db, {"code": f"25P{1100 + i}%"}) for i in range(50)))
+        print(f"50 个查询并发完成: {time.perf_counter() - t:.3f}s, 行数 {sum(len(df) for df in frames)}")
+        print(frames[0])
+        print(await fetch_rows("SELECT COUNT(*) AS n FROM project", db))
+        await dispose_async_engines()
+
+    asyncio.run(demo())
@@ -0,0 +1,138 @@
+"""
+项目数据包：项目信息 → 给药方案 / 受试品信息
+给药方案只依赖项目ID、受试品信息只依赖实验编号（且在另一个库 SUPPLIES_DB），两者在项目信息查询后并发执行
+查询前先执行版本探测（app/data/project_version.py），数据未变化时三个结果直接取自查询结果缓存
+org_tag 标签列（动物名称、给药途径等）查询只返回 id，取得结果（含缓存命中）后用本地字典（app/data/org_tag.py）解码
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import pandas as pd
+
+from app.data.connection import execute_query_to_df
+from app.data.project_version import SQL_PROJECT_VERSION, SQL_SUPPLIES_VERSION
+from app.data.async_connection import fetch_df
+from app.data.org_tag import org_tags
+from app.data.project_report import project_info as report_info, dosage_plan as report_dosage, supplies_info as report_supplies
+from app.data.project_plan import project_info as plan_info, dosage_plan as plan_dosage, supplies_info as plan_supplies
+from app.utils.Cache.result_cache import fingerprint
+from app.utils.Log.trace import stage
+from config.settings import PROJECT_DB, SUPPLIES_DB, QUERY_CACHE_TTL, QUERY_CACHE_VERSION_PROBE
+
+
+class BundleQueries:
+    """一组项目数据包SQL（项目报告与项目方案各一组）；*_tags 为结果中需要按 org_tag 解码的列"""
+
+    def __init__(self, project_info: str, dosage_plan: str, supplies_info: str,
+                 project_info_tags=(), dosage_plan_tags=()):
+        self.project_info = project_info
+        self.dosage_plan = dosage_plan
+        self.supplies_info = supplies_info
+        self.project_info_tags = list(project_info_tags)
+        self.dosage_plan_tags = list(dosage_plan_tags)
+
+
+REPORT_QUERIES = BundleQueries(report_info.SQL_PROJECT_INFO, report_dosage.SQL_DOSAGE_PLAN, report_supplies.SQL_SUPPLIES_INFO,
+                               report_info.TAG_COLUMNS, report_dosage.TAG_COLUMNS)
+PLAN_QUERIES = BundleQueries(plan_info.SQL_PROJECT_INFO, plan_dosage.SQL_DOSAGE_PLAN, plan_supplies.SQL_SUPPLIES_INFO,
+                             plan_info.TAG_COLUMNS, plan_dosage.TAG_COLUMNS)
+
+
+class ProjectBundle:
+    """三个查询的结果；项目信息为空时另外两个为空表（未查询）；version 为查询前探测到的数据版本（未探测或探测失败时为 None）"""
+
+    def __init__(self, project_info: pd.DataFrame, dosage_plan: pd.DataFrame, supplies_info: pd.DataFrame,
+                 version: Optional[str] = None):
+        self.project_info = project_info
+        self.dosage_plan = dosage_plan
+        self.supplies_info = supplies_info
+        self.version = version
+
+
+def decode_bundle(bundle: ProjectBundle, queries: BundleQueries) -> ProjectBundle:
+    """用 org_tag 字典把项目信息与给药方案中的标签 id 列解码为名称（原位替换，列顺序不变）"""
+    bundle.project_info = org_tags.decode_columns(bundle.project_info, queries.project_info_tags)
+    bundle.dosage_plan = org_tags.decode_columns(bundle.dosage_plan, queries.dosage_plan_tags)
+    return bundle
+
+
+def supplies_params(experiment_code: str) -> Dict[str, str]:
+    """受试品查询参数：先用完整实验编号（如25P118601）匹配，若无结果再用项目编号（如25P1186）前缀匹配"""
+    project_number = experiment_code[:-2] if len(experiment_code) > 2 else experiment_code
+    return {"full_like": experiment_code, "prefix_like": project_number}
+
+
+def probe_project_version(project_code: str) -> Optional[str]:
+    """
+    探测项目数据版本：项目库一条、受试品库一条只走索引条件的统计查询，任一相关行增删改都会改变版本
+    探测失败（如库结构不一致）时返回 None，调用方不使用缓存
+    """
+    with stage("版本探测", project_code=project_code) as st:
+        try:
+            head = execute_query_to_df(SQL_PROJECT_VERSION, PROJECT_DB, {"project_code": project_code})
+            parts = head.iloc[0].to_dict() if not head.empty else {}
+            experiment_code = str(parts.get("实验编号") or "").strip()
+            if experiment_code:
+                supplies = execute_query_to_df(SQL_SUPPLIES_VERSION, SUPPLIES_DB,
+                                               {"project_number": supplies_params(experiment_code)["prefix_like"]})
+                parts["supplies"] = supplies.iloc[0, 0] if not supplies.empty else None
+        except Exception as e:
+            print(f"⚠️ 项目数据版本探测失败，本次不使用查询结果缓存: {e}")
+            st.fail(f"{type(e).__name__}: {e}")
+            return None
+        version = fingerprint(parts)
+        st.set(version=version[:12])
+    return version
+
+
+def fetch_project_bundle(project_code: str, queries: BundleQueries = REPORT_QUERIES) -> ProjectBundle:
+    """
+    查询项目数据包：项目信息之后，给药方案（PROJECT_DB）与受试品信息（SUPPLIES_DB）并发查询
+    三个结果按 QUERY_CACHE_TTL 缓存并以项目编号为标记（可按项目清除）；请求传 bypass_cache 时由 bypass_query_cache 跳过缓存读取
+    开启 QUERY_CACHE_VERSION_PROBE 时先探测数据版本，缓存只在版本一致时命中（探测失败则本次不使用缓存）
+    """
+    with stage("项目数据包", project_code=project_code):
+        version = probe_project_version(project_code) if QUERY_CACHE_VERSION_PROBE else None
+        use_cache = version is not None or not QUERY_CACHE_VERSION_PROBE
+
+        def cached(name):
+            """某查询的缓存参数 (有效期, 标记, 版本)"""
+            return (QUERY_CACHE_TTL.get(name) if use_cache else None), project_code, version
+
+        project_info = execute_query_to_df(queries.project_info, PROJECT_DB, {"project_code": project_code},
+                                           *cached("project_info"))
+        if project_info.empty:
+            return ProjectBundle(project_info, pd.DataFrame(), pd.DataFrame(), version)
+
+        first_row = project_info.iloc[0]
+        project_id = int(first_row["项目ID"])
+        experiment_code = str(first_row.get("实验编号", "")).strip()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"sql-{project_code}") as executor:
+            # 复制当前上下文提交，两个查询的阶段记录（trace）都挂在本阶段下
+            dosage = executor.submit(contextvars.copy_context().run, execute_query_to_df,
+                                     queries.dosage_plan, PROJECT_DB, {"project_id": project_id}, *cached("dosage_plan"))
+            supplies = executor.submit(contextvars.copy_context().run, execute_query_to_df,
+                                       queries.supplies_info, SUPPLIES_DB, supplies_params(experiment_code),
+                                       *cached("supplies_info"))
+            bundle = ProjectBundle(project_info, dosage.result(), supplies.result(), version)
+        return decode_bundle(bundle, queries)
+
+
+async def fetch_project_bundle_async(project_code: str, queries: BundleQueries = REPORT_QUERIES, db_configs=None) -> ProjectBundle:
+    """fetch_project_bundle 的异步版本（事件循环上并发，不经过查询结果缓存）；db_configs 为 (项目库, 受试品库)，默认 PROJECT_DB / SUPPLIES_DB，本地可传 SQLite 替身库"""
+    project_db, supplies_db = db_configs or (PROJECT_DB, SUPPLIES_DB)
+    with stage("项目数据包", project_code=project_code, mode="async"):
+        project_info = await fetch_df(queries.project_info, project_db, {"project_code": project_code})
+        if project_info.empty:
+            return ProjectBundle(project_info, pd.DataFrame(), pd.DataFrame())
+
+        first_row = project_info.iloc[0]
+        experiment_code = str(first_row.get("实验编号", "")).strip()
+        dosage_plan, supplies_info = await asyncio.gather(
+            fetch_df(queries.dosage_plan, project_db, {"project_id": int(first_row["项目ID"])}),
+            fetch_df(queries.supplies_info, supplies_db, supplies_params(experiment_code)),
+        )
+        # 字典过期时的重新载入是同步查询，放到线程中执行
+        return await asyncio.to_thread(decode_bundle, ProjectBundle(project_info, dosage_plan, supplies_info), queries)
@@ -1,33 +1,93 @@
 """
 简化的数据库连接工具
 """
+import contextvars
+import hashlib
+import threading
+from contextlib import contextmanager
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from urllib.parse import quote_plus
+from app.utils.Cache.query_cache import QueryCache
+from app.utils.Cache.result_cache import fingerprint
+from app.utils.Log.trace import stage
+from config.settings import QUERY_CACHE_FILE, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_BYTES
 
-# 全局引擎实例
+# 全局引擎实例（并发的首次请求只创建一个引擎/连接池）
 _engines = {}
+_engines_lock = threading.Lock()
+
+# 查询结果缓存（SQLite 文件，项目方案与项目报告两个进程共用）
+query_cache = QueryCache(QUERY_CACHE_FILE, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_BYTES)
+# 当前请求是否跳过缓存读取（查询结果仍会写入缓存，供之后的请求使用）
+_bypass = contextvars.ContextVar("query_cache_bypass", default=False)
 
 def get_engine(db_config: Dict[str, Any]) -> Engine:
     """获取数据库引擎"""
     db_key = f"{db_config['host']}:{db_config['port']}/{db_config['database']}"
     
-    if db_key not in _engines:
-        # 对密码进行URL编码，处理特殊字符
-        password = quote_plus(db_config['password'])
-        _engines[db_key] = create_engine(
-            f"mysql+pymysql://{db_config['user']}:{password}"
-            f"@{db_config['host']}:{db_config['port']}/{db_config['database']}"
-            f"?charset={db_config.get('charset', 'utf8mb4')}",
-            pool_pre_ping=True,     # 取连接前先 ping，自动丢弃坏连接
-            pool_recycle=10800,     # 超过 3 小时（10800 秒）强制重建连接
-        )
-    return _engines[db_key]
-
-def execute_query_to_df(query: str, db_config: Dict[str, Any], params: Dict[str, Any] = None) -> pd.DataFrame:
-    """执行查询并返回DataFrame"""
-    engine = get_engine(db_config)
-    with engine.connect() as conn:
-        return pd.read_sql(text(query), conn, params=params or {})
\ No newline at end of file
+    engine = _engines.get(db_key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(db_key)
+            if engine is None:
+                # 对密码进行URL编码，处理特殊字符
+                password = quote_plus(db_config['password'])
+                engine = _engines[db_key] = create_engine(
+                    f"mysql+pymysql://{db_config['user']}:{password}"
+                    f"@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+                    f"?charset={db_config.get('charset', 'utf8mb4')}",
+                    pool_pre_ping=True,     # 取连接前先 ping，自动丢弃坏连接
+                    pool_recycle=10800,     # 超过 3 小时（10800 秒）强制重建连接
+                )
+    return engine
+
+@contextmanager
+def bypass_query_cache(enabled: bool = True):
+    """在此范围内（含复制了上下文的子线程）的查询跳过缓存读取，直接查库"""
+    token = _bypass.set(bool(enabled))
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+def query_cache_bypassed() -> bool:
+    """当前请求是否跳过缓存读取（其他缓存如已生成的文档也据此跳过）"""
+    return _bypass.get()
+
+def query_key(query: str, db_config: Dict[str, Any], params: Dict[str, Any] = None, version: str = None) -> str:
+    """缓存键：SQL文本 + 库 + 参数 + 数据版本（版本探测结果，变化后旧条目不再命中）"""
+    return fingerprint({
+        "sql": hashlib.sha256(query.encode("utf-8")).hexdigest(),
+        "database": f"{db_config['host']}:{db_config['port']}/{db_config['database']}",
+        "params": params or {},
+        "version": version,
+    })
+
+def invalidate_query_cache(project_code: Optional[str] = None) -> int:
+    """清除某项目的缓存查询结果（不传则全部清除），返回清除条数"""
+    return query_cache.invalidate(project_code)
+
+def execute_query_to_df(query: str, db_config: Dict[str, Any], params: Dict[str, Any] = None,
+                        cache_ttl: float = None, cache_tag: str = None, cache_version: str = None) -> pd.DataFrame:
+    """
+    执行查询并返回DataFrame
+    cache_ttl：结果缓存的有效期（秒），不传或为0时不缓存；空结果不缓存（数据录入后下次请求即可查到）
+    cache_tag：缓存条目所属项目（按项目清除缓存时使用）；cache_version：数据版本，与缓存时的版本不同则不命中
+    """
+    key = query_key(query, db_config, params, cache_version) if cache_ttl else None
+    with stage("SQL查询", database=db_config['database']) as st:
+        if key and not _bypass.get():
+            df = query_cache.get(key)
+            if df is not None:
+                st.set(rows=len(df), cached=True)
+                return df
+        engine = get_engine(db_config)
+        with engine.connect() as conn:
+            df = pd.read_sql(text(query), conn, params=params or {})
+        st.set(rows=len(df))
+    if key and not df.empty:
+        query_cache.put(key, df, cache_ttl, cache_tag)
+    return df
@@ -0,0 +1,143 @@
+"""
+org_tag 字典：一次批量查询载入 id → 名称，进程内按间隔刷新（可选持久化为本地快照）
+查询只返回 org_tag id（或 id 列表，如 dose_mode 的 "[12, 7]"），在本地解码，不在数据库中逐行执行 FIND_IN_SET/REPLACE 子查询
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from app.data.connection import execute_query_to_df
+from config.settings import PROJECT_DB, ORG_TAG_SNAPSHOT, ORG_TAG_REFRESH
+
+SQL_ORG_TAG = "SELECT id, sname FROM org_tag"
+
+_STRIP = re.compile(r"[\[\]\s]")
+MISS_REFRESH = 60   # 遇到字典中没有的 id 时最多每 60 秒重新载入一次（新增的标签无需等到刷新间隔）
+
+
+def tag_ids(raw) -> list:
+    """id 列表字段 → id 字符串列表（与 SQL 中 REPLACE 去掉 [ ] 空格后 FIND_IN_SET 的拆分一致）"""
+    if raw is None:
+        return []
+    if isinstance(raw, float):
+        if math.isnan(raw):
+            return []
+        if raw.is_integer():
+            raw = int(raw)
+    return [part for part in _STRIP.sub("", str(raw)).split(",") if part]
+
+
+class OrgTagDictionary:
+    """
+    用法：
+        org_tags.decode("[12, 7]")                      # "灌胃 + 腹腔注射"（按列表顺序，重复 id 只保留第一次；都不存在时为 None）
+        org_tags.decode_columns(df, ["给药途径", "给药频率"])  # 返回解码后的副本
+        org_tags.refresh()                              # 立即重新载入，返回标签数
+    字典超过 refresh_seconds 后在下次使用时重新载入；数据库不可用时沿用内存中的字典或本地快照
+    """
+
+    def __init__(self, db_config, snapshot_path=None, refresh_seconds: float = 3600):
+        self.db_config = db_config
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.refresh_seconds = refresh_seconds
+        self._tags: Optional[Dict[str, str]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """从数据库重新载入（失败时抛出异常），并写入本地快照"""
+        df = execute_query_to_df(SQL_ORG_TAG, self.db_config)
+        tags = {str(i): name for i, name in zip(df["id"], df["sname"])}
+        with self._lock:
+            self._tags, self._loaded_at = tags, time.time()
+        self._save_snapshot(tags, self._loaded_at)
+        return len(tags)
+
+    def mapping(self) -> Dict[str, str]:
+        """当前字典（id 字符串 → 名称）；过期时重新载入"""
+        if self._tags is None or time.time() - self._loaded_at > self.refresh_seconds:
+            with self._lock:
+                if self._tags is None:
+                    self._load_snapshot()
+                stale = self._tags is None or time.time() - self._loaded_at > self.refresh_seconds
+            if stale:
+                self._try_refresh()
+        return self._tags or {}
+
+    def decode(self, raw, sep: str = " + ") -> Optional[str]:
+        names = self._names(tag_ids(raw), self.mapping())
+        return sep.join(names) if names else None
+
+    def decode_columns(self, df: pd.DataFrame, columns: Iterable[str], sep: str = " + ") -> pd.DataFrame:
+        """把 df 中各 id 列解码为名称（列顺序不变），返回副本；有字典中没有的 id 时按 MISS_REFRESH 重新载入一次"""
+        columns = [col for col in columns if col in df.columns]
+        if df.empty or not columns:
+            return df
+        tags = self.mapping()
+        if any(i not in tags for col in columns for raw in df[col] for i in tag_ids(raw)) \
+                and time.time() - self._loaded_at > MISS_REFRESH:
+            tags = self._try_refresh() or tags
+        if not tags:   # 字典从未载入成功（数据库与快照都不可用）时保留原始 id
+            return df
+        df = df.copy()
+        for col in columns:
+            df[col] = [sep.join(names) if names else None
+                       for names in (self._names(tag_ids(raw), tags) for raw in df[col])]
+        return df
+
+    @staticmethod
+    def _names(ids, tags: Dict[str, str]) -> list:
+        """按列表中第一次出现的顺序取名称（与 GROUP_CONCAT ... ORDER BY FIND_IN_SET 一致）"""
+        seen, names = set(), []
+        for i in ids:
+            if i in tags and i not in seen:
+                seen.add(i)
+                names.append(tags[i])
+        return names
+
+    def _try_refresh(self) -> Optional[Dict[str, str]]:
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"⚠️ org_tag 字典载入失败，沿用{'已有字典' if self._tags else '空字典'}: {e}")
+            with self._lock:
+                # 失败后同样等一个刷新间隔再重试，避免每次解码都访问不可用的数据库
+                self._loaded_at = time.time()
+                if self._tags is None:
+                    self._tags = {}
+            return None
+        return self._tags
+
+    def _load_snapshot(self):
+        if self.snapshot_path is None:
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._tags, self._loaded_at = dict(data["tags"]), float(data["loaded_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _save_snapshot(self, tags: Dict[str, str], loaded_at: float):
+        if self.snapshot_path is None:
+            return
+        tmp = self.snapshot_path.with_suffix(f".tmp-{os.getpid()}-{threading.get_ident()}")
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"loaded_at": loaded_at, "tags": tags}, f, ensure_ascii=False)
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            print(f"⚠️ 写入 org_tag 字典快照失败: {e}")
+            tmp.unlink(missing_ok=True)
+
+
+# 项目库的 org_tag 字典（项目方案与项目报告共用快照文件）
+org_tags = OrgTagDictionary(PROJECT_DB, ORG_TAG_SNAPSHOT, ORG_TAG_REFRESH)
@@ -3,7 +3,7 @@
 包含项目基础信息查询
 """
 
-# 项目信息查询（按项目编号前缀）
+# 项目信息查询（按项目编号前缀）；动物名称/动物品系/体重范围返回 org_tag id，由 app.data.org_tag 在本地解码
 SQL_PROJECT_INFO = """
 SELECT
     p.id AS `项目ID`, 
@@ -24,14 +24,14 @@ SELECT
     DATE_FORMAT(p.start_date, '%Y年%m月%d日') AS `开始日期`,
     DATE_FORMAT(p.end_date, '%Y年%m月%d日') AS `结束日期`,
     c.cell_names AS `细胞名称`,           
-    an.sname AS `动物名称`, 
-    st.sname AS `动物品系`, 
+    pea.animal_name AS `动物名称`, 
+    pea.animal_strain AS `动物品系`, 
     CASE 
         WHEN pea.mouse_age IS NOT NULL AND pea.mouse_age <> 0 
             THEN pea.mouse_age
         ELSE CONCAT(pea.rat_age_low, '-', pea.rat_age_top, '周')
     END AS `鼠龄`,
-    wt.sname AS `体重范围`, 
+    pea.weight_range AS `体重范围`, 
     CASE pea.sex
         WHEN 0 THEN '雌鼠'
         WHEN 1 THEN '雄鼠'
@@ -45,12 +45,6 @@ SELECT
 FROM project p
 LEFT JOIN project_entry_effect_animal pea
     ON p.id = pea.project_id
-LEFT JOIN org_tag AS an
-    ON pea.animal_name = an.id
-LEFT JOIN org_tag AS st
-    ON pea.animal_strain = st.id
-LEFT JOIN org_tag AS wt
-    ON pea.weight_range = wt.id
 LEFT JOIN united_project up
     ON p.snum LIKE CONCAT('%', up.snum, '%')
 LEFT JOIN org_emp oe
@@ -84,4 +78,7 @@ LEFT JOIN project_member pm_in
 LEFT JOIN org_emp oe_in
     ON oe_in.id = pm_in.rele_id
 WHERE p.snum LIKE CONCAT(:project_code, '%');
-"""
\ No newline at end of file
+"""
+
+# 需要按 org_tag 解码的列
+TAG_COLUMNS = ["动物名称", "动物品系", "体重范围"]
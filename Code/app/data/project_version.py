@@ -0,0 +1,71 @@
+"""
+项目数据版本探测SQL
+只按项目ID/编号的索引条件统计各表的行数与内容校验和（CRC32 按行异或），不做字典表关联与字符串聚合，
+用于判断缓存的项目信息/给药方案/受试品信息是否仍然有效（远比完整查询便宜）
+字典表（org_tag、org_emp）与联合项目（united_project）未纳入探测，其变化由缓存有效期兜底
+"""
+
+# 项目库版本（按项目编号前缀）：项目、动物、药效、给药方案、细胞、体内实验负责人各一个 "行数:校验和"
+SQL_PROJECT_VERSION = """
+SELECT
+    MIN(p.snum) AS `实验编号`,
+    CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|',
+        p.id, p.snum, p.sname, p.customer_name, p.start_date, p.end_date
+    ))), 0)) AS `project`,
+    (
+        SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|',
+            pea.project_id, pea.animal_name, pea.animal_strain, pea.weight_range, pea.mouse_age,
+            pea.rat_age_low, pea.rat_age_top, pea.sex, pea.order_number
+        ))), 0))
+        FROM project_entry_effect_animal pea
+        JOIN project p2 ON p2.id = pea.project_id
+        WHERE p2.snum LIKE CONCAT(:project_code, '%')
+    ) AS `animal`,
+    (
+        SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|',
+            ppe.project_id, ppe.project_purpose, ppe.group_number, ppe.groups, ppe.animal_number, ppe.group_condition
+        ))), 0))
+        FROM project_entry_pharmacological_effect ppe
+        JOIN project p2 ON p2.id = ppe.project_id
+        WHERE p2.snum LIKE CONCAT(:project_code, '%')
+    ) AS `pharmacological`,
+    (
+        SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|',
+            d.project_id, d.group_category, d.treatment_method, d.animals_number, d.dose,
+            d.dose_mode, d.dose_frequency, d.dose_times
+        ))), 0))
+        FROM project_entry_effect_drug d
+        JOIN project p2 ON p2.id = d.project_id
+        WHERE p2.snum LIKE CONCAT(:project_code, '%')
+    ) AS `drug`,
+    (
+        SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', pec.project_id, pec.id, tt.tag_id))), 0))
+        FROM project_entry_effect_cell pec
+        JOIN project p2 ON p2.id = pec.project_id
+        JOIN target_tag tt ON tt.project_effect_cell_id = pec.id
+        WHERE p2.snum LIKE CONCAT(:project_code, '%')
+    ) AS `cell`,
+    (
+        SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', pm.project_id, pm.id, pm.rele_id))), 0))
+        FROM project_member pm
+        JOIN project p2 ON p2.id = pm.project_id
+        WHERE p2.snum LIKE CONCAT(:project_code, '%')
+          AND pm.project_role = 2524
+    ) AS `member`
+FROM project p
+WHERE p.snum LIKE CONCAT(:project_code, '%');
+"""
+
+# 受试品库版本（按项目号前缀，覆盖受试品查询的实验号精确匹配与项目号回退匹配）
+SQL_SUPPLIES_VERSION = """
+SELECT
+    CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|',
+        rsp.testno, rsp.projectno, rsp.NAME, rsp.simplename, rsp.suppliesType, rsp.properties, rsp.purity,
+        rsp.lot_number, rsp.material_lot_number, rsp.models, rsp.modelsunit, rsp.potency, rsp.potencyunit,
+        rsp.storagecondition, rsp.issunblock, rsp.isdrystorage, rsp.manufacturer, rsp.customername,
+        rsp.mfg, rsp.validity, rsp.sdname
+    ))), 0)) AS `supplies`
+FROM m_reagent_supplies rsp
+WHERE rsp.testno LIKE CONCAT(:project_number, '%')
+   OR rsp.projectno LIKE CONCAT(:project_number, '%');
+"""
@@ -9,11 +9,8 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent.parent.parent.parent.parent
 if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
 # 导入根目录各个模块
-from app.data.project_plan.project_info import SQL_PROJECT_INFO
-from app.data.project_plan.dosage_plan import SQL_DOSAGE_PLAN
-from app.data.project_plan.supplies_info import SQL_SUPPLIES_INFO
-from app.data.connection import execute_query_to_df
-from config.settings import PROJECT_DB, SUPPLIES_DB, PLAN_TEMP
+from app.data.bundle import fetch_project_bundle, PLAN_QUERIES
+from config.settings import PLAN_TEMP
 
 # —— 受试品信息合并：同名聚合、每列去重并用逗号连接 —— #
 _NULLS = {"", "-", "NA", "/", "\\"}
@@ -66,46 +63,19 @@ def _autosize(worksheet, dataframe: pd.DataFrame, max_rows: int = 20, min_width:
         width = max(min_width, min(max_len + 8, max_width))
         worksheet.set_column(i, i, width)
 
-def export_sql_to_excel(project_code, excel_path=None):
-    # 导出SQL数据到Excel,已设置默认值
+def export_sql_to_excel(project_code, excel_path=None, bundle=None):
+    # 导出SQL数据到Excel,已设置默认值；bundle 为已查询的项目数据包（不传则在此查询）
     if excel_path is None: excel_path = f"{PLAN_TEMP}/{project_code}_明细.xlsx"
     excel_path = Path(excel_path)
     excel_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # 1. 查询项目基本信息
-    project_info = execute_query_to_df(
-        SQL_PROJECT_INFO,
-        PROJECT_DB,
-        {"project_code": project_code}
-    )
-    
-    # 获取项目ID（用于后续查询）
+    # 1. 查询项目基本信息；2-3. 给药方案与受试品信息在其后并发查询
+    if bundle is None: bundle = fetch_project_bundle(project_code, PLAN_QUERIES)
+    project_info = bundle.project_info
     if project_info.empty:
         raise ValueError(f"未找到项目编号为 {project_code} 的项目信息")
-    
-    project_id = project_info.iloc[0]['项目ID']
-    
-    # 2. 查询给药方案
-    dosage_plan = execute_query_to_df(
-        SQL_DOSAGE_PLAN,
-        PROJECT_DB,
-        {"project_id": project_id}
-    )
-    
-    # 3. 查询受试品信息（使用与老代码相同的逻辑）
-    # 使用实验编号完整匹配
-    experiment_code = str(project_info.iloc[0].get("实验编号", "")).strip()  # 完整实验编号，如25P118601
-    project_number = experiment_code[:-2] if len(experiment_code) > 2 else experiment_code  # 项目编号，如25P1186
-    
-    # 查询参数：先用完整实验编号精确匹配，若无结果则用项目编号前缀匹配
-    experiment_match = f"{experiment_code}"  # 用完整实验编号匹配实验号
-    project_prefix_match = f"{project_number}"   # 若无，再匹配项目编号
-    
-    supplies_info = execute_query_to_df(
-        SQL_SUPPLIES_INFO,
-        SUPPLIES_DB,
-        {"full_like": experiment_match, "prefix_like": project_prefix_match}
-    )
+    dosage_plan = bundle.dosage_plan
+    supplies_info = bundle.supplies_info
     
     # 按"名称"聚合：同名受试品的各列去重合并（浓度/规格不同会用逗号并列，相同只保留一个）
     supplies_info_agg = _aggregate_supplies_by_name(supplies_info)
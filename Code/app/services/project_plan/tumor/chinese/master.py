@@ -14,7 +14,23 @@ if str(current_dir) not in sys.path: sys.path.insert(0, str(current_dir))
 from .export_sql_service import export_sql_to_excel
 from .fill_word_service import fill_word_template
 from .add_info_service import annotate_b_min
+from app.data.bundle import fetch_project_bundle, PLAN_QUERIES
+from app.data.connection import query_cache_bypassed
+from app.utils.Cache.result_cache import ResultCache, file_digest, frame_digest, fingerprint
+from app.utils.Log.trace import stage
 from config.settings import PLAN_OUT, PLAN_TEMP, PLAN_TPL
+from config.settings import PLAN_CACHE_DIR, PLAN_CACHE_MAX_ENTRIES, PLAN_CACHE_MAX_BYTES
+
+# 已生成方案的结果缓存（按SQL结果与模板复用）
+plan_cache = ResultCache(PLAN_CACHE_DIR, PLAN_CACHE_MAX_ENTRIES, PLAN_CACHE_MAX_BYTES)
+
+def plan_fingerprint(bundle, template_path):
+    """计算方案输入指纹：SQL结果摘要（项目信息/给药方案/受试品信息）、模板内容"""
+    return fingerprint({
+        "plan": "tumor-chinese",
+        "sql": frame_digest(bundle.project_info, bundle.dosage_plan, bundle.supplies_info),
+        "template": file_digest(template_path),
+    })
 
 def generate_project_plan(project_code):
     # 生成文件名（与原代码保持一致）
@@ -31,16 +47,34 @@ def generate_project_plan(project_code):
     Path(PLAN_OUT).mkdir(parents=True, exist_ok=True)
     
     try:
+        # 1. 查询项目数据（数据版本未变化时取自查询结果缓存）；输入未变化时直接返回缓存的项目方案
+        bundle = fetch_project_bundle(project_code, PLAN_QUERIES)
+        with stage("检查结果缓存") as st:
+            cache_key = plan_fingerprint(bundle, template_path) if not bundle.project_info.empty else None
+            cached = plan_cache.get(cache_key) if cache_key and not query_cache_bypassed() else None
+            st.set(hit=bool(cached))
+        if cached:
+            print(f"🎉 输入未变化，使用缓存的项目方案")
+            return Path(cached["files"]["word"]), Path(cached["files"]["excel"])
+        
         # 2. 执行 SQL → 写入 Excel（竖向）
-        result_excel_path = export_sql_to_excel(project_code, excel_path)
+        with stage("导出SQL数据"):
+            result_excel_path = export_sql_to_excel(project_code, excel_path, bundle)
         
         # 3. 基于【给药方案】→"给药频率"写入明细页的"注释b"
         try:
-            annotate_b_min(result_excel_path)
-        except: pass
+            with stage("生成注释"):
+                annotate_b_min(result_excel_path)
+        except: cache_key = None   # 不缓存不完整的方案
         
         # 4. Excel → Word 模板替换
-        fill_word_template(result_excel_path, template_path, word_output_path)
+        with stage("填充Word模板") as st:
+            fill_word_template(result_excel_path, template_path, word_output_path)
+            st.set(bytes=word_output_path.stat().st_size)
+        
+        # 写入结果缓存
+        if cache_key:
+            plan_cache.put(cache_key, {"word": word_output_path, "excel": excel_path}, meta={"project_code": project_code})
         print(f"🎉 项目方案生成完成！")
         
         return  word_output_path , excel_path
@@ -1,12 +1,32 @@
 # -*- coding: utf-8 -*-
-import platform, subprocess, tempfile, os, shutil, json
+import platform, subprocess, tempfile, os, shutil, json, sys, re
+from pathlib import Path
+from functools import lru_cache
+import numpy as np
+from scipy.stats import chi2
+from scipy.special import ndtr, gammaln
 
-# 如为 Windows，请修改为你本机 Rscript 路径；非 Windows 使用 PATH 中的 Rscript
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent.parent.parent.parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.utils.Log.trace import stage
+from app.utils.Cache.memo_store import MemoStore
+from app.utils.Cache.result_cache import fingerprint
+from config.settings import DUNNETT_BACKEND, STATS_CACHE_FILE, STATS_CACHE_MAX_ENTRIES
+
+# 算法版本：修改统计计算或输出格式时递增，使已缓存的结果失效
+DUNNETT_ALGO_VERSION = 1
+
+# Dunnett结果缓存（持久化，按数据集指纹复用）
+stats_memo = MemoStore(STATS_CACHE_FILE, STATS_CACHE_MAX_ENTRIES)
+
+# R 后端（DUNNETT_BACKEND = "r" 时使用）：如为 Windows，请修改为你本机 Rscript 路径；非 Windows 使用 PATH 中的 Rscript
 RSCRIPT_WIN = r"D:\R-4.5.1\R-4.5.1\bin\Rscript.exe"
 
 R_CODE = r'''
-args <- commandArgs(trailingOnly=TRUE)
-control <- if (length(args)>=1) args[1] else "G1"
+# 批量输入（stdin JSON）：{"数据集": {"control": "G1", "rows": [{"group":"G1","volume":22.9}, ...]}, ...}
+# 批量输出（stdout JSON）：{"数据集": [{"group","Summary","P-Value"}, ...] 或 {"error": "错误信息"}}
+# 一个 R 会话计算全部数据集，包只加载一次
 
 # 设置固定的随机种子确保结果可重现
 set.seed(5)
@@ -24,58 +44,63 @@ suppressPackageStartupMessages(library(mvtnorm))
 # 与 Prism 对齐的对比编码（ treatment 对照编码 ）
 options(contrasts=c("contr.treatment","contr.poly"))
 
-# 从 stdin 读入 JSON 行表
-# 预期格式： [{"group":"G1","volume":22.9}, ...]
-df <- jsonlite::fromJSON(paste(readLines("stdin", warn=FALSE), collapse=""))
-
-# 类型与水平顺序（把对照放到第一个水平，其余按字母数字排序，确保稳定）
-df$group  <- factor(df$group)
-df$volume <- as.numeric(df$volume)
-# 如果指定的对照组不存在，使用第一组
-if (!(control %in% levels(df$group))) control <- levels(df$group)[1]
-df$group  <- factor(df$group, levels=c(control, sort(setdiff(levels(df$group), control))))
-
 # 与 Prism 展示规则近似的小数与边界格式
 fmt_p <- function(x){
   if (is.na(x)) return(NA_character_)
   if (x < 1e-4) "<0.0001" else if (x > 0.9999) ">0.9999" else sprintf("%.4f", round(x, 4))
 }
 
-# 一元等方差 ANOVA（Prism 的 Dunnett 基于 pooled MSE，而非 Welch）
-fit <- aov(volume ~ group, data=df, na.action=na.omit)
-
-# Dunnett 同时比较（双侧），家庭误差率 single-step 校正
-# 使用确定性的 Miwa 算法（无随机、与 Prism 行为一致）
-gh <- glht(fit, linfct=mcp(group="Dunnett"), alternative="two.sided")
-sm <- summary(
-  gh,
-  test      = adjusted("single-step"),  # Dunnett 同时校正
-  algorithm = mvtnorm::Miwa()           # 确定性积分，结果固定
-)
-
-# Prism 报告的是校正后的 p 值
-p_adj <- as.numeric(sm$test$pvalues)
-
-# 显著性星标（可按需调整）
-stars <- ifelse(p_adj < 0.0001, "****",
-         ifelse(p_adj < 0.001,  "***",
-         ifelse(p_adj < 0.01,  "**",
-         ifelse(p_adj < 0.05,  "*", "ns"))))
-
-# 提取对比名中的“处理组名”（如 "G3 - G1 == 0" -> "G3"）
-gi <- sub(" -.*$", "", sub(" ==.*$", "", rownames(sm$linfct)))
-
-out <- data.frame(
-  group     = gi,
-  Summary   = stars,
-  `P-Value` = vapply(p_adj, fmt_p, character(1)),
-  check.names = FALSE
-)
-
-# 若组名包含数字，可按数字排序；否则可注释掉这一行改为原有顺序
-out <- out[order(as.integer(sub("^\\D+","", out$group))), , drop=FALSE]
-
-cat(jsonlite::toJSON(out, dataframe="rows", auto_unbox=TRUE, rownames=FALSE))
+dunnett_one <- function(df, control){
+  # 类型与水平顺序（把对照放到第一个水平，其余按字母数字排序，确保稳定）
+  df$group  <- factor(df$group)
+  df$volume <- as.numeric(df$volume)
+  # 如果指定的对照组不存在，使用第一组
+  if (!(control %in% levels(df$group))) control <- levels(df$group)[1]
+  df$group  <- factor(df$group, levels=c(control, sort(setdiff(levels(df$group), control))))
+
+  # 一元等方差 ANOVA（Prism 的 Dunnett 基于 pooled MSE，而非 Welch）
+  fit <- aov(volume ~ group, data=df, na.action=na.omit)
+
+  # Dunnett 同时比较（双侧），家庭误差率 single-step 校正
+  # 使用确定性的 Miwa 算法（无随机、与 Prism 行为一致）
+  gh <- glht(fit, linfct=mcp(group="Dunnett"), alternative="two.sided")
+  sm <- summary(
+    gh,
+    test      = adjusted("single-step"),  # Dunnett 同时校正
+    algorithm = mvtnorm::Miwa()           # 确定性积分，结果固定
+  )
+
+  # Prism 报告的是校正后的 p 值
+  p_adj <- as.numeric(sm$test$pvalues)
+
+  # 显著性星标（可按需调整）
+  stars <- ifelse(p_adj < 0.0001, "****",
+           ifelse(p_adj < 0.001,  "***",
+           ifelse(p_adj < 0.01,  "**",
+           ifelse(p_adj < 0.05,  "*", "ns"))))
+
+  # 提取对比名中的“处理组名”（如 "G3 - G1 == 0" -> "G3"）
+  gi <- sub(" -.*$", "", sub(" ==.*$", "", rownames(sm$linfct)))
+
+  out <- data.frame(
+    group     = gi,
+    Summary   = stars,
+    `P-Value` = vapply(p_adj, fmt_p, character(1)),
+    check.names = FALSE
+  )
+
+  # 若组名包含数字，可按数字排序；否则可注释掉这一行改为原有顺序
+  out[order(as.integer(sub("^\\D+","", out$group))), , drop=FALSE]
+}
+
+batch <- jsonlite::fromJSON(paste(readLines("stdin", warn=FALSE), collapse=""))
+res <- lapply(batch, function(item){
+  control <- if (is.null(item$control)) "G1" else item$control
+  tryCatch(dunnett_one(as.data.frame(item$rows), control),
+           error=function(e) list(error=conditionMessage(e)))
+})
+
+cat(jsonlite::toJSON(res, dataframe="rows", auto_unbox=TRUE, rownames=FALSE))
 '''
 
 def _pick_rscript():
@@ -88,21 +113,212 @@ def _pick_rscript():
         raise FileNotFoundError("PATH 中未找到 Rscript")
     return r
 
-def calculate_dunnett_json(json_rows: str, control="G1"):
-    """输入：长表 JSON，如 '[{"group":"G1","volume":22.9}, ...]'；输出：list[dict] 三列结果（group/Summary/P-Value）"""
+def _calculate_dunnett_r(datasets):
+    """R 后端：一个 Rscript 进程计算全部数据集（multcomp::glht + Miwa 积分），用于与原生实现核对结果"""
     rscript = _pick_rscript()
+    # 数据集名称可能含中文，传给 R 时改用 ASCII 键，避免 Windows 下 stdin 编码问题
+    keys = {f"d{i}": name for i, name in enumerate(datasets)}
+    payload = json.dumps({k: datasets[name] for k, name in keys.items()}, ensure_ascii=True)
     with tempfile.NamedTemporaryFile('w', suffix='.R', delete=False, encoding='utf-8') as fR:
         fR.write(R_CODE); r_file = fR.name
     try:
-        proc = subprocess.run([rscript, r_file, control], input=json_rows,
+        proc = subprocess.run([rscript, r_file], input=payload,
                               capture_output=True, text=True)
         if proc.returncode != 0:
             raise RuntimeError(proc.stderr.strip() or "Rscript 执行失败（无错误信息）")
-        return json.loads(proc.stdout)
+        out = json.loads(proc.stdout)
+        return {name: out.get(k, {"error": "R 未返回结果"}) for k, name in keys.items()}
     finally:
         try: os.remove(r_file)
         except OSError: pass
 
+# ===== 原生 Dunnett 检验（与 R_CODE 的计算和输出格式一致） =====
+def _gauss_legendre(lo, hi, panels, order):
+    """分段 Gauss-Legendre 求积节点与权重"""
+    x, w = np.polynomial.legendre.leggauss(order)
+    edges = np.linspace(lo, hi, panels + 1)
+    mid, half = (edges[:-1] + edges[1:]) / 2, np.diff(edges) / 2
+    return (mid[:, None] + half[:, None] * x).ravel(), (half[:, None] * w).ravel()
+
+# 标准正态 Z 的求积节点（权重已乘以正态密度）
+_Z, _WZ = _gauss_legendre(-8.5, 8.5, 16, 16)
+_WZ = _WZ * np.exp(-_Z * _Z / 2) / np.sqrt(2 * np.pi)
+
+@lru_cache(maxsize=64)
+def _scale_nodes(dof):
+    """S = sqrt(chi2(dof)/dof) 的求积节点与权重（权重已乘以 S 的密度）"""
+    s, ws = _gauss_legendre(0, np.sqrt(chi2.isf(1e-16, dof) / dof), 24, 8)
+    log_pdf = np.log(2) + (dof / 2) * np.log(dof / 2) - gammaln(dof / 2) + (dof - 1) * np.log(s) - dof * s * s / 2
+    return s, ws * np.exp(log_pdf)
+
+def _prob_max_abs_t(c, lam, dof):
+    """
+    P(max|T_i| <= c)：T_i = Z_i / S，Z_i 为标准正态且相关系数 rho_ij = lam_i * lam_j（Dunnett 对比的相关结构）
+    对 Z 的公共因子与 S 做二维数值积分（确定性，结果固定；与 Miwa 算法的差异远小于 4 位小数）
+    """
+    s, ws = _scale_nodes(dof)
+    sd = np.sqrt(1 - lam ** 2)
+    z = _Z[:, None, None]
+    cs = (c * s)[None, :, None]
+    inner = ndtr((cs - lam * z) / sd) - ndtr((-cs - lam * z) / sd)
+    value = _WZ @ np.prod(inner, axis=2) @ ws
+    return min(max(float(value), 0.0), 1.0)
+
+def fmt_p(x):
+    """与 Prism 展示规则近似的小数与边界格式"""
+    if x is None or np.isnan(x):
+        return None
+    if x < 1e-4:
+        return "<0.0001"
+    if x > 0.9999:
+        return ">0.9999"
+    return f"{round(x, 4):.4f}"
+
+def p_stars(x):
+    """显著性星标"""
+    if x is None or np.isnan(x):
+        return None
+    if x < 0.0001: return "****"
+    if x < 0.001: return "***"
+    if x < 0.01: return "**"
+    if x < 0.05: return "*"
+    return "ns"
+
+def _group_number(group):
+    """组名去掉前缀非数字后的整数（如 "G10" -> 10），无法转换时为 None（排在最后）"""
+    digits = re.sub(r"^\D+", "", group)
+    return int(digits) if digits.isdigit() else None
+
+def dunnett_test(rows, control="G1"):
+    """
+    原生 Dunnett 检验：一元等方差 ANOVA（pooled MSE），各组与对照组双侧比较，single-step 校正
+    输入：[{"group": "G1", "volume": 22.9}, ...]；输出：list[dict] 三列结果（group/Summary/P-Value），按组号排序
+    """
+    values = {}
+    for row in rows:
+        try:
+            v = float(row["volume"])
+        except (TypeError, ValueError, KeyError):
+            continue
+        if not np.isnan(v):
+            values.setdefault(str(row["group"]), []).append(v)
+
+    # 对照组放第一位，其余按名称排序；指定的对照组不存在时使用第一组
+    levels = sorted(values)
+    if len(levels) < 2:
+        raise ValueError("Dunnett 检验至少需要两个有数据的组")
+    if control not in values:
+        control = levels[0]
+    others = [g for g in levels if g != control]
+
+    arrays = {g: np.asarray(values[g]) for g in levels}
+    n = {g: len(a) for g, a in arrays.items()}
+    mean = {g: a.mean() for g, a in arrays.items()}
+    dof = sum(n.values()) - len(levels)
+    if dof <= 0:
+        raise ValueError("Dunnett 检验的残差自由度不足")
+    mse = sum(((a - a.mean()) ** 2).sum() for a in arrays.values()) / dof
+
+    lam = np.array([np.sqrt(n[g] / (n[g] + n[control])) for g in others])
+    results = []
+    for g in others:
+        diff = mean[g] - mean[control]
+        se = np.sqrt(mse * (1 / n[g] + 1 / n[control]))
+        if se > 0:
+            p = 1 - _prob_max_abs_t(abs(diff) / se, lam, int(dof))
+        else:
+            p = 0.0 if diff != 0 else np.nan
+        results.append({"group": g, "Summary": p_stars(p), "P-Value": fmt_p(p)})
+
+    # 按组号排序（无组号的排在最后，保持原有顺序）
+    results.sort(key=lambda r: (_group_number(r["group"]) is None, _group_number(r["group"]) or 0))
+    return results
+
+def _calculate_dunnett_python(datasets):
+    """原生后端：逐个数据集计算；返回 {名称: 结果行 或 {"error": 错误信息}}"""
+    out = {}
+    for name, item in datasets.items():
+        try:
+            out[name] = dunnett_test(item["rows"], item.get("control", "G1"))
+        except Exception as e:
+            out[name] = {"error": str(e)}
+    return out
+
+def dataset_key(item, backend):
+    """数据集指纹：规范化的长表行（与行顺序无关）、对照组、后端与算法版本"""
+    def value(v):
+        try:
+            return repr(float(v))
+        except (TypeError, ValueError):
+            return "NA"
+    rows = sorted([str(r.get("group")), value(r.get("volume"))] for r in item["rows"])
+    return fingerprint({"algo": "dunnett", "version": DUNNETT_ALGO_VERSION, "backend": backend,
+                        "control": item.get("control", "G1"), "rows": rows})
+
+def _run_dunnett(datasets, backend=None):
+    """先查结果缓存，只计算未命中的数据集；计算成功的结果写回缓存"""
+    backend = (backend or DUNNETT_BACKEND).lower()
+    keys = {name: dataset_key(item, backend) for name, item in datasets.items()}
+    cached = stats_memo.get_many(keys.values())
+    out = {name: cached[key] for name, key in keys.items() if key in cached}
+    todo = {name: item for name, item in datasets.items() if name not in out}
+    with stage("Dunnett检验", backend=backend, datasets=len(datasets), cached=len(out),
+               rows=sum(len(item["rows"]) for item in todo.values())):
+        if todo:
+            computed = _calculate_dunnett_r(todo) if backend == "r" else _calculate_dunnett_python(todo)
+            stats_memo.put_many({keys[name]: res for name, res in computed.items() if not isinstance(res, dict)})
+            out.update(computed)
+    return {name: out[name] for name in datasets}
+
+def calculate_dunnett_batch(datasets, backend=None):
+    """
+    批量 Dunnett 检验：一次调用计算多个数据集（R 后端只启动一个 Rscript 进程）
+    输入：{名称: {"rows": 长表行, "control": 对照组}}（也可直接给长表行，对照组默认 G1）
+    输出：{名称: 三列结果（group/Summary/P-Value）}，计算失败的数据集为 None
+    """
+    datasets = {name: item if isinstance(item, dict) else {"rows": item, "control": "G1"}
+                for name, item in datasets.items()}
+    if not datasets:
+        return {}
+    results = {}
+    for name, res in _run_dunnett(datasets, backend).items():
+        if isinstance(res, dict):
+            print(f"⚠️ Dunnett检验失败（{name}）：{res.get('error')}")
+            res = None
+        results[name] = res
+    return results
+
+def calculate_dunnett_json(json_rows: str, control="G1", backend=None):
+    """
+    输入：长表 JSON，如 '[{"group":"G1","volume":22.9}, ...]'；输出：list[dict] 三列结果（group/Summary/P-Value）
+    backend：python（原生实现）/ r（Rscript），默认取配置 DUNNETT_BACKEND
+    """
+    res = _run_dunnett({"data": {"rows": json.loads(json_rows), "control": control}}, backend)["data"]
+    if isinstance(res, dict):
+        raise RuntimeError(res.get("error") or "Dunnett 检验失败")
+    return res
+
+def run_stats_requests(ctx, backend=None):
+    """
+    计算报告上下文中登记的全部 Dunnett 数据集（各表格一次批量计算），并回调各表格回填P值
+    无回调的数据集（如各测量天）结果保存在 ctx.stats，写出明细Excel时单独成页
+    """
+    requests, ctx.stats_requests = ctx.stats_requests, {}
+    results = calculate_dunnett_batch({name: {"rows": req["rows"], "control": req["control"]}
+                                       for name, req in requests.items()}, backend)
+    failed = [name for name, res in results.items() if res is None]
+    for name, req in requests.items():
+        if req["on_result"] is None:
+            if results.get(name) is not None:
+                ctx.stats[name] = results[name]
+            continue
+        try:
+            req["on_result"](results.get(name))
+        except Exception as e:
+            print(f"❌ 回填P值失败（{name}）：{e}")
+            failed.append(name)
+    return not failed
+
 def format_result_table(results, control="G1"):
     """将结果格式化为简洁表格打印"""
     if not results:
@@ -114,6 +330,10 @@ def format_result_table(results, control="G1"):
 
 # ===== 示例 =====
 if __name__ == "__main__":
+    # 演示与核对使用临时结果缓存，不读写 docs/output 下的正式缓存（STATS_CACHE_FILE）
+    memo_dir = tempfile.mkdtemp(prefix="stats_memo_")
+    stats_memo = MemoStore(Path(memo_dir) / "stats_cache.sqlite3", STATS_CACHE_MAX_ENTRIES)
+
     # 示例数据（长表 JSON 输入）
     data = {
     "G1":  [898, 491, 642, 873, 1047],
@@ -129,5 +349,61 @@ if __name__ == "__main__":
     rows = [{"group": g, "volume": float(v)} for g, arr in data.items() for v in arr]
     payload = json.dumps(rows, ensure_ascii=False)
 
-    result = calculate_dunnett_json(payload, control="G1")
+    result = calculate_dunnett_json(payload, control="G1", backend="python")
     format_result_table(result, control="G1")
+
+    # 结果缓存：相同数据集（行顺序无关）再次计算时直接命中缓存
+    key = dataset_key({"rows": list(reversed(rows)), "control": "G1"}, "python")
+    assert stats_memo.get(key) == result, "结果缓存未命中"
+    print("\n✅ 结果缓存命中")
+
+    # 核对用例：示例数据与边界情况
+    cases = [
+        ("示例数据", payload, "G1"),
+        ("对照组不存在", payload, "G2"),
+        ("含空值", json.dumps(rows + [{"group": "G3", "volume": None}]), "G1"),
+        ("两组", json.dumps([r for r in rows if r["group"] in ("G1", "G9")]), "G1"),
+        ("不等样本量", json.dumps([r for i, r in enumerate(rows) if i % 7]), "G1"),
+    ]
+    # 固定的期望结果（group, Summary, P-Value），P值与 scipy.stats.dunnett 一致（4位小数）；不依赖 Rscript
+    sample = [("G3", "ns", "0.7406"), ("G4", "ns", "0.9970"), ("G5", "ns", "0.9090"), ("G6", "*", "0.0340"),
+              ("G8", "*", "0.0184"), ("G9", "**", "0.0050"), ("G10", "ns", "0.9995"), ("G11", "ns", "0.4437")]
+    EXPECTED = {
+        "示例数据": sample,
+        "对照组不存在": sample,   # 对照组不存在时回退到第一组（G1）
+        "含空值": sample,         # 空值被忽略
+        "两组": [("G9", "****", "<0.0001")],
+        "不等样本量": [("G3", "ns", "0.8958"), ("G4", "ns", ">0.9999"), ("G5", "ns", "0.8670"), ("G6", "ns", "0.1161"),
+                      ("G8", "ns", "0.0810"), ("G9", "*", "0.0137"), ("G10", "ns", "0.9938"), ("G11", "ns", "0.5687")],
+    }
+    stats_memo.clear()   # 核对实际计算结果，不使用缓存（临时缓存）
+    for name, case_rows, control in cases:
+        actual = [(r["group"], r["Summary"], r["P-Value"]) for r in calculate_dunnett_json(case_rows, control=control, backend="python")]
+        assert actual == EXPECTED[name], f"{name}：原生结果与期望不一致\n期望:   {EXPECTED[name]}\nPython: {actual}"
+        print(f"✅ {name}：与期望结果一致")
+    single = calculate_dunnett_batch({"只有一组": [r for r in rows if r["group"] == "G1"]}, backend="python")
+    assert single == {"只有一组": None}, f"只有一组：应返回 None，实际 {single}"
+    print("✅ 只有一组：返回 None")
+
+    # 与 R 后端核对：两种后端的输出须完全一致（未安装 Rscript 时跳过）
+    try:
+        _pick_rscript()
+    except FileNotFoundError as e:
+        print(f"\n跳过 R 后端核对：{e}")
+    else:
+        stats_memo.clear()
+        for name, case_rows, control in cases:
+            expected = calculate_dunnett_json(case_rows, control=control, backend="r")
+            actual = calculate_dunnett_json(case_rows, control=control, backend="python")
+            assert actual == expected, f"{name}：原生结果与 R 不一致\nR:      {expected}\nPython: {actual}"
+            print(f"✅ {name}：与 R 后端一致")
+
+        # 批量接口：一个 Rscript 进程计算全部数据集，失败的数据集（只有一组）为 None
+        batch = {name: {"rows": json.loads(case_rows), "control": control} for name, case_rows, control in cases}
+        batch["只有一组"] = [r for r in rows if r["group"] == "G1"]
+        expected = calculate_dunnett_batch(batch, backend="r")
+        actual = calculate_dunnett_batch(batch, backend="python")
+        assert actual == expected, f"批量：原生结果与 R 不一致\nR:      {expected}\nPython: {actual}"
+        print(f"✅ 批量（{len(batch)} 个数据集）：与 R 后端一致")
+
+    shutil.rmtree(memo_dir, ignore_errors=True)
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 import sys
 import pandas as pd
+from pathlib import Path
 
-def extract_and_format(excel_path: str, sheet: str, value_name: str, add_percentage: bool = True, add_unit: str = None, middle_text: str = None) -> str:
-    # 读表
-    try:
-        df = pd.read_excel(excel_path, sheet_name=sheet, dtype=str)
-    except Exception:
-        return "无数据"
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent.parent.parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.chinese.context import ReportContext, text_frame
+
+def extract_and_format(df: pd.DataFrame, value_name: str, add_percentage: bool = True, add_unit: str = None, middle_text: str = None) -> str:
+    # df 为按文本读取的表格（form_7_x）
     if df.empty:
         return "无数据"
 
@@ -49,10 +51,9 @@ def extract_and_format(excel_path: str, sheet: str, value_name: str, add_percent
     else:
         return f"{groups}组分别为:{values}" if groups and values else "无数据"
 
-def extract_g1_value(excel_path: str, sheet: str, value_name: str, extract_sign_prefix: bool = True) -> str:
+def extract_g1_value(df: pd.DataFrame, value_name: str, extract_sign_prefix: bool = True) -> str:
     try:
-        # 读表并定位列
-        df = pd.read_excel(excel_path, sheet_name=sheet, dtype=str)
+        # 定位列
         if df.empty:
             return "无数据"
             
@@ -80,46 +81,37 @@ def extract_g1_value(excel_path: str, sheet: str, value_name: str, extract_sign_
     except Exception:
         return "无数据"
 
-def upsert_detail_field(df: pd.DataFrame, name: str, value: str) -> pd.DataFrame:
-    # 更新或追加
-    if df.empty or not {"字段名","字段值"}.issubset(df.columns):
-        df = pd.DataFrame(columns=["字段名", "字段值"])
-    mask = df["字段名"].astype(str).str.contains(name, na=False)
-    if mask.any():
-        df.loc[mask.idxmax(), "字段值"] = value
-    else:
-        df = pd.concat([df, pd.DataFrame([{"字段名": name, "字段值": value}])], ignore_index=True)
-    return df
+def upsert_detail_field(ctx, name: str, value: str):
+    # 更新（字段名包含 name 的第一行）或追加
+    for key in ctx.detail:
+        if name in key:
+            ctx.detail[key] = value
+            return
+    ctx.set_detail(name, value)
 
-def process_excel_file(excel_path: str) -> bool:
+def process_excel_file(ctx) -> bool:
     try:
+        form_7_2 = text_frame(ctx.forms.get("form_7_2"))
+        form_7_3 = text_frame(ctx.forms.get("form_7_3"))
+
         # 计算两个字段
-        tgitv = extract_and_format(excel_path, "form_7_2", "TGITV")
-        tgitw = extract_and_format(excel_path, "form_7_3", "TGITW")
+        tgitv = extract_and_format(form_7_2, "TGITV")
+        tgitw = extract_and_format(form_7_3, "TGITW")
         
         # 提取G1组数据
-        g1_group_value = extract_g1_value(excel_path, "form_7_2", "分组天均值", extract_sign_prefix=True)
-        g1_end_value = extract_g1_value(excel_path, "form_7_2", "结束天均值", extract_sign_prefix=False)
+        g1_group_value = extract_g1_value(form_7_2, "分组天均值", extract_sign_prefix=True)
+        g1_end_value = extract_g1_value(form_7_2, "结束天均值", extract_sign_prefix=False)
         # 提取受试组肿瘤体积数据
-        test_group_volume = extract_and_format(excel_path, "form_7_2", "结束天均值", add_percentage=False, add_unit="mm³", middle_text="的受试品在相应剂量下的平均肿瘤体积为")
-
-        # 读/写"明细"
-        try:
-            detail = pd.read_excel(excel_path, sheet_name="明细", dtype=str)
-        except Exception:
-            detail = pd.DataFrame(columns=["字段名", "字段值"])
-        detail = upsert_detail_field(detail, "TGITV组合", tgitv)
-        detail = upsert_detail_field(detail, "TGITW组合", tgitw)
-        detail = upsert_detail_field(detail, "实际分组时肿瘤体积", g1_group_value)
-        detail = upsert_detail_field(detail, "对照组平均肿瘤体积", g1_end_value)
-        detail = upsert_detail_field(detail, "受试组肿瘤体积", test_group_volume)
+        test_group_volume = extract_and_format(form_7_2, "结束天均值", add_percentage=False, add_unit="mm³", middle_text="的受试品在相应剂量下的平均肿瘤体积为")
 
-        with pd.ExcelWriter(excel_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as w:
-            detail.to_excel(w, sheet_name="明细", index=False)
-            # 调整列宽：第一列20，第二列50
-            worksheet = w.sheets["明细"]
-            worksheet.column_dimensions['A'].width = 20
-            worksheet.column_dimensions['B'].width = 50
+        # 写入"明细"字段
+        upsert_detail_field(ctx, "TGITV组合", tgitv)
+        upsert_detail_field(ctx, "TGITW组合", tgitw)
+        upsert_detail_field(ctx, "实际分组时肿瘤体积", g1_group_value)
+        upsert_detail_field(ctx, "对照组平均肿瘤体积", g1_end_value)
+        upsert_detail_field(ctx, "受试组肿瘤体积", test_group_volume)
+        # 列宽：第一列20，第二列50
+        ctx.detail_widths = (20, 50)
 
         print(f"✅ 已写入TGITV组合：{tgitv}")
         print(f"✅ 已写入TGITW组合：{tgitw}")
@@ -138,4 +130,5 @@ if __name__ == "__main__":
     excel_path = sys.argv[1] if len(sys.argv) > 1 else default_excel_path
     
     print(f"处理文件: {excel_path}")
-    process_excel_file(excel_path)
+    ctx = ReportContext.load(excel_path)
+    if process_excel_file(ctx): ctx.save(excel_path)
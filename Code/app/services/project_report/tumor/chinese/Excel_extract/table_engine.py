@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""声明式表格提取引擎：按 table_specs 的定义把各表读成 StudyMatrix（每个数据页只分类一次，矩阵缓存在终版数据包旁），再按结束天切片 → 报告上下文（表格 + GraphPad + Dunnett数据集）"""
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parents[6]
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.chinese.Excel_extract.sheet_grid import SheetGrid, LabelMatcher
+from app.services.project_report.tumor.chinese.Excel_extract.table_specs import (
+    TABLE_SPECS, DESIGN_SPEC, GROUP_PATTERN, CONTROL_GROUP,
+)
+from app.services.project_report.tumor.chinese.Excel_extract.study_matrix import (
+    StudyMatrix, MATRIX_VERSION, cached_matrix_names, load_matrices, save_matrices,
+)
+from app.services.project_report.tumor.chinese.Excel_extract.verify import recompute_stats, verify_matrix
+from app.services.project_report.tumor.chinese.Excel_extract.xlsx_meta import xlsx_fingerprint
+from app.utils.Cache.result_cache import fingerprint
+from app.utils.Log.trace import stage
+
+HEADER_WINDOW = 50        # column 布局：在前 N 行/列内查找数据列表头
+NUMERIC_SAMPLE_ROWS = 40  # column 布局：判断"数值列"时抽样的行数（≥3 个数值即为数值列）
+
+_GROUP = re.compile(GROUP_PATTERN, re.IGNORECASE)
+_DAY = re.compile(r"^\D*(-?\d+)\D*$")
+
+
+# =============== 基础工具 ===============
+def find_existing_sheet(final, sheet_names) -> str:
+    """从候选工作表名称中返回第一个存在的名称；否则返回空字符串"""
+    if isinstance(sheet_names, str):
+        sheet_names = [sheet_names]
+    for name in sheet_names or []:
+        if name in final.sheetnames:
+            return name
+    return ""
+
+def fmt_mean_sd(m, sd, d=1, round_sd=True):
+    """均数±标准误：加容差后四舍五入，与Excel一致；d=0 时只保留整数"""
+    if m is None or sd is None:
+        return ""
+    if d == 0:
+        return f"{int(round(float(m) + 1e-06))}±{int(round(float(sd) + 1e-06))}"
+    sd = round(sd + 1e-06, d) if round_sd else sd
+    return f"{round(m + 1e-06, d):.{d}f}±{sd:.{d}f}"
+
+def fmt_signed(x, d=1):
+    if x is None:
+        return ""
+    s = f"{x:.{d}f}"
+    # 在加减号后都添加空格，保持格式一致
+    return f"- {s[1:]}" if s.startswith("-") else f"+ {s}"
+
+
+# =============== 引擎 ===============
+class TableEngine:
+    """
+    用法：
+        engine = TableEngine()                  # 编译全部表格的标签匹配器（一次）
+        results = engine.extract(final, ctx, end_day)   # {表名: 是否成功}
+    各表格失败互不影响：失败原因打印到 stderr 并记为该表格阶段的错误
+    """
+
+    def __init__(self, specs: List[Dict[str, Any]] = TABLE_SPECS, design: Dict[str, Any] = DESIGN_SPEC):
+        self.specs = specs
+        self.design = design
+        # 全部表格的标签类合成一个匹配器（类名为 "表名.标签类"），同一数据页只需分类一次
+        self.labels = LabelMatcher({f"{spec['name']}.{family}": patterns
+                                    for spec in specs for family, patterns in self._families(spec).items()})
+        self.design_labels = LabelMatcher({key: design[key] for key in ("group", "drug", "dose")})
+
+    @staticmethod
+    def _families(spec) -> Dict[str, Any]:
+        families = dict(spec.get("labels", {}))
+        if spec["layout"] == "days":
+            families.update(anchor=spec["anchor"], days=spec["days_header"])
+        else:
+            families["header"] = spec["value_header"]
+        return families
+
+    def extract(self, final, ctx, end_day: Optional[int] = None,
+                matrices: Optional[Dict[str, StudyMatrix]] = None) -> Dict[str, bool]:
+        """
+        提取全部表格写入报告上下文；返回 {表名: 是否成功}
+        matrices 为调用方已读入的矩阵（如为各结束天预计算时共用，缺失的表格会补入）；不传时读写终版数据包旁的缓存
+        开启数据核对时，由个体值重算的统计行与表中数值不一致处记入 ctx.verification
+        """
+        from config.settings import REPORT_VERIFY_STATS, REPORT_USE_RECOMPUTED_STATS
+
+        key = None
+        if matrices is None:
+            key = self.matrix_key(final.path)
+            cached = load_matrices(final.path, key) or {}
+            matrices = {}
+        else:
+            cached = matrices
+        classified = {}   # 数据页 → {标签类: 命中掩码}，同页的表格共用
+        design = None     # (组别→受试品映射, 异常)，各表共用
+        results = {}
+        for spec in self.specs:
+            name = spec["name"]
+            with stage(f"提取{name}") as st:
+                try:
+                    if any(col["value"] == "design" for col in spec["columns"]) and design is None:
+                        try:
+                            design = (self._design_mapping(final), None)
+                        except Exception as e:
+                            design = (None, e)
+                    if design and design[1] is not None:
+                        raise design[1]
+
+                    matrix = cached.get(name)
+                    st.set(cached=matrix is not None)
+                    if matrix is None:
+                        matrix = self.build_matrix(final, spec, classified)
+                    matrices[name] = matrix
+                    if REPORT_VERIFY_STATS or REPORT_USE_RECOMPUTED_STATS:
+                        recomputed = recompute_stats(spec, matrix)
+                        if REPORT_VERIFY_STATS:
+                            issues = verify_matrix(spec, matrix, recomputed)
+                            ctx.verification.extend(issues)
+                            st.set(mismatches=len(issues))
+                            if issues:
+                                print(f"⚠️ {name} 数据核对：{len(issues)} 处统计值与个体值重算结果不一致")
+                        if REPORT_USE_RECOMPUTED_STATS:
+                            matrix = matrix.with_stats(recomputed)
+                    rows = self._emit(spec, matrix, end_day, design[0] if design else None, ctx)
+                    st.set(rows=rows)
+                    results[name] = True
+                except Exception as e:
+                    print(f"[ERROR] {name}: {e}", file=sys.stderr)
+                    st.fail(f"{type(e).__name__}: {e}")
+                    results[name] = False
+        if key and matrices.keys() - cached.keys():
+            save_matrices(final.path, matrices, key)
+        return results
+
+    def matrix_key(self, final_path) -> str:
+        """矩阵缓存指纹：终版数据包内容（ZIP 各部件的 CRC，不读整个文件）+ 表格定义 + 矩阵版本"""
+        return fingerprint({"final": xlsx_fingerprint(final_path), "specs": self.specs, "version": MATRIX_VERSION})
+
+    def cached_sheets(self, final_path) -> List[str]:
+        """不需要解析的数据页：页上全部表格的矩阵都已缓存（实验设计页每次都要读取）"""
+        cached = set(cached_matrix_names(final_path, self.matrix_key(final_path)))
+        sheets = {}
+        for spec in self.specs:
+            for sheet in ([spec["sheet"]] if isinstance(spec["sheet"], str) else spec["sheet"]):
+                sheets[sheet] = sheets.get(sheet, True) and spec["name"] in cached
+        return [sheet for sheet, skip in sheets.items() if skip and sheet not in self.design["sheet"]]
+
+    def build_matrix(self, final, spec, classified: Optional[Dict[str, Any]] = None) -> StudyMatrix:
+        """定位表格并读成矩阵；classified 为各数据页的标签分类结果（数据页 → 掩码），传入时同页只分类一次"""
+        sheet = find_existing_sheet(final, spec["sheet"])
+        if not sheet:
+            raise RuntimeError(f"未找到数据页，候选：{spec['sheet']}")
+        grid = final.grid(sheet)
+        classified = {} if classified is None else classified
+        if sheet not in classified:
+            classified[sheet] = grid.classify(self.labels)
+        labels = {family: classified[sheet][f"{spec['name']}.{family}"] for family in self._families(spec)}
+        if "sd" in labels:
+            labels["sd"] = labels["sd"] | grid.equal(["SD"], ignore_case=True)   # 标准误行：关键词或单独的"SD"
+
+        layout = self._locate_days if spec["layout"] == "days" else self._locate_column
+        located = layout(spec, grid, labels)
+        stat_col = located["stat_col"]
+        blocks = []
+        for group_name, rs, re_ in located["groups"]:
+            stat_rows = {family: grid.first_in_col(labels[family], stat_col, rows=(rs, re_)) for family in spec["labels"]}
+            # 个体原始值：从"组别行 rs"到"均数行-1"都视作动物行
+            end_anim = stat_rows["mean"] - 1 if stat_rows.get("mean") else re_
+            blocks.append({
+                "group": group_name,
+                "animal_rows": [(r, grid.text_at(r, stat_col)) for r in range(rs, end_anim + 1)],
+                "stat_rows": stat_rows,
+            })
+
+        kinds = {col["label"]: col["value"] for col in spec["columns"] if "label" in col}
+
+        def stat_cell(family, r, c):
+            if kinds.get(family) == "ratio":   # 比值取原始单元格（不展开合并区域）
+                try:
+                    return float(grid.raw_value(r, c))
+                except (ValueError, TypeError):
+                    return None
+            v = grid.number(r, c)
+            if v is not None and kinds.get(family) == "percent" and v <= 1 and "%" not in str(grid.value(r, c)):
+                v *= 100   # 百分数：≤1 且不带 % 的视为比值
+            return v
+
+        return StudyMatrix.from_blocks(spec["name"], blocks, located["day_cols"], grid.number, stat_cell,
+                                       spec.get("value_digits"))
+
+    # ---------- 定位：组块与取值列 ----------
+    def _locate_days(self, spec, grid: SheetGrid, labels):
+        """days 布局：锚点 → 结束列/结束行 → 天数行 → 组块"""
+        anchor = grid.first(labels["anchor"])
+        if not anchor:
+            raise RuntimeError(f"未找到包含锚点关键词的单元格，候选：{spec['anchor']}")
+        r0, c0 = anchor
+
+        # 结束列：窗口 r0..r0+N，找首个"该列全空"→ 前一列为结束列
+        r_end_window = min(grid.max_row, r0 + spec["lookahead"])
+        empty_col = grid.first_empty_col((r0, r_end_window), c0)
+        end_col = empty_col - 1 if empty_col is not None else None
+        if end_col is None or end_col < c0:
+            raise RuntimeError("未能确定结束列。")
+
+        # 结束行：限定 [c0..end_col]，自 r0 向下找首个"整行全空"，上一行即 end_row
+        empty_row = grid.first_empty_row((c0, end_col), r0)
+        end_row = empty_row - 1 if empty_row is not None else None
+        if end_row is None or end_row < r0:
+            if not spec.get("end_row_fallback"):
+                raise RuntimeError("未能确定结束行。")
+            end_row = grid.max_row
+
+        # "分组后天数"→ 下一行是天数行
+        hit = grid.first(labels["days"], rows=(r0, end_row), cols=(c0, end_col))
+        if hit is None:
+            raise RuntimeError(f"未在表格矩形内找到天数表头，候选：{spec['days_header']}")
+        r_days, c_days = hit[0] + 1, hit[1]
+        day_to_col = {}
+        for cc in range(c_days, end_col + 1):
+            m = _DAY.match(grid.text_at(r_days, cc))
+            if m:
+                day_to_col[int(m.group(1))] = cc
+        if not day_to_col:
+            raise RuntimeError("天数行未识别到任何测量天。")
+
+        return {
+            "groups": self._group_blocks(grid, c0, r0, end_row),
+            "stat_col": c0 + 1,
+            "day_cols": day_to_col,
+        }
+
+    def _locate_column(self, spec, grid: SheetGrid, labels):
+        """column 布局：表头定位数据列（左一列，左列不是数值列则回退表头列），组别在A列"""
+        hit = grid.first(labels["header"], rows=(1, HEADER_WINDOW), cols=(1, HEADER_WINDOW))
+        if not hit:
+            raise RuntimeError(f"未找到数据列表头，候选：{spec['value_header']}")
+        header_col = hit[1]
+        data_col = header_col - 1 if header_col > 1 else header_col
+        sample = (1, NUMERIC_SAMPLE_ROWS)
+        if grid.count_numbers(data_col, sample) < 3 and grid.count_numbers(header_col, sample) >= 3:
+            data_col = header_col
+        return {
+            "groups": self._group_blocks(grid, 1, 1, grid.max_row),
+            "stat_col": 2,
+            "day_cols": {0: data_col},   # 单列数据视为一个测量点
+        }
+
+    @staticmethod
+    def _group_blocks(grid: SheetGrid, col, r_start, r_end):
+        """组块：组别列中形如 Gx 的行为起点，组块结束 = 下个起点 - 1"""
+        starts = [r for r in range(r_start, r_end + 1) if _GROUP.match(grid.text_at(r, col))]
+        if not starts:
+            raise RuntimeError("未找到任何组别（G1/G2/...）。")
+        ends = [s - 1 for s in starts[1:]] + [r_end]
+        return [(grid.text_at(rs, col), rs, re_) for rs, re_ in zip(starts, ends)]
+
+    def _design_mapping(self, final) -> Optional[Dict[str, str]]:
+        """实验设计页：组别 → "受试品(剂量), ..."；无设计页返回 None"""
+        sheet = find_existing_sheet(final, self.design["sheet"])
+        if not sheet:
+            return None
+        grid = final.grid(sheet)
+        hdr = grid.header_row(self.design_labels)
+        if hdr is None:
+            raise RuntimeError("实验设计页未找到表头。")
+        masks = grid.classify(self.design_labels)
+        col_g, col_d, col_do = (grid.first_in_row(masks[key], hdr) for key in ("group", "drug", "dose"))
+
+        mapping = {}
+        blank = 0
+        for r in range(hdr + 1, grid.max_row + 1):
+            g = grid.text_at(r, col_g) if col_g else ""
+            if g == "":
+                blank += 1
+                if blank >= 2:
+                    break
+                continue
+            blank = 0
+            drug = grid.text_at(r, col_d) if col_d else ""
+            dose = grid.text_at(r, col_do) if col_do else ""
+            combo = f"{drug}({dose})" if (drug and dose) else (drug or (f"({dose})" if dose else ""))
+            if combo:
+                mapping.setdefault(g, []).append(combo)
+        return {g: ", ".join(v) for g, v in mapping.items()}
+
+    # ---------- 输出 ----------
+    def _emit(self, spec, matrix: StudyMatrix, end_day, design, ctx) -> int:
+        """按结束天切片矩阵生成表格，登记 Dunnett 数据集（回填P值后写入报告上下文）；返回行数"""
+        from config.settings import REPORT_STATS_ALL_DAYS
+
+        name = spec["name"]
+        if spec["layout"] == "days":
+            if not (matrix.has_day(0) and matrix.has_day(end_day)):
+                raise RuntimeError(f"天数行未找到 0 或 {end_day}。识别到: {matrix.days.tolist()}")
+            day_of = {"start": 0, "end": end_day}
+        else:
+            day_of = {"start": 0, "end": 0}
+        columns = [col for col in spec["columns"] if not (col["value"] == "design" and design is None)]
+
+        records = []
+        for g, group_name in enumerate(matrix.groups):
+            def number(family, day="end"):
+                return matrix.stat(family, g, day_of[day])
+
+            record = {}
+            for col in columns:
+                kind = col["value"]
+                if kind == "group":
+                    value = group_name
+                elif kind == "design":
+                    value = design.get(group_name)
+                elif kind == "mean_sd":
+                    day = col.get("day", "end")
+                    value = fmt_mean_sd(number("mean", day), number("sd", day), col["digits"], col.get("round_sd", True))
+                elif kind == "delta":
+                    m0, mN = number("mean", "start"), number("mean", "end")
+                    value = fmt_signed(round(mN + 1e-06, col["digits"]) - round(m0 + 1e-06, col["digits"])
+                                       if (m0 is not None and mN is not None) else None, col["digits"])
+                elif kind in ("ratio", "percent"):
+                    v = number(col["label"], col.get("day", "end"))
+                    if v is None or group_name == CONTROL_GROUP:
+                        value = ""
+                    elif kind == "ratio":
+                        value = f"{round(v * 100, col['digits'])}"
+                    else:
+                        value = f"{round(v + 1e-06, col['digits']):.{col['digits']}f}"
+                else:   # p（统计检验后回填）/ blank
+                    value = ""
+                record[col["name"]] = value
+            records.append(record)
+
+        df = pd.DataFrame(records, columns=[col["name"] for col in columns])
+        p_cols = [col["name"] for col in columns if col["value"] == "p"]
+        per_group_values = matrix.day_values(day_of["end"])
+        long_rows = matrix.long_rows(day_of["end"])
+
+        def fill_p_values(dunnett_res):
+            out = df.copy()
+            p_map = {}
+            for r in dunnett_res or []:
+                g = (r.get("group") or "").strip()
+                stars = (r.get("Summary") or "").strip()     # '**' 或 '' 或 'ns'
+                pval  = (r.get("P-Value") or "").strip()     # '0.0056' 等
+                p_map[g] = pval if stars == "ns" else f"{stars}{pval}"
+            for p_col in p_cols:
+                out[p_col] = ["" if g == CONTROL_GROUP else p_map.get(g, "") for g in matrix.groups]
+
+            # 空值标准化后写入报告上下文（连同GraphPad原始数据，最终由 ctx.save 统一写出）
+            out = out.fillna("-").replace("", "-")
+            ctx.set_form(name, out, spec.get("graphpad"), per_group_values)
+            print(f"OK: 生成 {name}，{len(out)} 行")
+
+        if long_rows and p_cols:
+            ctx.request_stats(name, long_rows, CONTROL_GROUP, fill_p_values)
+        else:
+            fill_p_values([])
+        if REPORT_STATS_ALL_DAYS and spec.get("stats_label"):
+            for day in matrix.days.tolist():
+                rows = matrix.long_rows(day)
+                if rows:
+                    ctx.request_stats(f"{name} {spec['stats_label']} 第{day}天", rows, CONTROL_GROUP)
+        return len(records)
+
+
+ENGINE = TableEngine()
+
+
+def extract_tables(final, ctx, end_day: int) -> bool:
+    """all_flow 的表格步骤：提取全部表格；有表格失败时抛出异常（已成功的表格仍保留在上下文中）"""
+    results = ENGINE.extract(final, ctx, end_day)
+    failed = [name for name, ok in results.items() if not ok]
+    if failed:
+        raise RuntimeError(f"表格提取失败: {', '.join(failed)}")
+    return True
+
+
+if __name__ == "__main__":
+    from app.services.project_report.tumor.chinese.context import ReportContext
+    from final_workbook import FinalWorkbook
+    from P_compute import run_stats_requests
+    input_path = "D:/TianBa_AI/Code/docs/temp/project_report/25P118604_Final.xlsx"
+    output_path = "D:/TianBa_AI/Code/docs/temp/project_report/25P118604_明细.xlsx"
+    end_day = 20
+
+    ctx = ReportContext.load(output_path)
+    results = ENGINE.extract(FinalWorkbook(input_path), ctx, end_day)
+    run_stats_requests(ctx)
+    ctx.save(output_path)
+    print(results)
+    sys.exit(0 if all(results.values()) else 1)
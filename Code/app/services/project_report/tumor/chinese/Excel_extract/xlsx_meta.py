@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""xlsx 元数据：直接从 ZIP 读取工作表名称（xl/workbook.xml）、各工作表的尺寸（<dimension>）与内容指纹（中央目录的 CRC），不解析单元格"""
+import hashlib
+import posixpath
+import re
+import zipfile
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+_CELL_REF = re.compile(r"^\$?([A-Z]+)\$?(\d+)$")
+# 错误值单元格 <c r="A1" t="e"><f>1/0</f><v>#DIV/0!</v></c>：属性与缓存的错误文本
+_ERROR_CELL = re.compile(rb'<(?:\w+:)?c\s([^>]*\bt="e"[^>]*)>(?:(?!</(?:\w+:)?c>).)*?<(?:\w+:)?v>([^<]*)</', re.S)
+_ERROR_REF = re.compile(rb'\br="([A-Z]+)(\d+)"')
+HEAD_BYTES = 1 << 16   # <dimension> 位于工作表XML开头，只解压前 64KB 查找
+
+
+def _column_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def parse_dimension(ref: str) -> Optional[Tuple[int, int]]:
+    """尺寸范围 "A1:Z300" → (行数, 列数)；单个单元格 "A1" 视为 1×1，无法识别返回 None"""
+    corners = [_CELL_REF.match(part) for part in ref.upper().split(":")]
+    if not corners or not all(corners):
+        return None
+    end = corners[-1]
+    return int(end.group(2)), _column_index(end.group(1))
+
+
+class XlsxMeta:
+    """
+    用法：
+        meta = XlsxMeta(path)
+        meta.sheetnames          # 全部工作表名（与 openpyxl 的 sheetnames 一致，含隐藏页）
+        meta.size("实验数据汇总")  # (行数, 列数)，来自工作表的 <dimension>；没有该记录时为 None
+        meta.error_cells("实验数据汇总")  # {(行, 列): "#DIV/0!"}，错误值单元格的缓存文本
+        meta.fingerprint         # 内容指纹：各部件的名称/CRC/大小（只读中央目录）
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with zipfile.ZipFile(self.path) as zf:
+            self._infos = {info.filename: info for info in zf.infolist()}
+            workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+            targets = self._sheet_targets(zf)
+        self.sheets: Dict[str, Dict] = {}
+        for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+            part = targets.get(sheet.get(f"{_NS_REL}id"))
+            info = self._infos.get(part) if part else None
+            self.sheets[sheet.get("name")] = {
+                "part": part,
+                "state": sheet.get("state", "visible"),
+                "bytes": info.file_size if info else 0,   # 工作表XML解压后的大小
+            }
+        self._dimensions: Dict[str, Optional[str]] = {}
+
+    @staticmethod
+    def _sheet_targets(zf) -> Dict[str, str]:
+        """工作簿关系：r:id → 工作表部件路径（xl/worksheets/sheetN.xml）"""
+        try:
+            rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        except KeyError:
+            return {}
+        targets = {}
+        for rel in rels.iter(f"{_NS_PKG_REL}Relationship"):
+            target = rel.get("Target", "")
+            part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            targets[rel.get("Id")] = part
+        return targets
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self.sheets)
+
+    def __contains__(self, name) -> bool:
+        return name in self.sheets
+
+    @property
+    def fingerprint(self) -> str:
+        return _fingerprint(self._infos.values())
+
+    def dimension(self, name) -> Optional[str]:
+        """工作表的尺寸范围（如 "A1:Z300"）；首次查询时只解压该工作表XML的开头"""
+        if name not in self._dimensions:
+            part = self.sheets[name]["part"]
+            ref = None
+            if part in self._infos:
+                with zipfile.ZipFile(self.path) as zf, zf.open(part) as f:
+                    m = _DIMENSION.search(f.read(HEAD_BYTES))
+                    ref = m.group(1).decode("ascii") if m else None
+            self._dimensions[name] = ref
+        return self._dimensions[name]
+
+    def size(self, name) -> Optional[Tuple[int, int]]:
+        """工作表的 (行数, 列数)；工作表没有 <dimension> 记录时返回 None"""
+        ref = self.dimension(name)
+        return parse_dimension(ref) if ref else None
+
+    def error_cells(self, name) -> Dict[Tuple[int, int], str]:
+        """工作表中错误值单元格（t="e"）的 {(行, 列): 错误文本}，坐标从1开始；没有错误值时只做一次字节查找"""
+        part = self.sheets[name]["part"]
+        if part not in self._infos:
+            return {}
+        with zipfile.ZipFile(self.path) as zf:
+            data = zf.read(part)
+        if b't="e"' not in data:
+            return {}
+        cells = {}
+        for attrs, value in _ERROR_CELL.findall(data):
+            m = _ERROR_REF.search(attrs)
+            if m:
+                cells[int(m.group(2)), _column_index(m.group(1).decode("ascii"))] = value.decode("utf-8")
+        return cells
+
+
+def _fingerprint(infos) -> str:
+    """内容指纹：任一部件内容变化都会改变其 CRC/大小，因此无需读取或哈希整个文件"""
+    h = hashlib.sha256()
+    for info in sorted(infos, key=lambda i: i.filename):
+        h.update(f"{info.filename}\x00{info.CRC:08x}\x00{info.file_size}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def xlsx_fingerprint(path) -> str:
+    """xlsx 内容指纹：只读 ZIP 中央目录（不解析 workbook.xml）"""
+    with zipfile.ZipFile(str(path)) as zf:
+        return _fingerprint(zf.infolist())
+
+
+if __name__ == "__main__":
+    input_path = "D:/TianBa_AI/Code/docs/temp/project_report/25P118604_Final.xlsx"
+
+    meta = XlsxMeta(input_path)
+    print(f"指纹: {meta.fingerprint}")
+    for name in meta.sheetnames:
+        print(name, meta.sheets[name]["bytes"], meta.size(name))
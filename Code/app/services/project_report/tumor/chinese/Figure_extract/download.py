@@ -11,6 +11,47 @@ if str(current_dir) not in sys.path: sys.path.insert(0, str(current_dir))
 # 导入配置和模块
 from config.settings import SMB_CONFIG, PHOTO_DIR
 from app.services.project_report.tumor.chinese.Figure_extract.reduction import compress_experiment_images
+from app.utils.Log.trace import stage
+
+# 图片类型映射（远程文件夹名: 本地文件夹名）
+IMAGE_TYPES = {
+    "动物图片": "mouse",
+    "肿瘤图片": "tumor",
+    "解剖图片": "anatomy",
+    "脏器图片": "organ"
+}
+
+def list_smb_manifest(folder_name):
+    """
+    列出实验编号下各类图片的清单（文件名、大小、修改时间），用于结果缓存指纹
+    连接失败返回None；目录不存在的类型记为空列表
+    """
+    conn = None
+    manifest = {}
+    try:
+        conn = SMBConnection(SMB_CONFIG['username'], SMB_CONFIG['password'], 'client', SMB_CONFIG['server_ip'])
+        if not conn.connect(SMB_CONFIG['server_ip'], 139):
+            return None
+        for remote_folder, local_folder in IMAGE_TYPES.items():
+            try:
+                items = conn.listPath(SMB_CONFIG['share_name'], f"{SMB_CONFIG['base_path']}/{folder_name}/{remote_folder}")
+            except Exception:
+                manifest[local_folder] = []
+                continue
+            manifest[local_folder] = sorted(
+                [item.filename, item.file_size, item.last_write_time]
+                for item in items if item.filename not in ['.', '..'] and not item.isDirectory
+            )
+        return manifest
+    except Exception:
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+def _dir_size(path):
+    """目录下全部文件的总字节数"""
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
 
 def download_images_from_smb(folder_name):
     """
@@ -29,13 +70,7 @@ def download_images_from_smb(folder_name):
     photo_dir = PHOTO_DIR
     experiment_dir = os.path.join(photo_dir, folder_name)
     
-    # 图片类型映射（远程文件夹名: 本地文件夹名）
-    image_types = {
-        "动物图片": "mouse",
-        "肿瘤图片": "tumor",
-        "解剖图片": "anatomy",
-        "脏器图片": "organ"
-    }
+    image_types = IMAGE_TYPES
     
     # 确保Photo文件夹存在
     os.makedirs(photo_dir, exist_ok=True)
@@ -54,17 +89,20 @@ def download_images_from_smb(folder_name):
     
     # 下载所有类型的图片
     total_count = 0
-    for remote_folder, local_folder in image_types.items():
-        count = download_folder_files(server_ip, username, password, share_name, 
-                                    f"{target_folder_path}/{remote_folder}", 
-                                    os.path.join(experiment_dir, local_folder))
-        total_count += count
+    with stage("SMB下载") as st:
+        for remote_folder, local_folder in image_types.items():
+            count = download_folder_files(server_ip, username, password, share_name, 
+                                        f"{target_folder_path}/{remote_folder}", 
+                                        os.path.join(experiment_dir, local_folder))
+            total_count += count
+        st.set(files=total_count, bytes=_dir_size(experiment_dir))
     
     # 打印下载结果
     if total_count > 0:
         print(f"✅ 下载完成! 共下载 {total_count} 个文件")
         # 下载完成后自动压缩图片
-        compress_experiment_images(folder_name, PHOTO_DIR)
+        with stage("图片压缩", files=total_count):
+            compress_experiment_images(folder_name, PHOTO_DIR)
     else:
         print("⚠️ 未找到任何图片文件")
 
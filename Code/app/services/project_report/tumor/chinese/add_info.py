@@ -5,6 +5,11 @@ import sys
 from pathlib import Path
 import pandas as pd
 
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent.parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.chinese.context import ReportContext, text_frame
+
 # 频率映射
 FREQ_MAP = {
     "QD" : "每天给药一次",
@@ -158,7 +163,7 @@ def generate_dose_summary(df_dose, group_col, route_col, freq_col, times_col):
 
 
 def annotate_b_min(
-    excel_path: str,
+    ctx,
     dose_sheet="给药方案",
     group_col="组别", 
     prod_col="受试品", 
@@ -166,20 +171,13 @@ def annotate_b_min(
     freq_col="给药频率", 
     route_col="给药途径", 
     times_col="给药次数",
-    detail_sheet="明细", 
-    field_col="字段名", 
-    value_col="字段值",
     note_field="注释b",
     group_detail_field="组内受试品明细串",
     dose_summary_field="给药信息汇总"
-) -> str:
-    """处理Excel文件，生成注释b、组内受试品明细串和给药信息汇总"""
-    excel_path = str(excel_path)
-    if not Path(excel_path).is_file():
-        raise FileNotFoundError(excel_path)
-
-    # 读取给药方案
-    df_dose = pd.read_excel(excel_path, sheet_name=dose_sheet, dtype=str)
+):
+    """基于报告上下文的给药方案，生成注释b、组内受试品明细串和给药信息汇总并写入明细字段"""
+    # 给药方案（与按文本读取Excel的结果一致）
+    df_dose = text_frame(ctx.dose)
 
     # 1. 生成注释b
     if freq_col not in df_dose.columns:
@@ -228,39 +226,22 @@ def annotate_b_min(
     
     dose_summary_text = generate_dose_summary(df_dose, group_col, route_col, freq_col, times_col)
     
-    # 4. 写回明细sheet
-    df_detail = pd.read_excel(excel_path, sheet_name=detail_sheet, dtype=str)
-    if field_col not in df_detail.columns or value_col not in df_detail.columns:
-        raise KeyError(f"【{detail_sheet}】页缺少列：{field_col}/{value_col}")
-
-    df_detail = df_detail.copy()
-
-    def upsert(field_name: str, field_value: str):
-        """更新或插入字段值"""
-        m = (df_detail[field_col].astype(str) == field_name)
-        if m.any():
-            df_detail.loc[m, value_col] = field_value
-        else:
-            df_detail.loc[len(df_detail), [field_col, value_col]] = [field_name, field_value]
-
-    # 更新三行数据
-    upsert(note_field, note_text)
-    upsert(group_detail_field, group_detail_text)
-    upsert(dose_summary_field, dose_summary_text)
-
-    # 保存文件
-    with pd.ExcelWriter(excel_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as w:
-        df_detail.to_excel(w, index=False, sheet_name=detail_sheet)
+    # 4. 写回明细字段
+    ctx.set_detail(note_field, note_text)
+    ctx.set_detail(group_detail_field, group_detail_text)
+    ctx.set_detail(dose_summary_field, dose_summary_text)
 
     print(f"✅ 已写入『{note_field}』")
     print(f"✅ 已写入『{group_detail_field}』")
     print(f"✅ 已写入『{dose_summary_field}』")
     
-    return excel_path
+    return ctx
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("用法：python add_info.py <导出的Excel路径>")
         sys.exit(1)
-    annotate_b_min(sys.argv[1])
+    ctx = ReportContext.load(sys.argv[1])
+    annotate_b_min(ctx)
+    ctx.save(sys.argv[1])
@@ -11,24 +11,64 @@ if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
 if str(current_dir) not in sys.path: sys.path.insert(0, str(current_dir))
 
 # 导入服务模块 - 使用相对导入
-from .export_sql import export_sql_to_excel
+from .export_sql import export_sql_to_context
 from .fill_word import fill_word_template
 from .add_info import annotate_b_min
 from .Excel_extract.All_Flow import all_flow
-from .Figure_extract.download import download_images_from_smb
+from .Figure_extract.download import download_images_from_smb, list_smb_manifest
+from .Excel_extract.excel_download import probe_project_file
+from .Excel_extract.day_tables import save_day_tables, load_day_tables, apply_day_tables
+from .context import ReportContext
+from app.data.connection import query_cache_bypassed
+from app.utils.Cache.result_cache import ResultCache, file_digest, fingerprint
+from app.tasks.dag import TaskGraph, nested_progress
+from app.tasks.single_flight import report_flight
+from app.utils.Log.trace import stage, traced
 
 # 导入配置
 from config.settings import REPORT_OUT, REPORT_TEMP, REPORT_TPL, PHOTO_DIR
+from config.settings import REPORT_CACHE_DIR, REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_MAX_BYTES
+
+# 已生成报告的结果缓存（按输入指纹复用）
+report_cache = ResultCache(REPORT_CACHE_DIR, REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_MAX_BYTES)
 
 def main():
     """主函数：调用项目报告生成函数"""
-    word_path, excel_path, final_path, end_day = generate_project_report(project_code, user_end_day)
-    
-    if not word_path:
+    try:
+        generate_project_report(project_code, user_end_day)
+    except Exception:
         print("❌ 项目报告生成失败")
 
-def generate_project_report(project_code, end_day=None):
-    """生成项目报告"""
+def download_photos(experiment_code):
+    """下载并压缩图片（静默跳过错误）"""
+    try:
+        download_images_from_smb(experiment_code)
+    except Exception as e:
+        print(f"⚠️ 图片下载失败，但继续生成报告: {str(e)}")
+
+def report_fingerprint(experiment_code, sql_digest, end_day, template_path):
+    """
+    计算报告输入指纹：SQL结果摘要、终版数据包版本、SMB图片清单、模板内容、结束天
+    任一输入无法获取（如OSS/SMB不可达）时返回None，不使用缓存
+    """
+    final_version = probe_project_file(experiment_code)
+    if final_version is None:
+        return None
+    photo_manifest = list_smb_manifest(experiment_code)
+    if photo_manifest is None:
+        return None
+    return fingerprint({
+        "report": "tumor-chinese",
+        "sql": sql_digest,
+        "final": final_version,
+        "photos": photo_manifest,
+        "template": file_digest(template_path),
+        "end_day": end_day,
+    })
+
+def generate_project_report(project_code, end_day=None, progress=None):
+    """生成项目报告；progress 为可选的步骤回调（后台任务用于上报进度）；失败时抛出异常（后台任务据此记录错误原因）"""
+    if progress is None: progress = lambda step_name, **kwargs: None
     # 生成文件名
     excel_filename = f"{project_code}_明细.xlsx"
     final_filename = f"{project_code}_终版.xlsx"
@@ -45,49 +85,94 @@ def generate_project_report(project_code, end_day=None):
     Path(REPORT_OUT).mkdir(parents=True, exist_ok=True)
     
     try:
-        # 1. 执行 SQL → 写入 Excel
-        excel_path, selected_exp_code = export_sql_to_excel(project_code, excel_path)
+        # 1. 执行 SQL → 报告上下文（各阶段在内存中传递数据，明细Excel最后只写出一次）
+        progress("导出SQL数据")
+        with stage("导出SQL数据"):
+            ctx = export_sql_to_context(project_code)
+        selected_exp_code = ctx.experiment_code
         
-        # 2. 基于【给药方案】→"给药频率"写入明细页的"注释b"
-        annotate_b_min(excel_path)
+        # 输入未变化时直接返回缓存的报告
+        progress("检查结果缓存")
+        with stage("检查结果缓存") as st:
+            cache_key = report_fingerprint(selected_exp_code, ctx.sql_digest, end_day, template_path) if selected_exp_code else None
+            cached = report_cache.get(cache_key) if cache_key and not query_cache_bypassed() else None
+            st.set(hit=bool(cached))
+        if cached:
+            print(f"🎉 输入未变化，使用缓存的项目报告")
+            files = cached["files"]
+            return Path(files["word"]), Path(files["excel"]), files.get("final"), cached["meta"].get("end_day")
         
-        # 3. 执行All_Flow流程
         if selected_exp_code is None:
             print("❌ 未获取到实验编号，无法执行All_Flow流程")
-            return None, None, None, None
+            raise RuntimeError(f"未获取到项目 {project_code} 的实验编号，无法执行All_Flow流程")
         
-        # 执行All_Flow流程
-        success, end_day, downloaded_excel_file, error_messages = all_flow(
-            selected_exp_code, 
-            end_day, 
-            str(excel_path)
-        )
+        # 2-4. 依赖图并行执行：注释b → 终版数据流程（下载/解密 → 补充信息 → 三张表）；图片下载与压缩独立并行
+        dag = TaskGraph(name=f"report-{project_code}")
+        # 基于【给药方案】→"给药频率"写入明细页的"注释b"
+        dag.add("生成注释", traced, "生成注释", annotate_b_min, ctx)
+        # All_Flow 需在注释之后执行（明细字段顺序与单线程时一致）
+        # All_Flow 内部步骤上报为"处理终版数据/…"，与并行的"下载图片"同时显示
+        dag.add("处理终版数据", traced, "处理终版数据", all_flow, selected_exp_code, end_day, ctx,
+                nested_progress(progress, "处理终版数据"), deps=["生成注释"])
+        dag.add("下载图片", traced, "下载图片", download_photos, selected_exp_code)
+        results = dag.run(progress)
+        success, end_day, downloaded_excel_file, error_messages = results["处理终版数据"]
         
         if not success:
             print("❌ All_Flow流程执行失败")
             for error in error_messages:
                 print(f"  错误: {error}")
-            return None, None, None, None
+            raise RuntimeError("All_Flow流程执行失败: " + "；".join(map(str, error_messages or ["未知错误"])))
         
         # 使用下载的Excel文件路径作为终版Excel路径
         final_path = downloaded_excel_file
         print(f"➡️ 使用的结束天数：{end_day}")
         
-        # 4. 下载并压缩图片（静默跳过错误）
-        try:
-            download_images_from_smb(selected_exp_code)
-        except Exception as e:
-            print(f"⚠️ 图片下载失败，但继续生成报告: {str(e)}")
+        # 5. 写出明细Excel → Word 模板替换
+        progress("填充Word模板")
+        with stage("写出明细Excel") as st:
+            ctx.save(excel_path)
+            st.set(bytes=excel_path.stat().st_size, days=len(ctx.day_tables))
+            save_day_tables(ctx, excel_path)
+        with stage("填充Word模板"):
+            fill_word_template(ctx, template_path, word_output_path, experiment_id=selected_exp_code, photo_dir=PHOTO_DIR)
         
-        # 5. Excel → Word 模板替换
-        fill_word_template(excel_path, template_path, word_output_path, experiment_id=selected_exp_code, photo_dir=PHOTO_DIR)
+        # 写入结果缓存
+        if cache_key:
+            report_cache.put(cache_key, {"word": word_output_path, "excel": excel_path, "final": final_path},
+                             meta={"project_code": project_code, "end_day": end_day})
         
         print(f"🎉 项目报告生成完成！")
         return word_output_path, excel_path, final_path, end_day
         
     except Exception as e:
         print(f"❌ 生成项目报告失败: {str(e)}")
-        return None, None, None, None
+        raise
+
+def switch_report_end_day(project_code, end_day):
+    """
+    切换结束天：取生成报告时预计算的各天表格与汇总字段，只重新渲染Word（不再执行SQL/下载/提取/统计）
+    返回 (Word路径, 可选结束天列表)；项目未生成过报告时抛出 LookupError，结束天不可选时抛出 ValueError
+    读取明细与各天表格时持有与报告生成相同的项目锁（report-{项目编号}），不会读到正在写出的明细或新旧不一致的两个文件
+    """
+    excel_path = Path(REPORT_TEMP) / f"{project_code}_明细.xlsx"
+    with report_flight.lock(f"report-{project_code}"):
+        with stage("读取各天表格") as st:
+            day_tables = load_day_tables(excel_path) if excel_path.exists() else None
+            st.set(days=len(day_tables or {}))
+        if not day_tables:
+            raise LookupError(f"项目 {project_code} 没有可用的各天表格，请先生成报告")
+        if end_day not in day_tables:
+            raise ValueError(f"结束天 {end_day} 不可选，可选结束天: {sorted(day_tables)}")
+
+        with stage("读取明细"):
+            ctx = ReportContext.load(excel_path, project_code)
+    apply_day_tables(ctx, day_tables[end_day])
+    word_output_path = Path(REPORT_OUT) / f"{project_code}_项目报告_D{end_day}.docx"
+    with stage("填充Word模板"):
+        fill_word_template(ctx, Path(REPORT_TPL) / "Mode2.docx", word_output_path,
+                           experiment_id=ctx.experiment_code, photo_dir=PHOTO_DIR)
+    return word_output_path, sorted(day_tables)
 
 if __name__ == "__main__":
     # 提示用户输入项目编号
@@ -1,8 +1,6 @@
 # Python库导入
-import io
 import sys
 import pathlib
-from contextlib import redirect_stdout, redirect_stderr
 
 # 添加当前目录到Python路径
 current_dir = pathlib.Path(__file__).resolve().parent
@@ -10,42 +8,49 @@ if str(current_dir) not in sys.path: sys.path.insert(0, str(current_dir))
 
 # 本地模块导入 - 使用相对导入
 from .excel_download import download_project_file
+from .final_workbook import FinalWorkbook, FINAL_SHEETS
 from .sup_info import update_supplement_info
-from .form_7_1 import extract_weight_for_word
-from .form_7_2 import extract_tumor_volume_for_word
-from .form_7_3 import extract_table
+from .table_engine import ENGINE, extract_tables
+from .day_tables import precompute_day_tables, finish_day_tables
 from .add_second import process_excel_file
-
-def capture_output(func, *args, **kwargs):
-    """捕获函数执行的输出,避免重复使用io.StringIO代码"""
-    with io.StringIO() as buf, redirect_stdout(buf), redirect_stderr(buf):
-        return func(*args, **kwargs)
+from .P_compute import run_stats_requests
+from app.tasks.dag import TaskGraph
+from app.utils.Log.trace import stage
+from config.settings import REPORT_DAY_TABLES
 
 def execute_step(step_name, func, *args, is_critical=False, **kwargs):
-    """执行单个步骤，统一处理错误和日志"""
-    try:
-        result = capture_output(func, *args, **kwargs)
-        # 对于返回元组的函数，检查第一个元素（成功标志）
-        if isinstance(result, tuple) and len(result) >= 1:
-            success_flag = result[0]
-        else:
-            success_flag = bool(result)
-            
-        if success_flag:
-            print(f"✅ {step_name}成功")
-            return True, result
-        else:
-            error_msg = f"{step_name}失败"
+    """执行单个步骤，统一处理错误，并记录为一个trace阶段（耗时/错误）"""
+    with stage(step_name) as st:
+        try:
+            result = func(*args, **kwargs)
+            # 对于返回元组的函数，检查第一个元素（成功标志）
+            if isinstance(result, tuple) and len(result) >= 1:
+                success_flag = result[0]
+            else:
+                success_flag = bool(result)
+                
+            if success_flag:
+                print(f"✅ {step_name}成功")
+                return True, result
+            else:
+                error_msg = f"{step_name}失败"
+                print(f"❌ {error_msg}")
+                st.fail(error_msg)
+                return False, error_msg
+        except Exception as e:
+            error_msg = f"{step_name}异常: {str(e)}"
             print(f"❌ {error_msg}")
+            st.fail(error_msg)
             return False, error_msg
-    except Exception as e:
-        error_msg = f"{step_name}异常: {str(e)}"
-        print(f"❌ {error_msg}")
-        return False, error_msg
 
-def all_flow(experiment_code: str, user_end_day: int = None, temp_file_path: str = None) -> tuple:
+def open_final_workbook(path) -> FinalWorkbook:
+    """解析终版数据包：跳过全部表格矩阵都已缓存的数据页（需要时仍会按需解析）"""
+    skipped = set(ENGINE.cached_sheets(path))
+    return FinalWorkbook(path, [name for name in FINAL_SHEETS if name not in skipped])
+
+def all_flow(experiment_code: str, user_end_day: int = None, ctx=None, progress=None) -> tuple:
     """
-    参数:实验编号、用户提供的结束天数、临时文件路径(目标文件路径)
+    参数:实验编号、用户提供的结束天数、报告上下文(各步骤结果写入其中)、可选的进度回调
     返回:tuple: (执行成功与否, 实际使用的结束天数, 下载的Excel文件路径, 错误消息列表)
     """
     error_messages = []
@@ -64,9 +69,15 @@ def all_flow(experiment_code: str, user_end_day: int = None, temp_file_path: str
     else:
         downloaded_excel_file = download_result
     
+    # 终版数据包只解析一次（仅报告用到的工作表，矩阵已缓存的数据页不解析），后续各步骤共用该快照
+    success, final = execute_step("解析终版数据包", open_final_workbook, downloaded_excel_file, is_critical=True)
+    if not success:
+        error_messages.append(final)
+        return False, 0, downloaded_excel_file, error_messages
+    
     # 步骤2: 更新补充信息 - 关键步骤
     success, update_result = execute_step("更新补充信息", update_supplement_info, 
-                                 downloaded_excel_file, temp_file_path, user_end_day, is_critical=True)
+                                 final, ctx, user_end_day, is_critical=True)
     if not success:
         error_messages.append(update_result)
         return False, 0, downloaded_excel_file, error_messages
@@ -83,24 +94,25 @@ def all_flow(experiment_code: str, user_end_day: int = None, temp_file_path: str
         error_messages.append(error_msg)
         return False, 0, downloaded_excel_file, error_messages
     
-    # 步骤3-5: 生成各种表格 - 可选步骤，互不影响
-    optional_steps = [
-        ("生成form_7.1表格", extract_weight_for_word, downloaded_excel_file, temp_file_path, end_day),
-        ("生成form_7.2表格", extract_tumor_volume_for_word, downloaded_excel_file, temp_file_path, end_day),
-        ("生成form_7.3表格", extract_table, downloaded_excel_file, temp_file_path),
-    ]
+    # 步骤3: 生成表格 - 可选步骤，按 table_specs 一次提取全部表格（每个数据页只分类一次，各表失败互不影响）
+    # 预计算各天表格: 可选步骤，从表格矩阵为每个可选结束天生成表格（切换结束天时直接取用）
+    # 统计检验: 各表（含各天表格）登记的 Dunnett 数据集一次批量计算并回填P值
+    # 步骤4: 添加组合数据 - 可选步骤，依赖表格；各天的组合数据同时计算
+    dag = TaskGraph(name=f"all-flow-{experiment_code}")
+    forms = [dag.add("生成表格", execute_step, "生成表格", extract_tables, final, ctx, end_day)]
+    if REPORT_DAY_TABLES:
+        forms.append(dag.add("预计算各天表格", execute_step, "预计算各天表格", precompute_day_tables, final, ctx, deps=forms[:1]))
+    dag.add("统计检验", execute_step, "统计检验", run_stats_requests, ctx, deps=forms)
+    steps = forms + ["统计检验", dag.add("执行add_second", execute_step, "执行add_second", process_excel_file, ctx, deps=["统计检验"])]
+    if REPORT_DAY_TABLES:
+        steps.append(dag.add("汇总各天表格", execute_step, "汇总各天表格", finish_day_tables, ctx, deps=["统计检验"]))
+    results = dag.run(progress)
     
-    for step_name, func, *args in optional_steps:
-        success, step_result = execute_step(step_name, func, *args)
+    for step_name in steps:
+        success, step_result = results[step_name]
         if not success:
             error_messages.append(step_result)
     
-    # 步骤6: 添加组合数据 - 可选步骤
-    if temp_file_path:
-        success, add_second_result = execute_step("执行add_second", process_excel_file, temp_file_path)
-        if not success:
-            error_messages.append(add_second_result)
-    
     return True, end_day, downloaded_excel_file, error_messages
 
 if __name__ == "__main__":
@@ -110,7 +122,12 @@ if __name__ == "__main__":
     temp_file_path = sys.argv[3] if len(sys.argv) > 3 else "D:\\TianBa_AI\\Code\\docs\\temp\\project_report\\25P080002_明细.xlsx"
     
     print(f"执行参数: 实验编号={experiment_code}, 结束天数={user_end_day}")
-    flow_success, end_day, error_messages = all_flow(experiment_code, user_end_day, temp_file_path)
+    project_root = current_dir.parent.parent.parent.parent.parent.parent
+    if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+    from app.services.project_report.tumor.english.context import ReportContext
+    ctx = ReportContext.load(temp_file_path)
+    flow_success, end_day, _, error_messages = all_flow(experiment_code, user_end_day, ctx)
+    if flow_success: ctx.save(temp_file_path)
     print(f"{'🎉  成功' if flow_success else '⚠️  失败'}, 实际使用的结束天数: {end_day}")
     if error_messages:
         print("错误信息:")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""各结束天的表格集：生成报告时为每个可选结束天预计算表格、P值与汇总字段，切换结束天时直接取用，只需重新渲染Word"""
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parents[6]
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.english.context import ReportContext
+from app.services.project_report.tumor.english.Excel_extract.table_engine import ENGINE
+from app.services.project_report.tumor.english.Excel_extract.study_matrix import load_matrices
+from app.services.project_report.tumor.english.Excel_extract.add_second import process_excel_file, upsert_detail_field
+
+DAY_TABLES_VERSION = 1
+END_DAY_FIELD = "结束天"
+
+
+def available_days(matrices) -> List[int]:
+    """可选的结束天：各按天排布的表格都有的测量天（不含分组天0）"""
+    day_sets = [set(matrices[spec["name"]].days.tolist()) for spec in ENGINE.specs
+                if spec["layout"] == "days" and spec["name"] in matrices]
+    if not day_sets:
+        return []
+    return sorted(d for d in set.intersection(*day_sets) if d != 0)
+
+
+def precompute_day_tables(final, ctx) -> tuple:
+    """
+    为每个可选结束天生成一套表格（写入 ctx.day_tables：结束天 → 该天的报告上下文）
+    各天的 Dunnett 数据集登记到 ctx，与当前结束天的表格一起由统计检验步骤批量计算；返回 (True, 天数)
+    """
+    matrices = load_matrices(final.path, ENGINE.matrix_key(final.path)) or {}
+    for spec in ENGINE.specs:
+        if spec["layout"] == "days" and spec["name"] not in matrices:
+            try:
+                matrices[spec["name"]] = ENGINE.build_matrix(final, spec)
+            except Exception as e:
+                print(f"⚠️ {spec['name']} 无法读入，不参与各天表格: {e}")
+
+    day_tables = {}
+    for day in available_days(matrices):
+        day_ctx = ReportContext(ctx.project_code, ctx.experiment_code)
+        ENGINE.extract(final, day_ctx, day, matrices=matrices)
+        for name, req in day_ctx.stats_requests.items():
+            if req["on_result"] is not None:   # 只需回填表格的数据集；各测量天数据集由当前结束天的表格登记
+                ctx.request_stats(f"{name} 结束天{day}", req["rows"], req["control"], req["on_result"])
+        day_ctx.stats_requests = {}
+        day_ctx.set_detail(END_DAY_FIELD, str(day))
+        day_tables[day] = day_ctx
+    ctx.day_tables = day_tables
+    return True, len(day_tables)
+
+
+def finish_day_tables(ctx) -> bool:
+    """统计检验回填P值后，计算各天的汇总字段（TGITV组合、肿瘤体积等）"""
+    return all(process_excel_file(day_ctx) for day_ctx in ctx.day_tables.values())
+
+
+# =============== 持久化（与明细Excel同目录） ===============
+def day_tables_path(excel_path) -> Path:
+    """明细Excel旁的各天表格文件：xxx_Detail.xlsx → xxx_Detail.days.json"""
+    excel_path = Path(excel_path)
+    return excel_path.with_name(excel_path.stem + ".days.json")
+
+
+def save_day_tables(ctx, excel_path) -> Optional[Path]:
+    """写出各天的表格与汇总字段；没有预计算结果时删除旧文件（避免切换到过期的数据）"""
+    path = day_tables_path(excel_path)
+    if not ctx.day_tables:
+        path.unlink(missing_ok=True)
+        return None
+    data = {
+        "version": DAY_TABLES_VERSION,
+        "experiment_code": ctx.experiment_code,
+        "days": {
+            str(day): {
+                "forms": {name: {"columns": list(df.columns), "data": df.values.tolist()}
+                          for name, df in day_ctx.forms.items()},
+                "detail": day_ctx.detail,
+            }
+            for day, day_ctx in ctx.day_tables.items()
+        },
+    }
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def load_day_tables(excel_path) -> Optional[Dict[int, Dict[str, Any]]]:
+    """读取各天表格：结束天 → {"forms": {表名: DataFrame}, "detail": {字段名: 值}}；不存在或版本不符返回 None"""
+    path = day_tables_path(excel_path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != DAY_TABLES_VERSION:
+        return None
+    return {
+        int(day): {
+            "forms": {name: pd.DataFrame(form["data"], columns=form["columns"]) for name, form in entry["forms"].items()},
+            "detail": entry["detail"],
+        }
+        for day, entry in data["days"].items()
+    }
+
+
+def apply_day_tables(ctx, tables: Dict[str, Any]) -> None:
+    """把某天的表格与汇总字段写入报告上下文（替换生成报告时结束天的内容）"""
+    ctx.forms.update(tables["forms"])
+    for name, value in tables["detail"].items():
+        if name in ctx.detail:
+            ctx.detail[name] = value
+        else:
+            upsert_detail_field(ctx, name, value)
+
+
+if __name__ == "__main__":
+    from final_workbook import FinalWorkbook
+    from P_compute import run_stats_requests
+    input_path = "D:/TianBa_AI/Code/docs/temp/project_report/25P123501_Final.xlsx"
+    output_path = "D:/TianBa_AI/Code/docs/temp/project_report/25P123501_Detail.xlsx"
+
+    ctx = ReportContext.load(output_path)
+    print(f"可选结束天: {precompute_day_tables(FinalWorkbook(input_path), ctx)[1]} 天")
+    run_stats_requests(ctx)
+    finish_day_tables(ctx)
+    print(save_day_tables(ctx, output_path))
@@ -10,6 +10,7 @@ if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
 
 # 从根目录绝对导入Hakimi模块
 from app.utils.Solve.Hakimi import drmed, print_result
+from app.utils.Log.trace import stage
 # 导入配置
 from config.settings import PROJECT_DB, REPORT_TEMP
 # 从配置构建数据库连接URL
@@ -19,8 +20,8 @@ DB_URL = (
     f"?charset={PROJECT_DB['charset']}"
 )
 
-def download_project_file(experiment_code: str) -> (bool, str):
-    """下载项目文件并返回文件路径"""
+def query_project_file_url(experiment_code: str) -> str:
+    """查询终版数据包在OSS上的下载地址；查询失败或无文件时返回空字符串"""
     sql = """
     SELECT DISTINCT
       CASE
@@ -45,13 +46,32 @@ def download_project_file(experiment_code: str) -> (bool, str):
         df = pd.read_sql(sql, engine, params={"experiment_code": experiment_code})
     except Exception as e:
         print("数据库查询失败:", e)
-        return False, ""
+        return ""
         
     if df.empty or not df.loc[0, "url"]:
         print("没有查到文件")
+        return ""
+    return df.loc[0, "url"]
+
+def probe_project_file(experiment_code: str):
+    """以HEAD请求获取终版数据包的版本标识（ETag/Last-Modified/大小），用于结果缓存指纹；失败返回None"""
+    url = query_project_file_url(experiment_code)
+    if not url:
+        return None
+    try:
+        resp = requests.head(url, timeout=10)
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"获取文件版本失败: {e}")
+        return None
+    version = {k: resp.headers.get(k) for k in ("ETag", "Last-Modified", "Content-Length") if resp.headers.get(k)}
+    return {"url": url, **version} if version else None
+
+def download_project_file(experiment_code: str) -> (bool, str):
+    """下载项目文件并返回文件路径"""
+    url = query_project_file_url(experiment_code)
+    if not url:
         return False, ""
-        
-    url = df.loc[0, "url"]
     suffix = pathlib.Path(url).suffix or ".bin"
 
     # 保存到docs/temp/project_report目录
@@ -60,17 +80,21 @@ def download_project_file(experiment_code: str) -> (bool, str):
     save_path = save_dir / f"{experiment_code}_Final{suffix}"
 
     try:
-        resp = requests.get(url, timeout=60)
-        resp.raise_for_status()
-        with open(save_path, "wb") as f:
-            f.write(resp.content)
+        with stage("OSS下载") as st:
+            resp = requests.get(url, timeout=60)
+            resp.raise_for_status()
+            with open(save_path, "wb") as f:
+                f.write(resp.content)
+            st.set(bytes=len(resp.content))
         print("下载成功")
         
         # 检查并解密文件
         print("正在检查文件是否加密...")
         
         # 调用解密函数
-        result = drmed(str(save_path))
+        with stage("DRM解密") as st:
+            result = drmed(str(save_path))
+            st.set(bytes=save_path.stat().st_size)
         print_result(result)
         
         return True, str(save_path)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""终版数据包解析快照：工作表名称直接从 ZIP 读取，只解析报告用到的工作表（每张只解析一次，读取后端见 xlsx_reader），供 sup_info 与各表格提取共用"""
+import threading
+
+from app.services.project_report.tumor.english.Excel_extract.sheet_grid import SheetGrid
+from app.services.project_report.tumor.english.Excel_extract.xlsx_meta import XlsxMeta
+from app.services.project_report.tumor.english.Excel_extract.xlsx_reader import SheetData, read_sheets
+from app.utils.Log.trace import stage
+
+# 报告用到的工作表（中英文名称）；其余"分组后第X天"等工作表只保留名称
+FINAL_SHEETS = [
+    "项目操作信息", "Project Information",          # sup_info
+    "实验数据汇总", "Study Data",                   # form_7_1 / form_7_2
+    "实验设计", "Study Design",                     # form_7_1 / form_7_2 / form_7_3
+    "样品收集方案", "Sample Collection Record",     # form_7_3
+]
+
+
+class FinalWorkbook:
+    """
+    终版数据包快照：all_sheetnames 为全部工作表名（由 XlsxMeta 直接从 ZIP 读取，不解析单元格）
+    sheet_names 中存在的工作表在构造时一次解析；其余工作表首次访问时才解析，调用方不需要的工作表（如矩阵已缓存的数据页）不会被解析
+    """
+
+    def __init__(self, path, sheet_names=FINAL_SHEETS, meta: XlsxMeta = None):
+        self.path = str(path)
+        self.meta = meta or XlsxMeta(self.path)
+        self.all_sheetnames = self.meta.sheetnames
+        self._sheets = {}
+        self._grids = {}
+        self._lock = threading.RLock()
+        self._load([name for name in sheet_names if name in self.meta])
+
+    def _load(self, names):
+        """解析一批工作表（共用一次读取）"""
+        names = [name for name in names if name not in self._sheets]
+        if not names:
+            return
+        with stage("解析工作表", bytes=sum(self.meta.sheets[name]["bytes"] for name in names)) as st:
+            sheets, backend = read_sheets(self.path, names, self.meta)
+            st.set(sheets=len(sheets), backend=backend)
+        self._sheets.update(sheets)
+
+    @property
+    def sheetnames(self):
+        return self.all_sheetnames
+
+    def __contains__(self, name):
+        return name in self.meta
+
+    def sheet(self, name) -> SheetData:
+        """工作表的原始内容（未解析过的工作表此时解析）"""
+        with self._lock:
+            if name not in self._sheets and name in self.meta:
+                self._load([name])
+            return self._sheets[name]
+
+    def grid(self, name) -> SheetGrid:
+        """工作表的网格快照（首次使用时构建，之后各提取步骤共用）"""
+        with self._lock:
+            if name not in self._grids:
+                self._grids[name] = SheetGrid(self.sheet(name))
+            return self._grids[name]
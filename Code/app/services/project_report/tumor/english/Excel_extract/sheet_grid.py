@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""工作表网格快照：一次性把工作表物化为二维数组（原始值/有效值/规整文本/匹配键/数值），供各表格提取步骤做向量化查找"""
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+_STRIP = re.compile(r"[（）()\s]")   # 匹配键去掉的字符：中英文括号与空白
+_SPACES = re.compile(r"\s+")
+_NUMBER = re.compile(r"(-?\d+(?:\.\d+)?)")
+
+
+def norm(s) -> str:
+    """规整文本：全角空格转半角、去首尾空白、连续空白合并为一个"""
+    if s is None:
+        return ""
+    s = str(s).replace("\u3000", " ").strip()
+    return _SPACES.sub(" ", s)
+
+
+def match_key(s) -> str:
+    """匹配键：规整文本后去掉中英文括号与空白，关键词匹配时文本与关键词都按此规整"""
+    return _STRIP.sub("", norm(s))
+
+
+def parse_float(x):
+    """单元格数值：空值/横线 → None；去掉千分位和百分号；整体无法转换时取第一个数字"""
+    return _parse_text(norm(x))
+
+
+def _parse_text(s: str):
+    """parse_float 对已规整文本的部分"""
+    if s in ("", "-", "—", "–"):
+        return None
+    s = s.replace(",", "").replace("%", "")
+    try:
+        return float(s)
+    except Exception:
+        m = _NUMBER.search(s)
+        return float(m.group(1)) if m else None
+
+
+def _normalize(v):
+    """单元格 → (规整文本, 匹配键, 数值)；数值单元格走快速路径（结果与 norm/parse_float 相同）"""
+    if v is None:
+        return "", "", None
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        t = str(v)
+        return t, t, float(v)
+    t = norm(v)
+    return t, _STRIP.sub("", t), _parse_text(t)
+
+
+class SheetGrid:
+    """
+    工作表快照（坐标与 openpyxl 一致，从1开始；越界读取按空单元格处理）：
+        raw    原始值（合并区域内非左上角单元格为 None）
+        values 有效值（合并区域内取左上角的值）
+        text   有效值的规整文本，key 为去掉括号/空白后的匹配键
+        num    解析出的数值（is_num 标记能否解析），empty 标记规整文本为空
+    """
+
+    def __init__(self, sheet):
+        """sheet 为读取后端给出的 SheetData（title / raw / merged）"""
+        self.title = sheet.title
+        self.raw = sheet.raw
+        self.max_row, self.max_column = shape = self.raw.shape
+
+        self.values = self.raw.copy()
+        for r1, c1, r2, c2 in sheet.merged:
+            block = self.values[r1 - 1:r2, c1 - 1:c2]
+            block[block == None] = self.raw[r1 - 1, c1 - 1]  # noqa: E711（逐元素比较）
+
+        text, key, parsed = zip(*map(_normalize, self.values.ravel()))
+        self.text = np.array(text, dtype=object).reshape(shape)
+        self.key = np.array(key, dtype=object).reshape(shape)
+        self.is_num = np.array([v is not None for v in parsed], dtype=bool).reshape(shape)
+        self.num = np.array([np.nan if v is None else v for v in parsed], dtype=float).reshape(shape)
+        self.empty = self.text == ""
+        self._row_keys = None
+
+    # ---------- 单元格 ----------
+    def _inside(self, r: int, c: int) -> bool:
+        return 1 <= r <= self.max_row and 1 <= c <= self.max_column
+
+    def value(self, r: int, c: int):
+        """有效值（合并区域取左上角的值）"""
+        return self.values[r - 1, c - 1] if self._inside(r, c) else None
+
+    def raw_value(self, r: int, c: int):
+        """原始值（不展开合并区域）"""
+        return self.raw[r - 1, c - 1] if self._inside(r, c) else None
+
+    def text_at(self, r: int, c: int) -> str:
+        return self.text[r - 1, c - 1] if self._inside(r, c) else ""
+
+    def number(self, r: int, c: int) -> Optional[float]:
+        """数值（与 parse_float(有效值) 相同），无法解析返回 None"""
+        if not self._inside(r, c) or not self.is_num[r - 1, c - 1]:
+            return None
+        return float(self.num[r - 1, c - 1])
+
+    # ---------- 区域查找 ----------
+    def _box(self, rows=None, cols=None) -> Tuple[int, int, int, int]:
+        """把 (起, 止) 行列范围（含两端，None 表示整表）裁剪到表内"""
+        r1, r2 = rows or (1, self.max_row)
+        c1, c2 = cols or (1, self.max_column)
+        return max(r1, 1), min(r2, self.max_row), max(c1, 1), min(c2, self.max_column)
+
+    def classify(self, matcher: "LabelMatcher") -> Dict[str, np.ndarray]:
+        """整表单次分类：标签类 → 命中掩码（相同的匹配键只匹配一次）"""
+        uniq, inverse = np.unique(self.key.ravel(), return_inverse=True)
+        classes = [matcher.classify_key(k) for k in uniq]
+        return {name: np.array([name in c for c in classes], dtype=bool)[inverse].reshape(self.key.shape)
+                for name in matcher.names}
+
+    def equal(self, texts: Iterable[str], ignore_case: bool = False) -> np.ndarray:
+        """规整文本等于任一候选的掩码"""
+        if ignore_case:
+            wanted = {norm(t).upper() for t in texts}
+            return np.array([t.upper() in wanted for t in self.text.ravel()], dtype=bool).reshape(self.text.shape)
+        return np.isin(self.text, [norm(t) for t in texts])
+
+    def first(self, mask: np.ndarray, rows=None, cols=None) -> Optional[Tuple[int, int]]:
+        """按行优先返回区域内首个命中的单元格 (行, 列)；未找到返回 None"""
+        r1, r2, c1, c2 = self._box(rows, cols)
+        box = mask[r1 - 1:r2, c1 - 1:c2]
+        hits = np.flatnonzero(box)
+        if hits.size == 0:
+            return None
+        r, c = divmod(int(hits[0]), box.shape[1])
+        return r1 + r, c1 + c
+
+    def first_in_col(self, mask: np.ndarray, col: int, rows=None) -> Optional[int]:
+        """某列在 rows 范围内首个命中的行号"""
+        hit = self.first(mask, rows, (col, col))
+        return hit[0] if hit else None
+
+    def first_in_row(self, mask: np.ndarray, row: int, cols=None) -> Optional[int]:
+        """某行在 cols 范围内首个命中的列号"""
+        hit = self.first(mask, (row, row), cols)
+        return hit[1] if hit else None
+
+    def first_empty_col(self, rows, start_col: int) -> Optional[int]:
+        """自 start_col 向右，首个在 rows 范围内整列为空的列；没有返回 None"""
+        r1, r2, c1, c2 = self._box(rows, (start_col, self.max_column))
+        hits = np.flatnonzero(self.empty[r1 - 1:r2, c1 - 1:c2].all(axis=0))
+        return c1 + int(hits[0]) if hits.size else None
+
+    def first_empty_row(self, cols, start_row: int) -> Optional[int]:
+        """自 start_row 向下，首个在 cols 范围内整行为空的行；没有返回 None"""
+        r1, r2, c1, c2 = self._box((start_row, self.max_row), cols)
+        hits = np.flatnonzero(self.empty[r1 - 1:r2, c1 - 1:c2].all(axis=1))
+        return r1 + int(hits[0]) if hits.size else None
+
+    def header_row(self, matcher: "LabelMatcher") -> Optional[int]:
+        """首个整行文本（各单元格匹配键拼接）同时命中匹配器全部标签类的行，用于定位表头"""
+        if self._row_keys is None:
+            self._row_keys = ["".join(row) for row in self.key]
+        wanted = set(matcher.names)
+        for r, row_key in enumerate(self._row_keys, 1):
+            if wanted <= matcher.classify_key(row_key):
+                return r
+        return None
+
+    def count_numbers(self, col: int, rows=None) -> int:
+        """某列在 rows 范围内能解析为数值的单元格个数"""
+        r1, r2, c1, c2 = self._box(rows, (col, col))
+        return int(self.is_num[r1 - 1:r2, c1 - 1:c2].sum())
+
+
+class LabelMatcher:
+    """
+    多关键词标签匹配器：各标签类的关键词只规整一次，合成一个正则，单次扫描给出文本命中的全部标签类
+        LABELS = LabelMatcher({"mean": ["均数", "Average"], "sd": ["标准误", "Standard Error of the Mean"]})
+        LABELS.classify("均数（Average）")  → frozenset({"mean"})
+    文本与关键词都转为匹配键（去掉括号和空白）后做子串匹配
+    """
+
+    def __init__(self, families: Dict[str, Iterable[str]]):
+        self.names = list(families)
+        owners: Dict[str, set] = {}   # 规整后的关键词 → 所属标签类
+        for name, patterns in families.items():
+            for pattern in ([patterns] if isinstance(patterns, str) else patterns or []):
+                needle = match_key(pattern)
+                if needle:
+                    owners.setdefault(needle, set()).add(name)
+        # 正则在每个位置只取最长的关键词，被它包含的更短关键词的标签类一并计入
+        self._classes = {n: frozenset().union(*(owners[m] for m in owners if m in n)) for n in owners}
+        alternation = "|".join(re.escape(n) for n in sorted(owners, key=len, reverse=True))
+        self._regex = re.compile(f"(?=({alternation}))") if owners else None
+
+    def classify_key(self, key: str) -> frozenset:
+        """已规整的匹配键 → 命中的标签类"""
+        if not key or self._regex is None:
+            return frozenset()
+        found = set()
+        for m in self._regex.finditer(key):
+            found |= self._classes[m.group(1)]
+        return frozenset(found)
+
+    def classify(self, text) -> frozenset:
+        """任意单元格值 → 命中的标签类"""
+        return self.classify_key(match_key(text))
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""研究数据矩阵：按"分组后天数"排布的汇总块（体重/荷瘤体积）一次读成 组别×动物×测量天 的数组，任意结束天的表格、生长曲线与各天统计都是它的切片
+单列数据（瘤重）按只有一个测量点的矩阵处理"""
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MATRIX_VERSION = 1   # 矩阵结构或取值规则变化时加一，旧的缓存文件自动失效
+_SUFFIX = ".matrix.npz"
+
+
+class StudyMatrix:
+    """
+    一张按天排布的汇总表：
+        groups   组别（G1/G2/...），animals 各组动物编号（G×A，不足补 ""）
+        days     测量天（分组后天数，升序）
+        values   动物个体值 G×A×D；valid 标记该格有数值
+        stats    统计行（均数/标准误/TGITV 等）：标签类 → G×D（缺失为 NaN）
+        digits   个体值的取整位数（None 不取整）
+    个体值在读入时已按 digits 取整，因此可以用 float32 存放：读出时再按 digits 取整即可还原为与单元格一致的值；
+    digits 为 None 时 float32 不能无损还原，改用 float64
+    """
+
+    def __init__(self, name: str, groups: List[str], animals: np.ndarray, days: np.ndarray,
+                 values: np.ndarray, valid: np.ndarray, stats: Dict[str, np.ndarray], digits: Optional[int]):
+        self.name = name
+        self.groups = list(groups)
+        self.animals = animals
+        self.days = np.asarray(days, dtype=np.int64)
+        self.values = values
+        self.valid = valid
+        self.stats = stats
+        self.digits = digits
+        self._day_index = {int(d): i for i, d in enumerate(self.days)}
+
+    @classmethod
+    def from_blocks(cls, name: str, blocks: List[Dict], day_to_col: Dict[int, int], number, stat_cell,
+                    digits: Optional[int]) -> "StudyMatrix":
+        """
+        由已定位的组块构建：blocks 为 [{"group", "animal_rows": [(行, 动物编号)], "stat_rows": {标签类: 行}}]，
+        number(行, 列) 读取个体值，stat_cell(标签类, 行, 列) 读取统计行数值（None 表示缺失）
+        """
+        days = np.array(sorted(day_to_col), dtype=np.int64)
+        cols = [day_to_col[int(d)] for d in days]
+        n_animals = max((len(b["animal_rows"]) for b in blocks), default=0)
+        shape = (len(blocks), n_animals, len(days))
+        dtype = np.float64 if digits is None else np.float32
+
+        values = np.zeros(shape, dtype=dtype)
+        valid = np.zeros(shape, dtype=bool)
+        animals = np.full(shape[:2], "", dtype=object)
+        families = sorted({f for b in blocks for f in b["stat_rows"]})
+        stats = {f: np.full((len(blocks), len(days)), np.nan) for f in families}
+        for g, block in enumerate(blocks):
+            for a, (r, label) in enumerate(block["animal_rows"]):
+                animals[g, a] = label
+                for d, c in enumerate(cols):
+                    v = number(r, c)
+                    if v is not None:
+                        values[g, a, d] = v if digits is None else (round(v) if digits == 0 else round(v + 1e-06, digits))
+                        valid[g, a, d] = True
+            for family, r in block["stat_rows"].items():
+                if r:
+                    for d, c in enumerate(cols):
+                        v = stat_cell(family, r, c)
+                        if v is not None:
+                            stats[family][g, d] = v
+        return cls(name, [b["group"] for b in blocks], animals, days, values, valid, stats, digits)
+
+    # ---------- 切片 ----------
+    def has_day(self, day) -> bool:
+        return day is not None and int(day) in self._day_index
+
+    def day_index(self, day) -> int:
+        return self._day_index[int(day)]
+
+    def _restore(self, x):
+        """存放值 → 与单元格取整结果一致的 Python 数值（digits=0 为 int）"""
+        if self.digits is None:
+            return float(x)
+        if self.digits == 0:
+            return int(round(float(x)))
+        return round(float(x), self.digits)
+
+    def group_values(self, g: int, day) -> list:
+        """某组某天的个体值（按动物行顺序，跳过缺失）"""
+        d = self.day_index(day)
+        return [self._restore(x) for x in self.values[g, self.valid[g, :, d], d]]
+
+    def day_values(self, day) -> Dict[str, list]:
+        """某天各组的个体值：组别 → 值列表（GraphPad使用页）"""
+        return {group: self.group_values(g, day) for g, group in enumerate(self.groups)}
+
+    def long_rows(self, day) -> List[Dict]:
+        """某天的 Dunnett 长表行 [{"group", "volume"}]"""
+        return [{"group": group, "volume": float(v)}
+                for g, group in enumerate(self.groups) for v in self.group_values(g, day)]
+
+    def stat(self, family: str, g: int, day) -> Optional[float]:
+        """某组某天的统计行数值；无该统计行或缺失返回 None"""
+        arr = self.stats.get(family)
+        if arr is None:
+            return None
+        v = arr[g, self.day_index(day)]
+        return None if np.isnan(v) else float(v)
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """由个体值一次性计算全部组别×测量天的 n / 均数 / 标准误（样本标准差/√n），均为 G×D，无法计算处为 NaN"""
+        values = self.values.astype(np.float64)
+        if self.digits is not None:
+            values = np.round(values, self.digits)
+        n = self.valid.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(self.valid, values, 0.0).sum(axis=1) / n
+            dev = np.where(self.valid, values - mean[:, None, :], 0.0)
+            sem = np.sqrt((dev ** 2).sum(axis=1) / (n - 1)) / np.sqrt(n)
+        mean[n == 0] = np.nan
+        sem[n < 2] = np.nan
+        return {"n": n, "mean": mean, "sd": sem}
+
+    def with_stats(self, stats: Dict[str, np.ndarray]) -> "StudyMatrix":
+        """统计行替换为 stats 中的值（个体值共用，不修改原矩阵）"""
+        return StudyMatrix(self.name, self.groups, self.animals, self.days, self.values, self.valid,
+                           {**self.stats, **stats}, self.digits)
+
+    def curve(self, family: str = "mean") -> Dict[str, np.ndarray]:
+        """生长曲线：组别 → 各测量天的统计值（与 days 对齐，缺失为 NaN）"""
+        arr = self.stats.get(family)
+        if arr is None:
+            return {}
+        return {group: arr[g].copy() for g, group in enumerate(self.groups)}
+
+    # ---------- 持久化（与终版数据包同目录） ----------
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        p = f"{self.name}/"
+        arrays = {
+            p + "groups": np.array(self.groups, dtype=str),
+            p + "animals": self.animals.astype(str),
+            p + "days": self.days,
+            p + "values": self.values,
+            p + "valid": self.valid,
+            p + "digits": np.array(-1 if self.digits is None else self.digits),
+        }
+        arrays.update({f"{p}stat.{family}": arr for family, arr in self.stats.items()})
+        return arrays
+
+    @classmethod
+    def _from_arrays(cls, name: str, data) -> "StudyMatrix":
+        p = f"{name}/"
+        digits = int(data[p + "digits"])
+        stats = {k[len(p) + 5:]: data[k] for k in data.files if k.startswith(p + "stat.")}
+        return cls(name, data[p + "groups"].tolist(), data[p + "animals"].astype(object), data[p + "days"],
+                   data[p + "values"], data[p + "valid"], stats, None if digits < 0 else digits)
+
+
+def matrix_path(final_path) -> Path:
+    """终版数据包旁的矩阵缓存文件：xxx_Final.xlsx → xxx_Final.matrix.npz"""
+    final_path = Path(final_path)
+    return final_path.with_name(final_path.stem + _SUFFIX)
+
+
+def save_matrices(final_path, matrices: Dict[str, StudyMatrix], key: str) -> None:
+    """把矩阵写到终版数据包旁（key 为终版内容与表格定义的指纹）；写入失败只提示"""
+    path = matrix_path(final_path)
+    arrays = {"__key__": np.array(key), "__names__": np.array(list(matrices), dtype=str)}
+    for m in matrices.values():
+        arrays.update(m._arrays())
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}.npz")
+    try:
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ 写入矩阵缓存失败: {e}")
+        tmp.unlink(missing_ok=True)
+
+
+def cached_matrix_names(final_path, key: str) -> List[str]:
+    """矩阵缓存中已有的表名（只读名称与指纹，不读数组）；缓存不可用时返回空列表"""
+    path = matrix_path(final_path)
+    if not path.is_file():
+        return []
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return data["__names__"].tolist() if str(data["__key__"]) == key else []
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def load_matrices(final_path, key: str) -> Optional[Dict[str, StudyMatrix]]:
+    """读取终版数据包旁的矩阵缓存；不存在、已损坏或指纹不一致时返回 None"""
+    path = matrix_path(final_path)
+    if not path.is_file():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["__key__"]) != key:
+                return None
+            return {name: StudyMatrix._from_arrays(name, data) for name in data["__names__"].tolist()}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ 读取矩阵缓存失败: {e}")
+        return None
@@ -1,14 +1,19 @@
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment
 from decimal import Decimal, InvalidOperation
 import re
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent.parent.parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.english.context import ReportContext
+from app.services.project_report.tumor.english.Excel_extract.final_workbook import FinalWorkbook
 
 # 遍历所有sheet名,从中提取最大的结束天数
-def extract_max_end_day(excel_file: str) -> int:
+def extract_max_end_day(sheet_names) -> int:
     try:
-        wb = load_workbook(excel_file, data_only=True, read_only=True)
         max_day = 0  # 默认值改为0，确保只有实际找到的天数才会被返回
-        for sheet_name in wb.sheetnames:
+        for sheet_name in sheet_names:
             # 匹配中文格式：分组后第X天
             match = re.search(r'分组后第(\d+)天', sheet_name)
             if match:
@@ -21,7 +26,6 @@ def extract_max_end_day(excel_file: str) -> int:
             if match:
                 day = int(match.group(1))
                 max_day = max(max_day, day)
-        wb.close()
         return max_day
     except Exception as e:
         print(f"提取结束天数时发生异常: {e}")
@@ -60,36 +64,25 @@ def remove_mice_from_strain(strain_value: str) -> str:
         return result.strip()
     return strain_str
 
-def update_supplement_info(src_file: str, dst_file: str, user_end_day: int = None) -> int:
-    """更新补充信息页，写入实验终点天和结束天；返回：实际使用的结束天数"""
+def update_supplement_info(final, ctx, user_end_day: int = None) -> int:
+    """将终版数据包的项目操作信息、实验终点天和结束天写入报告上下文的明细字段；返回：实际使用的结束天数"""
     try:
         # 支持中英文工作表名称
         src_sheet_options = ["项目操作信息", "Project Information"]
-        dst_sheet = "明细"  # 固定使用明细工作表
-        
-        # 读取源数据
-        src_wb = load_workbook(src_file, data_only=True)
         
-        # 查找源工作表
-        src_ws = None
+        # 源数据：终版数据包快照（由 all_flow 统一解析），查找源工作表（网格快照）
+        src_grid = None
         for sheet_name in src_sheet_options:
-            if sheet_name in src_wb.sheetnames:
-                src_ws = src_wb[sheet_name]
+            if sheet_name in final.sheetnames:
+                src_grid = final.grid(sheet_name)
                 break
         
-        if src_ws is None:
+        if src_grid is None:
             return None
         
         # 找"实验类型"或"Study Type"起始行
-        start_row = None
         start_row_options = ["实验类型", "Study Type"]
-        
-        for r in range(1, src_ws.max_row + 1):
-            cell_value = src_ws.cell(r, 1).value
-            if cell_value and str(cell_value).strip() in start_row_options:
-                start_row = r
-                break
-                
+        start_row = src_grid.first_in_col(src_grid.equal(start_row_options), 1)
         if start_row is None:
             return None
 
@@ -106,9 +99,9 @@ def update_supplement_info(src_file: str, dst_file: str, user_end_day: int = Non
             "Animal Quality Certificate": "动物质量合格证号",
         }
         
-        for r in range(start_row, src_ws.max_row + 1):
-            k = src_ws.cell(r, 1).value
-            v = src_ws.cell(r, 2).value
+        for r in range(start_row, src_grid.max_row + 1):
+            k = src_grid.raw_value(r, 1)
+            v = src_grid.raw_value(r, 2)
             if k is None and v is None:
                 break
             if k is not None:
@@ -119,60 +112,28 @@ def update_supplement_info(src_file: str, dst_file: str, user_end_day: int = Non
                 new_data[key_str] = as_text(v)
 
         # 获取实验终点天（从Excel提取的最大天数）
-        experiment_end_day = extract_max_end_day(src_file)
+        experiment_end_day = extract_max_end_day(final.all_sheetnames)
         new_data["实验终点天"] = str(experiment_end_day)
         # 如果用户提供了有效的结束天（不为None和0），则使用用户提供的值
         end_day = user_end_day if user_end_day not in [None, 0] else experiment_end_day
         new_data["结束天"] = str(end_day)
-        src_wb.close()
-
-        # 更新目标文件
-        wb = load_workbook(dst_file)
-        ws = wb[dst_sheet]
-
-        # 创建字段到行号的索引
-        field_row = {
-            str(ws.cell(r, 1).value).strip(): r
-            for r in range(1, ws.max_row + 1)
-            if ws.cell(r, 1).value }
 
-        # 更新数据
+        # 更新明细字段（均为文本）
         for k, v in new_data.items():
-            if k in field_row:
-                row = field_row[k]
-            else:
-                ws.append([k, None])
-                row = ws.max_row
-            
-            cell = ws.cell(row, 2)
-            cell.number_format = '@'
-            cell.data_type = 's'
-            cell.value = v
-            cell.alignment = Alignment(horizontal='left')
+            ctx.set_detail(k, v)
+        ctx.detail_widths = (20, 40)
 
-        # 调整列宽
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 40
-        
         # 处理日期格式
-        for r in range(1, ws.max_row + 1):
-            cell_value = ws.cell(r, 2).value
-            if cell_value:
-                converted_value = convert_date_format(cell_value)
-                if converted_value != cell_value:
-                    ws.cell(r, 2).value = converted_value
-        
+        for k, v in ctx.detail.items():
+            if v:
+                ctx.detail[k] = convert_date_format(v)
+
         # 处理实验动物品系
         animal_strain_options = ["实验动物品系", "Animal Strains"]
-        for r in range(1, ws.max_row + 1):
-            if ws.cell(r, 1).value and str(ws.cell(r, 1).value).strip() in animal_strain_options:
-                second_col_value = ws.cell(r, 2).value
-                if second_col_value:
-                    processed_value = remove_mice_from_strain(second_col_value)
-                    if processed_value != second_col_value:
-                        ws.cell(r, 2).value = processed_value
-        
-        wb.save(dst_file)
+        for k in animal_strain_options:
+            if ctx.detail.get(k):
+                ctx.detail[k] = remove_mice_from_strain(ctx.detail[k])
+
         return end_day
     except Exception as e:
         print(f"更新失败: {e}")
@@ -182,5 +143,7 @@ if __name__ == "__main__":
     # 使用完整文件路径
     src_file = "D:/TianBa_AI/Code/docs/temp/project_report/25P080002_Final.xlsx"
     dst_file = "D:/TianBa_AI/Code/docs/temp/project_report/25P080002_明细.xlsx"
-    result = update_supplement_info(src_file, dst_file,10)
+    ctx = ReportContext.load(dst_file)
+    result = update_supplement_info(FinalWorkbook(src_file), ctx, 10)
+    ctx.save(dst_file)
     print(f"文件更新成功！实际使用的结束天: {result}" if result is not None else "文件更新失败！")
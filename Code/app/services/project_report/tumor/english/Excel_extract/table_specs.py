@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+报告表格的声明式定义（由 table_engine 统一提取）：新增表格（如体重变化率、脏器重量）只需在 TABLE_SPECS 中添加一项
+
+每项字段：
+    name          输出表名（报告上下文/明细Excel中的工作表名）
+    sheet         数据页候选名称（中英文）
+    layout        days：按"分组后天数"列排布的汇总块（锚点定位矩形，组别在锚点列，统计标签在右一列）
+                  column：单列数值（按表头关键词定位数据列，组别在A列，统计标签在B列）
+    anchor        days：锚点关键词；days_header：天数表头关键词；lookahead：锚点下方判定结束列的行数
+    end_row_fallback  days：找不到整行全空的行时，True 取工作表末行，False 报错
+    value_header  column：数据列表头关键词（数据列 = 表头左一列，左列不是数值列时取表头所在列）
+    labels        统计行标签（在组块内的统计标签列中查找），键为标签类
+    value_digits  动物个体值的取整位数（用于P值与GraphPad）：None 不取整，0 取整数，>0 加容差后四舍五入
+    columns       输出列（按顺序）：value 为取值方式
+                  group 组别 / design 受试品（实验设计页） / mean_sd 均数±标准误（day: start|end）
+                  delta 结束天与分组天均数之差 / ratio 比值×100（原始单元格） / percent 百分数（≤1 视为比值）
+                  p Dunnett P值 / blank 空列
+                  ratio/percent 列的 recompute 为数据核对时由个体均数重算的公式：
+                  growth 1-(Ti-T0)/(Ci-C0)（相对分组天的增长），ratio 1-Ti/Ci（T 为受试组均数，C 为对照组均数）
+    graphpad      GraphPad使用页的标题
+    stats_label   开启 REPORT_STATS_ALL_DAYS 时各测量天数据集的名称
+"""
+
+GROUP_PATTERN = r"^\s*G\d+\b"   # 组别识别（形如 G1/G2/...）
+CONTROL_GROUP = "G1"            # Dunnett 对照组
+
+# 实验设计页：组别 → 受试品(剂量)，各表共用
+DESIGN_SPEC = {
+    "sheet": ["实验设计", "Study Design"],
+    "group": ["组别", "Groups"],
+    "drug": ["处理方式", "Treatment"],
+    "dose": ["剂量", "Dosages"],
+}
+
+MEAN_LABELS = ["均数", "Average"]
+SD_LABELS = ["标准误", "Standard Error of the Mean"]
+
+TABLE_SPECS = [
+    {   # 表1：实验动物体重
+        "name": "form_7_1",
+        "sheet": ["实验数据汇总", "Study Data"],
+        "layout": "days",
+        "anchor": ["实验动物体重克", "Animal Weight（g）"],
+        "days_header": ["分组后天数", "Days Post Grouping"],
+        "lookahead": 5,
+        "end_row_fallback": False,
+        "labels": {"mean": MEAN_LABELS, "sd": SD_LABELS},
+        "value_digits": 1,
+        "columns": [
+            {"name": "组别", "value": "group"},
+            {"name": "受试品", "value": "design"},
+            {"name": "分组天均值", "value": "mean_sd", "day": "start", "digits": 1},
+            {"name": "结束天均值", "value": "mean_sd", "day": "end", "digits": 1},
+            {"name": "差值", "value": "delta", "digits": 1},
+            {"name": "P值", "value": "p"},
+        ],
+        "graphpad": "7-1实验动物体重数据",
+        "stats_label": "体重",
+    },
+    {   # 表2：实验动物荷瘤体积 mm3
+        "name": "form_7_2",
+        "sheet": ["实验数据汇总", "Study Data"],
+        "layout": "days",
+        "anchor": ["实验动物荷瘤体积", "Animal Tumor Volume (mm3)"],
+        "days_header": ["分组后天数", "Days Post Grouping"],
+        "lookahead": 5,
+        "end_row_fallback": True,
+        "labels": {"mean": MEAN_LABELS, "sd": SD_LABELS, "tgi": ["TGITV"]},
+        "value_digits": 0,
+        "columns": [
+            {"name": "组别", "value": "group"},
+            {"name": "受试品", "value": "design"},
+            {"name": "分组天均值", "value": "mean_sd", "day": "start", "digits": 0},
+            {"name": "结束天均值", "value": "mean_sd", "day": "end", "digits": 0},
+            {"name": "TGITV", "value": "ratio", "label": "tgi", "day": "end", "digits": 1, "recompute": "growth"},
+            {"name": "P值", "value": "p"},
+            {"name": "肿瘤清除比例", "value": "blank"},
+        ],
+        "graphpad": "7-2实验动物荷瘤体积数据",
+        "stats_label": "荷瘤体积",
+    },
+    {   # 表3：受试品对小鼠肿瘤重量抑瘤作用
+        "name": "form_7_3",
+        "sheet": ["样品收集方案", "Sample Collection Record"],
+        "layout": "column",
+        "value_header": ["肿瘤", "Tumor"],
+        "labels": {"mean": MEAN_LABELS, "sd": SD_LABELS, "tgi": ["TGITW"]},
+        "value_digits": None,
+        "columns": [
+            {"name": "组别", "value": "group"},
+            {"name": "受试品", "value": "design"},
+            {"name": "瘤重", "value": "mean_sd", "digits": 3},
+            {"name": "TGITW", "value": "percent", "label": "tgi", "digits": 1, "recompute": "ratio"},
+            {"name": "P值", "value": "p"},
+        ],
+        "graphpad": "7-3实验动物瘤重数据",
+    },
+]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""数据核对：由个体值一次性重算全部组别×测量天的均数、标准误与抑制率（TGITV/TGITW），与终版数据包中的统计行比对"""
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parents[6]
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.english.Excel_extract.study_matrix import StudyMatrix
+from app.services.project_report.tumor.english.Excel_extract.table_specs import CONTROL_GROUP
+
+TGI_TOLERANCE = 0.5   # 抑制率允许的偏差（百分点）
+
+
+def recompute_stats(spec, matrix: StudyMatrix) -> Dict[str, np.ndarray]:
+    """
+    重算统计行：标签类 → G×D（与 matrix.stats 同单位：ratio 列为比值，percent 列为百分数）
+    抑制率按输出列的 recompute 公式计算，对照组及无法计算处为 NaN
+    """
+    summary = matrix.summary()
+    mean = summary["mean"]
+    stats = {"mean": mean, "sd": summary["sd"]}
+    if CONTROL_GROUP not in matrix.groups:
+        return stats
+    c = matrix.groups.index(CONTROL_GROUP)
+    for col in spec["columns"]:
+        formula = col.get("recompute")
+        if not formula:
+            continue
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if formula == "growth":   # 1-(Ti-T0)/(Ci-C0)
+                base = mean[:, [matrix.day_index(0)]] if matrix.has_day(0) else np.zeros((len(matrix.groups), 1))
+                growth = mean - base
+                tgi = 1 - growth / growth[c]
+            elif formula == "ratio":  # 1-Ti/Ci
+                tgi = 1 - mean / mean[c]
+            else:
+                raise ValueError(f"未知的抑制率公式: {formula}")
+        tgi[c] = np.nan
+        tgi[~np.isfinite(tgi)] = np.nan
+        stats[col["label"]] = tgi * 100 if col["value"] == "percent" else tgi
+    return stats
+
+
+def _tolerances(spec, matrix: StudyMatrix) -> Dict[str, float]:
+    """各标签类允许的偏差：个体值取整到 d 位时，均数与标准误的偏差不超过 0.5×10^-d"""
+    tol = 0.5 * 10 ** -matrix.digits + 1e-09 if matrix.digits is not None else 1e-06
+    tolerances = {"mean": tol, "sd": tol}
+    for col in spec["columns"]:
+        if col.get("recompute"):
+            tolerances[col["label"]] = TGI_TOLERANCE / (100 if col["value"] == "ratio" else 1)
+    return tolerances
+
+
+def verify_matrix(spec, matrix: StudyMatrix, recomputed: Dict[str, np.ndarray] = None) -> List[Dict[str, Any]]:
+    """比对表中统计行与重算值，返回不一致项（两边都有数值且偏差超出允许范围）"""
+    recomputed = recomputed if recomputed is not None else recompute_stats(spec, matrix)
+    issues = []
+    for family, tol in _tolerances(spec, matrix).items():
+        sheet, calc = matrix.stats.get(family), recomputed.get(family)
+        if sheet is None or calc is None:
+            continue
+        with np.errstate(invalid="ignore"):
+            bad = np.isfinite(sheet) & np.isfinite(calc) & (np.abs(sheet - calc) > tol)
+        for g, d in zip(*np.nonzero(bad)):
+            issues.append({
+                "表格": spec["name"], "组别": matrix.groups[g], "天": int(matrix.days[d]), "指标": family,
+                "表中值": float(sheet[g, d]), "重算值": round(float(calc[g, d]), 6),
+                "差值": round(float(sheet[g, d] - calc[g, d]), 6),
+            })
+    return issues
+
+
+if __name__ == "__main__":
+    from final_workbook import FinalWorkbook
+    from table_engine import ENGINE
+    input_path = "D:/TianBa_AI/Code/docs/temp/project_report/25P118604_Final.xlsx"
+
+    final = FinalWorkbook(input_path)
+    for spec in ENGINE.specs:
+        issues = verify_matrix(spec, ENGINE.build_matrix(final, spec))
+        print(f"{spec['name']}: {len(issues)} 处不一致")
+        for issue in issues[:20]:
+            print(issue)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""终版数据包读取后端：calamine（Rust 实现，默认）/ openpyxl（回退）；都把工作表读成 SheetData（原始值 + 合并区域），合并单元格由 SheetGrid 统一展开"""
+import datetime
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.workbook.defined_name import DefinedNameList
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parents[6]
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+from app.services.project_report.tumor.english.Excel_extract.xlsx_meta import XlsxMeta
+from config.settings import XLSX_READER_BACKEND
+
+try:
+    import python_calamine
+except ImportError:   # 未安装 python-calamine 时只能使用 openpyxl
+    python_calamine = None
+
+_INT_LIMIT = 1e16   # 小于该值的整数值浮点按 int 读出（与 openpyxl 读取 <v>42</v> 的结果一致）
+
+
+class SheetData:
+    """
+    一张工作表的原始内容（坐标与 openpyxl 一致，从1开始）：
+        raw     原始值 行×列（raw[r-1, c-1]；合并区域内非左上角单元格为 None）
+        merged  合并区域 [(起始行, 起始列, 结束行, 结束列)]，含两端
+    """
+
+    def __init__(self, title: str, raw: np.ndarray, merged: List[Tuple[int, int, int, int]]):
+        self.title = title
+        self.raw = raw
+        self.merged = merged
+
+
+# =============== openpyxl ===============
+class _SelectiveReader(ExcelReader):
+    """只解析指定工作表的 openpyxl 读取器"""
+
+    def __init__(self, filename, sheet_names):
+        super().__init__(filename, read_only=False, keep_vba=False, data_only=True, keep_links=False)
+        self.wanted = set(sheet_names)
+
+    def read_worksheets(self):
+        self.parser.sheets = [sheet for sheet in self.parser.sheets if sheet.name in self.wanted]
+        # 工作表级定义名称按原序号绑定，跳过部分工作表后序号不再对应，直接丢弃（取值不需要）
+        self.parser.defined_names = DefinedNameList()
+        super().read_worksheets()
+
+
+def _read_openpyxl(path, names, meta=None) -> Dict[str, SheetData]:
+    reader = _SelectiveReader(path, names)
+    reader.read()
+    sheets = {}
+    for ws in reader.wb.worksheets:
+        raw = np.full((ws.max_row, ws.max_column), None, dtype=object)
+        for (r, c), cell in ws._cells.items():
+            raw[r - 1, c - 1] = cell.value
+        merged = [(rng.min_row, rng.min_col, rng.max_row, rng.max_col) for rng in ws.merged_cells.ranges]
+        sheets[ws.title] = SheetData(ws.title, raw, merged)
+    reader.wb.close()
+    return sheets
+
+
+# =============== calamine ===============
+def _calamine_value(v):
+    """calamine 单元格值 → 与 openpyxl（data_only）一致：空 → None，整数值浮点 → int，日期 → 当天0点的 datetime"""
+    if v == "":
+        return None
+    if type(v) is float:
+        return int(v) if v.is_integer() and abs(v) < _INT_LIMIT else v
+    if type(v) is datetime.date:
+        return datetime.datetime(v.year, v.month, v.day)
+    return v
+
+
+def _read_calamine(path, names, meta: Optional[XlsxMeta] = None) -> Dict[str, SheetData]:
+    """
+    只读取 names 中的工作表；错误值单元格（#DIV/0! 等）calamine 读作空值，按工作表XML中缓存的错误文本补回（与 openpyxl 一致）
+    表的尺寸取数据、合并区域与 <dimension> 记录中最大的一个（与 openpyxl 的 max_row/max_column 一致：只有样式的空单元格也计入）
+    """
+    meta = meta if meta is not None else XlsxMeta(path)
+    wb = python_calamine.CalamineWorkbook.from_path(str(path))
+    sheets = {}
+    try:
+        for name in names:
+            sheet = wb.get_sheet_by_name(name)
+            rows = sheet.to_python(skip_empty_area=False)
+            merged = [(r1 + 1, c1 + 1, r2 + 1, c2 + 1) for (r1, c1), (r2, c2) in sheet.merged_cell_ranges or []]
+            n_rows = max([len(rows), 1] + [m[2] for m in merged])
+            n_cols = max([max((len(row) for row in rows), default=0), 1] + [m[3] for m in merged])
+            size = meta.size(name)
+            if size:
+                n_rows, n_cols = max(n_rows, size[0]), max(n_cols, size[1])
+            raw = np.full((n_rows, n_cols), None, dtype=object)
+            for r, row in enumerate(rows):
+                raw[r, :len(row)] = [_calamine_value(v) for v in row]
+            for (r, c), error in meta.error_cells(name).items():
+                if r <= n_rows and c <= n_cols:
+                    raw[r - 1, c - 1] = error
+            sheets[name] = SheetData(name, raw, merged)
+    finally:
+        wb.close()
+    return sheets
+
+
+_BACKENDS = {"calamine": _read_calamine, "openpyxl": _read_openpyxl}
+
+
+def read_sheets(path, names, meta: Optional[XlsxMeta] = None, backend: str = None) -> Tuple[Dict[str, SheetData], str]:
+    """
+    读取指定工作表 → ({工作表名: SheetData}, 实际使用的后端)
+    backend：calamine（默认，取配置 XLSX_READER_BACKEND）/ openpyxl；calamine 未安装或读取失败时回退到 openpyxl
+    """
+    backend = (backend or XLSX_READER_BACKEND).lower()
+    if backend not in _BACKENDS:
+        raise ValueError(f"未知的xlsx读取后端: {backend}")
+    if backend == "calamine":
+        if python_calamine is None:
+            backend = "openpyxl"
+        else:
+            try:
+                return _read_calamine(path, names, meta), backend
+            except Exception as e:
+                print(f"⚠️ calamine 读取失败，改用 openpyxl: {e}")
+                backend = "openpyxl"
+    return _read_openpyxl(path, names, meta), backend
+
+
+def pandas_engine() -> str:
+    """pd.read_excel 使用的引擎：与 read_sheets 的后端一致（calamine 不可用时为 openpyxl）"""
+    return "calamine" if XLSX_READER_BACKEND.lower() == "calamine" and python_calamine is not None else "openpyxl"
+
+
+# =============== 基准测试 ===============
+def _synthetic_final(path, groups: int, animals: int, days: int, filler_sheets: int):
+    """合成终版数据包：汇总页为 组别×动物 行、测量天列（含合并的表头与组别单元格），另有 filler_sheets 张"分组后第X天"明细页"""
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(str(path))
+    ws = wb.add_worksheet("实验数据汇总")
+    ws.merge_range(0, 0, 0, 1, "实验动物荷瘤体积（mm³）")
+    ws.merge_range(1, 2, 1, days + 1, "分组后天数")
+    ws.write_row(2, 2, [f"D{3 * d}" for d in range(days)])
+    rng = np.random.default_rng(0)
+    row = 3
+    for g in range(1, groups + 1):
+        ws.merge_range(row, 0, row + animals - 1, 0, f"G{g}")
+        for a in range(animals):
+            ws.write(row + a, 1, f"{g}{a + 1:02d}")
+            ws.write_row(row + a, 2, np.round(rng.uniform(50, 2000, days), 2).tolist())
+        row += animals
+        ws.write(row, 1, "均数")
+        ws.write(row + 1, 1, "标准误")
+        ws.write_row(row, 2, np.round(rng.uniform(50, 2000, days), 2).tolist())
+        ws.write_row(row + 1, 2, np.round(rng.uniform(1, 100, days), 2).tolist())
+        row += 3
+    for d in range(filler_sheets):
+        sheet = wb.add_worksheet(f"分组后第{3 * d}天")
+        for r in range(groups * animals):
+            sheet.write_row(r, 0, [f"G{r // animals + 1}", f"{r:03d}", *np.round(rng.uniform(0, 100, 8), 2).tolist()])
+    wb.close()
+
+
+def benchmark(sizes=((8, 10, 20, 10), (12, 15, 40, 30), (20, 20, 80, 60)), repeat: int = 3):
+    """各规模合成终版数据包上，读取汇总页的耗时（秒，取 repeat 次中最短）"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for groups, animals, days, filler in sizes:
+            path = Path(tmp) / f"final_{groups}x{animals}x{days}.xlsx"
+            _synthetic_final(path, groups, animals, days, filler)
+            meta = XlsxMeta(path)
+            timings = {}
+            results = {}
+            for backend in _BACKENDS:
+                if backend == "calamine" and python_calamine is None:
+                    continue
+                best = None
+                for _ in range(repeat):
+                    t = time.perf_counter()
+                    results[backend] = _BACKENDS[backend](path, ["实验数据汇总"], meta)
+                    best = min(best or 1e9, time.perf_counter() - t)
+                timings[backend] = best
+            same = len({repr(r["实验数据汇总"].raw.tolist()) + repr(sorted(r["实验数据汇总"].merged))
+                        for r in results.values()}) == 1
+            cells = results["openpyxl"]["实验数据汇总"].raw.size
+            print(f"{path.name}: {path.stat().st_size / 1024 ** 2:.1f} MB, 汇总页 {cells} 个单元格, "
+                  + ", ".join(f"{b} {s:.3f}s" for b, s in timings.items())
+                  + f", 结果{'一致' if same else '不一致'}")
+
+
+def check_error_cells():
+    """含错误值单元格的工作簿：两个后端读出的原始值与合并区域须完全一致（错误值均为错误文本）"""
+    import tempfile
+    import xlsxwriter
+
+    errors = {(1, 1): "#DIV/0!", (1, 2): "#N/A", (3, 1): "#NAME?", (3, 2): "#NULL!",
+              (3, 3): "#NUM!", (4, 1): "#REF!", (4, 2): "#VALUE!"}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "errors.xlsx"
+        wb = xlsxwriter.Workbook(str(path))
+        ws = wb.add_worksheet("实验数据汇总")
+        for (r, c), error in errors.items():
+            ws.write_formula(r - 1, c - 1, "=1/0", None, error)
+        ws.write(0, 2, 1.5)
+        ws.write_formula(1, 0, "=1+1", None, 2)
+        ws.write(1, 1, "G1")
+        ws.merge_range(4, 0, 4, 2, "合并")
+        wb.close()
+        results = {backend: _BACKENDS[backend](path, ["实验数据汇总"])["实验数据汇总"]
+                   for backend in _BACKENDS if backend != "calamine" or python_calamine is not None}
+    openpyxl_sheet = results["openpyxl"]
+    assert all(openpyxl_sheet.raw[r - 1, c - 1] == error for (r, c), error in errors.items()), openpyxl_sheet.raw
+    for backend, sheet in results.items():
+        assert sheet.raw.tolist() == openpyxl_sheet.raw.tolist(), (backend, sheet.raw, openpyxl_sheet.raw)
+        assert sorted(sheet.merged) == sorted(openpyxl_sheet.merged), (backend, sheet.merged)
+    print(f"错误值单元格: {', '.join(results)} 读取结果一致")
+
+
+if __name__ == "__main__":
+    check_error_cells()
+    benchmark()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""报告上下文：各阶段在内存中传递数据（明细字段、给药方案、受试品、表格、GraphPad数据），最后一次性写出明细Excel"""
+import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.project_report.tumor.english.Excel_extract.xlsx_reader import pandas_engine
+
+DETAIL_SHEET = "明细"
+FORM_SHEETS = ["form_7_1", "form_7_2", "form_7_3"]
+GRAPHPAD_SHEET = "GraphPad使用"
+STATS_SHEET = "统计检验"
+VERIFY_SHEET = "数据核对"
+
+
+def excel_value(v) -> Any:
+    """与"写入Excel再用pd.read_excel读回"的结果保持一致：空值→""，整数值的浮点→int"""
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        if np.isnan(v):
+            return ""
+        if v.is_integer():
+            return int(v)
+        return v
+    try:
+        if pd.isna(v):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return v
+
+
+def _text_value(v):
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return np.nan
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def text_frame(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """等价于 pd.read_excel(..., dtype=str) 读回的表：值转为字符串，空值保持NaN"""
+    if df is None:
+        return pd.DataFrame()
+    out = df.copy()
+    for col in out.columns:
+        out[col] = out[col].map(_text_value).astype(object)
+    return out
+
+
+def _text_len(v) -> int:
+    return len(str(v)) if v is not None and not (isinstance(v, float) and np.isnan(v)) else 0
+
+
+# 与 DataFrame.to_excel（xlsxwriter）一致的日期格式
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+DATE_FORMAT = "YYYY-MM-DD"
+
+
+class SheetWriter:
+    """
+    整表写出：按列类型直接调用 xlsxwriter（数值列 write_number、日期列 write_datetime），
+    跳过 to_excel 逐单元格构造样式对象的开销；写出结果与 pandas 2.x 的 to_excel(index=False) 相同
+    （表头同样为 加粗 + 细边框 + 水平居中 + 顶端对齐；pandas 3 起 to_excel 不再设置表头样式，此处保持原有外观）
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.book = writer.book
+        self.datetime = self.book.add_format({"num_format": DATETIME_FORMAT})
+        self.date = self.book.add_format({"num_format": DATE_FORMAT})
+        self.header = self.book.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+
+    def sheet(self, name: str):
+        ws = self.book.add_worksheet(name)
+        self.writer.sheets[name] = ws
+        return ws
+
+    def frame(self, sheet_name: str, df: pd.DataFrame):
+        """写出一张表（首行为列名），返回工作表"""
+        ws = self.sheet(sheet_name)
+        ws.write_row(0, 0, [self.header_text(name) for name in df.columns], self.header)
+        for c, name in enumerate(df.columns):
+            col = df.iloc[:, c]
+            if pd.api.types.is_bool_dtype(col.dtype):
+                for r, v in enumerate(col.tolist(), 1):
+                    ws.write_boolean(r, c, v)
+            elif pd.api.types.is_numeric_dtype(col.dtype):
+                values = col.to_numpy(dtype=float, na_value=np.nan)
+                for r in np.flatnonzero(~np.isnan(values)):
+                    ws.write_number(int(r) + 1, c, float(values[r]))
+            else:
+                for r, v in enumerate(col.tolist(), 1):
+                    self.cell(ws, r, c, v)
+        return ws
+
+    @staticmethod
+    def header_text(name):
+        return name.item() if isinstance(name, np.generic) else name
+
+    def cell(self, ws, r: int, c: int, v):
+        if v is None or v is pd.NaT or (isinstance(v, float) and np.isnan(v)):
+            return
+        if isinstance(v, datetime.datetime):
+            ws.write_datetime(r, c, v.to_pydatetime() if isinstance(v, pd.Timestamp) else v, self.datetime)
+        elif isinstance(v, datetime.date):
+            ws.write_datetime(r, c, v, self.date)
+        elif isinstance(v, np.generic):
+            ws.write(r, c, v.item())
+        else:
+            ws.write(r, c, v)
+
+
+class ReportContext:
+    """一次报告生成的全部中间数据"""
+
+    def __init__(self, project_code: str = "", experiment_code: Optional[str] = None):
+        self.project_code = project_code
+        self.experiment_code = experiment_code
+        self.sql_digest: Optional[str] = None                # 三个SQL结果集的摘要（结果缓存用）
+        self.all_data = pd.DataFrame()                       # 全部数据（项目信息SQL原始结果）
+        self.detail: Dict[str, str] = {}                     # 明细：字段名 → 字段值
+        self.export_info = pd.DataFrame()                    # 导出信息
+        self.dose = pd.DataFrame()                           # 给药方案
+        self.products = pd.DataFrame()                       # 受试品信息（按名称聚合）
+        self.products_raw: Optional[pd.DataFrame] = None     # 受试品明细（原始），需要时才写出
+        self.forms: Dict[str, pd.DataFrame] = {}             # form_7_1 / form_7_2 / form_7_3
+        self.graphpad: Dict[str, Dict[str, List[float]]] = {}  # GraphPad标题 → {组别: 原始值}
+        self.detail_widths = None                            # 明细页 A/B 列宽，None 时按内容自适应
+        self.stats_requests: Dict[str, Dict[str, Any]] = {}  # 待批量计算的Dunnett数据集：名称 → {rows, control, on_result}
+        self.stats: Dict[str, List[Dict[str, Any]]] = {}     # 无回调数据集（如各测量天）的Dunnett结果：名称 → 结果行
+        self.day_tables: Dict[int, "ReportContext"] = {}     # 各可选结束天的表格与汇总字段：结束天 → 该天的上下文
+        self.verification: List[Dict[str, Any]] = []         # 数据核对：统计行与个体值重算结果不一致处
+
+    # ---------- 明细字段 ----------
+    def get_detail(self, name: str, default: str = "") -> str:
+        return self.detail.get(name, default)
+
+    def set_detail(self, name: str, value) -> None:
+        """更新或追加明细字段"""
+        self.detail[str(name).strip()] = "" if value is None else str(value)
+
+    def detail_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"字段名": list(self.detail.keys()), "字段值": list(self.detail.values())})
+
+    # ---------- 表格 ----------
+    def set_form(self, name: str, df: pd.DataFrame, graphpad_title: str = None, per_group_values=None) -> None:
+        """保存一张输出表及其GraphPad原始数据"""
+        self.forms[name] = df
+        if graphpad_title and per_group_values:
+            self.graphpad[graphpad_title] = per_group_values
+
+    def request_stats(self, name: str, rows: List[Dict[str, Any]], control: str = "G1", on_result=None) -> None:
+        """登记一个Dunnett数据集（长表行），由统计检验步骤统一批量计算；on_result(结果或None) 用于回填表格"""
+        self.stats_requests[name] = {"rows": rows, "control": control, "on_result": on_result}
+
+    def rows(self, name: str) -> List[Dict[str, Any]]:
+        """按Word模板需要的行记录返回表数据（列名去空格、空值为""）"""
+        sheets = {"给药方案": self.dose, "受试品信息": self.products}
+        df = sheets.get(name, self.forms.get(name))
+        if df is None or df.empty:
+            return []
+        return [{str(k).strip(): excel_value(v) for k, v in rec.items()} for rec in df.to_dict(orient="records")]
+
+    # ---------- 写出 ----------
+    def save(self, excel_path) -> Path:
+        """一次性写出明细Excel（全部数据/明细/导出信息/给药方案/受试品信息/form_7_x/GraphPad使用）"""
+        excel_path = Path(excel_path)
+        excel_path.parent.mkdir(parents=True, exist_ok=True)
+        with pd.ExcelWriter(excel_path, engine="xlsxwriter") as excel_writer:
+            writer = SheetWriter(excel_writer)
+            self._write_table(writer, "全部数据", self.all_data)
+            detail = self.detail_frame()
+            ws = self._write_table(writer, DETAIL_SHEET, detail)
+            if self.detail_widths:
+                ws.set_column(0, 0, self.detail_widths[0])
+                ws.set_column(1, 1, self.detail_widths[1])
+            self._write_table(writer, "导出信息", self.export_info)
+            self._write_table(writer, "给药方案", self.dose)
+            if self.products_raw is not None:
+                self._write_table(writer, "受试品明细（原始）", self.products_raw)
+            self._write_table(writer, "受试品信息", self.products)
+            for name in FORM_SHEETS + sorted(set(self.forms) - set(FORM_SHEETS)):   # table_specs 中新增的表排在后面
+                if name in self.forms:
+                    self._write_form(writer, name, self.forms[name])
+            if self.graphpad:
+                self._write_graphpad(writer)
+            if self.stats:
+                self._write_table(writer, STATS_SHEET, self.stats_frame())
+            if self.verification:
+                self._write_table(writer, VERIFY_SHEET, pd.DataFrame(self.verification))
+        return excel_path
+
+    @staticmethod
+    def _write_table(writer, sheet_name: str, df: pd.DataFrame, max_rows: int = 20,
+                     min_width: int = 8, max_width: int = 20):
+        """写出SQL类工作表：冻结首行，按前 max_rows 行内容自适应列宽"""
+        df = df if df is not None else pd.DataFrame()
+        ws = writer.frame(sheet_name, df)
+        ws.freeze_panes(1, 0)
+        for i, col in enumerate(df.columns):
+            values = df.iloc[:max_rows, i].astype(str).values
+            max_len = max([len(str(col))] + [len(str(x)) for x in values])
+            ws.set_column(i, i, max(min_width, min(max_len + 8, max_width)))
+        return ws
+
+    @staticmethod
+    def _write_form(writer, sheet_name: str, df: pd.DataFrame):
+        """写出 form_7_x 表：列宽 = 最长内容 + 6（上限50）"""
+        ws = writer.frame(sheet_name, df)
+        for i, col in enumerate(df.columns):
+            max_len = max([len(str(col))] + [_text_len(v) for v in df[col].tolist()])
+            ws.set_column(i, i, min(max_len + 6, 50))
+
+    def stats_frame(self) -> pd.DataFrame:
+        """各数据集的Dunnett结果合并为一张表"""
+        records = [{"数据集": name, **row} for name, rows in self.stats.items() for row in rows]
+        return pd.DataFrame(records, columns=["数据集", "group", "Summary", "P-Value"])
+
+    def _write_graphpad(self, writer):
+        """写出GraphPad使用页：每块为 标题行 + 组别表头 + 各组按列的原始值，块间空一行"""
+        ws = writer.sheet(GRAPHPAD_SHEET)
+        widths: Dict[int, int] = {}
+
+        def widen(c, values):
+            lengths = [len(str(v)) for v in values if v not in (None, "") and str(v).strip()]
+            if lengths:
+                widths[c] = max(widths.get(c, 0), *lengths)
+
+        row = 0
+        for title in sorted(self.graphpad):
+            per_group_values = self.graphpad[title]
+            ws.write(row, 0, title)
+            widen(0, [title])
+            for c, group_name in enumerate(per_group_values):
+                values = per_group_values[group_name]
+                ws.write(row + 1, c, group_name)
+                ws.write_column(row + 2, c, values)
+                widen(c, [group_name, *values])
+            depth = max((len(v) for v in per_group_values.values()), default=0)
+            row += depth + 3
+        for c, max_len in widths.items():
+            ws.set_column(c, c, min(max_len + 3, 30))
+
+    # ---------- 读回（调试/单独运行各阶段时使用） ----------
+    @classmethod
+    def load(cls, excel_path, project_code: str = "") -> "ReportContext":
+        """从已有的明细Excel恢复上下文（GraphPad使用页不恢复，由各表格阶段重新生成）"""
+        ctx = cls(project_code)
+        sheets = pd.read_excel(excel_path, sheet_name=None, engine=pandas_engine())
+        ctx.all_data = sheets.get("全部数据", pd.DataFrame())
+        ctx.export_info = sheets.get("导出信息", pd.DataFrame())
+        ctx.dose = sheets.get("给药方案", pd.DataFrame())
+        ctx.products = sheets.get("受试品信息", pd.DataFrame())
+        ctx.products_raw = sheets.get("受试品明细（原始）")
+        ctx.forms = {name: df for name, df in sheets.items() if name in FORM_SHEETS or name.startswith("form_")}
+        detail = text_frame(sheets.get(DETAIL_SHEET, pd.DataFrame(columns=["字段名", "字段值"])))
+        for _, row in detail.iterrows():
+            if isinstance(row["字段名"], str):
+                ctx.set_detail(row["字段名"], "" if pd.isna(row["字段值"]) else row["字段值"])
+        if "实验编号" in ctx.detail:
+            ctx.experiment_code = ctx.detail["实验编号"]
+        return ctx
@@ -1,9 +1,10 @@
 from pathlib import Path
 import os
-import pandas as pd
 from jinja2 import Environment as JinjaEnv, Undefined
 from docxtpl import DocxTemplate
 from .reloading import process_image_data
+from .context import ReportContext
+from app.utils.Log.trace import stage
 
 try:
     from jinja2.sandbox import SandboxedEnvironment as JinjaSandboxEnv
@@ -18,38 +19,16 @@ def _build_jinja_env(sandbox=False):
     Env = JinjaSandboxEnv if sandbox and JinjaSandboxEnv else JinjaEnv
     return Env(undefined=KeepUndefined, autoescape=True)
 
-def load_context_from_excel(excel_path, sheet_name="明细", key_col="字段名", val_col="字段值"):
-    df = pd.read_excel(excel_path, sheet_name=sheet_name)
-    if key_col not in df.columns or val_col not in df.columns:
-        raise ValueError(f"Excel 需要包含列：{key_col} / {val_col}")
+def fill_word_template(ctx, template_path, output_path, experiment_id=None, photo_dir=None):
+    # 基础数据（明细字段）
+    context = dict(ctx.detail)
     
-    context = {}
-    for _, row in df.iterrows():
-        key = str(row[key_col]).strip()
-        val = row[val_col]
-        context[key] = "" if pd.isna(val) else val
-    return context
-
-def _load_rows_from_excel(excel_path, sheet_name):
-    try:
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-        if df.empty:
-            return []
-        df.columns = [str(c).strip() for c in df.columns]
-        return df.fillna("").to_dict(orient="records")
-    except ValueError:
-        return []
-
-def fill_word_template(excel_path, template_path, output_path, experiment_id=None, photo_dir=None):
-    # 加载基础数据
-    context = load_context_from_excel(excel_path)
-    
-    # 加载额外工作表
-    context["dose_rows"] = _load_rows_from_excel(excel_path, "给药方案")
-    context["products"] = _load_rows_from_excel(excel_path, "受试品信息")
-    context["form_7_1"] = _load_rows_from_excel(excel_path, "form_7_1")
-    context["form_7_2"] = _load_rows_from_excel(excel_path, "form_7_2")
-    context["form_7_3"] = _load_rows_from_excel(excel_path, "form_7_3")
+    # 表格数据
+    context["dose_rows"] = ctx.rows("给药方案")
+    context["products"] = ctx.rows("受试品信息")
+    context["form_7_1"] = ctx.rows("form_7_1")
+    context["form_7_2"] = ctx.rows("form_7_2")
+    context["form_7_3"] = ctx.rows("form_7_3")
     
     # 添加实验编号
     if experiment_id:
@@ -61,29 +40,34 @@ def fill_word_template(excel_path, template_path, output_path, experiment_id=Non
     if experiment_id and photo_dir:
         # 处理所有类型的图片
         image_types = ["mouse", "tumor", "anatomy", "organ"]
-        for folder in image_types:
-            context[folder] = process_image_data(os.path.join(photo_dir, experiment_id, folder), doc)
+        with stage("图片加载") as st:
+            for folder in image_types:
+                context[folder] = process_image_data(os.path.join(photo_dir, experiment_id, folder), doc)
+            st.set(groups=sum(len(context[folder] or []) for folder in image_types))
     
     # 渲染模板
-    jenv = _build_jinja_env(sandbox=True)
-    try:
-        doc.render(context, jinja_env=jenv)
-    except TypeError:
-        import docxtpl.template as tpl
-        tpl.Environment = lambda *a, **k: _build_jinja_env(sandbox=False)
-        if JinjaSandboxEnv:
-            tpl.SandboxedEnvironment = lambda *a, **k: _build_jinja_env(sandbox=True)
-        doc.render(context)
+    with stage("Word渲染", rows=sum(len(context[k]) for k in ("dose_rows", "products", "form_7_1", "form_7_2", "form_7_3"))):
+        jenv = _build_jinja_env(sandbox=True)
+        try:
+            doc.render(context, jinja_env=jenv)
+        except TypeError:
+            import docxtpl.template as tpl
+            tpl.Environment = lambda *a, **k: _build_jinja_env(sandbox=False)
+            if JinjaSandboxEnv:
+                tpl.SandboxedEnvironment = lambda *a, **k: _build_jinja_env(sandbox=True)
+            doc.render(context)
     
     # 保存文件
     output_path = Path(output_path)
-    doc.save(output_path)
+    with stage("Word保存") as st:
+        doc.save(output_path)
+        st.set(bytes=output_path.stat().st_size)
     print(f"✅ Word 模板替换完成")
     return output_path
 
 if __name__ == "__main__":
     fill_word_template(
-        excel_path="D:/TianBa_AI/Code/docs/temp/project_report/25P080002_明细.xlsx",
+        ReportContext.load("D:/TianBa_AI/Code/docs/temp/project_report/25P080002_明细.xlsx"),
         template_path="D:/TianBa_AI/Code/docs/templates/project_report/Mode2.docx",
         output_path="D:/TianBa_AI/Code/docs/output/project_report/25P080002_项目报告.docx",
         experiment_id="25P080002",
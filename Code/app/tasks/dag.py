@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""依赖图执行器：节点在其依赖全部完成后提交到线程池，互不依赖的节点并发执行"""
+import sys
+import contextvars
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+
+from config.settings import REPORT_DAG_WORKERS
+
+
+class _Node:
+    def __init__(self, name: str, func: Callable, args, kwargs, deps):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.deps = list(deps)
+
+
+class TaskGraph:
+    """
+    用法：
+        dag = TaskGraph()
+        dag.add("a", func_a)
+        dag.add("b", func_b, x, deps=["a"])
+        results = dag.run(progress)   # {节点名: 返回值}
+    任一节点抛出异常时不再提交新节点，等待已在执行的节点结束后抛出该异常
+    """
+
+    def __init__(self, max_workers: int = REPORT_DAG_WORKERS, name: str = "dag"):
+        self.max_workers = max_workers
+        self.name = name
+        self._nodes: Dict[str, _Node] = {}
+
+    def add(self, name: str, func: Callable, *args, deps: Iterable[str] = (), **kwargs) -> str:
+        """添加节点；deps 中的节点须已添加（保证无环）"""
+        if name in self._nodes:
+            raise ValueError(f"重复的节点: {name}")
+        missing = [d for d in deps if d not in self._nodes]
+        if missing:
+            raise ValueError(f"节点 {name} 的依赖不存在: {missing}")
+        self._nodes[name] = _Node(name, func, args, kwargs, deps)
+        return name
+
+    def run(self, progress: Optional[Callable] = None) -> Dict[str, Any]:
+        """执行全部节点；progress(name, parallel=True) 在节点开始时调用，progress(name, done=True) 在节点结束时调用"""
+        results: Dict[str, Any] = {}
+        pending = dict(self._nodes)
+        running = {}
+        error: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as executor:
+            while pending or running:
+                # 提交依赖已满足的节点（出错后不再提交）
+                if error is None:
+                    for name in [n for n, node in pending.items() if all(d in results for d in node.deps)]:
+                        node = pending.pop(name)
+                        try:
+                            if progress: progress(name, parallel=True)
+                        except BaseException as e:  # 任务取消等
+                            error = e
+                            break
+                        # 复制当前上下文提交，阶段记录（trace）等 contextvars 在工作线程中同样可见
+                        ctx = contextvars.copy_context()
+                        running[executor.submit(ctx.run, node.func, *node.args, **node.kwargs)] = name
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException as e:
+                        if error is None:
+                            error = e
+                    if progress: progress(name, done=True)
+
+        if error is not None:
+            raise error
+        return results
+
+
+def nested_progress(progress: Optional[Callable], parent: str) -> Optional[Callable]:
+    """
+    子流程（节点内部再执行的依赖图等）的进度回调：步骤名加上父节点前缀（"处理终版数据/生成表格"）
+    子步骤一律按并行步骤上报，不会结束父图中与之并行的其他节点（如"下载图片"）；非并行的子步骤只结束同一子流程中的上一个非并行子步骤
+    """
+    if progress is None:
+        return None
+    current = []   # 进行中的非并行子步骤
+
+    def step(name: str, parallel: bool = False, done: bool = False):
+        full = f"{parent}/{name}"
+        if done:
+            progress(full, done=True)
+            return
+        if not parallel and current:
+            progress(current.pop(), done=True)
+        progress(full, parallel=True)
+        if not parallel:
+            current.append(full)
+    return step
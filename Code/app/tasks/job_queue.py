@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""后台任务队列：用有界线程池执行耗时的报告生成，提供任务ID、进度与结果查询"""
+import sys
+import time
+import uuid
+import threading
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+
+from config.settings import REPORT_JOB_WORKERS, REPORT_JOB_TTL
+from app.utils.Log.trace import Trace, tracing
+
+# 任务状态
+PENDING = "pending"        # 排队中
+RUNNING = "running"        # 执行中
+SUCCESS = "success"        # 已完成
+FAILED = "failed"          # 失败
+CANCELLED = "cancelled"    # 已取消
+FINISHED_STATES = (SUCCESS, FAILED, CANCELLED)
+
+
+class JobCancelled(BaseException):
+    """任务被取消时在步骤边界抛出；继承BaseException，避免被业务代码的 except Exception 吞掉"""
+
+
+def _fmt_time(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+
+class Job:
+    """单个后台任务的状态记录"""
+
+    def __init__(self, name: str, meta: Optional[Dict[str, Any]] = None, key: Optional[Hashable] = None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.key = key
+        self.meta = meta or {}
+        self.state = PENDING
+        self.steps = []            # [{"name", "status", "start", "end"}]
+        self.trace: Optional[Trace] = None   # 各阶段耗时/行数/字节数/错误
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.future = None
+        self._lock = threading.Lock()
+
+    def step(self, name: str, parallel: bool = False, done: bool = False):
+        """
+        进度回调：默认结束进行中的步骤并开始新步骤；若已请求取消则中止任务
+        parallel=True 时新步骤与进行中的步骤并行（依赖图中的并发节点），done=True 时只结束指定步骤
+        """
+        now = time.time()
+        if done:
+            with self._lock:
+                self._close_step("done", now, name)
+            return
+        if self.cancel_requested:
+            raise JobCancelled(name)
+        with self._lock:
+            if not parallel:
+                self._close_step("done", now)
+            self.steps.append({"name": name, "status": "running", "start": now, "end": None})
+
+    def _close_step(self, status: str, now: float, name: Optional[str] = None):
+        """结束进行中的步骤（指定 name 时只结束该步骤）"""
+        for s in self.steps:
+            if s["status"] == "running" and (name is None or s["name"] == name):
+                s.update(status=status, end=now)
+
+    def _finish(self, state: str, result=None, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._close_step("done" if state == SUCCESS else state, now)
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished_at = now
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为API响应"""
+        with self._lock:
+            steps = [{
+                "name": s["name"],
+                "status": s["status"],
+                "duration": round((s["end"] or time.time()) - s["start"], 2),
+            } for s in self.steps]
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "steps": steps,
+            "result": self.result,
+            "error": self.error,
+            "trace": self.trace.to_dict() if self.trace else None,
+            "meta": self.meta,
+            "created_at": _fmt_time(self.created_at),
+            "started_at": _fmt_time(self.started_at),
+            "finished_at": _fmt_time(self.finished_at),
+        }
+
+
+class JobQueue:
+    """
+    有界线程池任务队列；任务函数需接收 progress 关键字参数用于上报步骤
+    每个任务在独立的trace中执行，api_type 不为空时任务结束后写入 {api_type}_{年-月}.log
+    """
+
+    def __init__(self, max_workers: int = 2, ttl: int = 24 * 3600, name: str = "job", api_type: Optional[str] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._api_type = api_type
+
+    def submit(self, name: str, func: Callable, *args, meta: Optional[Dict[str, Any]] = None,
+               key: Optional[Hashable] = None, **kwargs) -> Job:
+        """提交任务，立即返回Job（状态为排队中）；若同key任务尚未结束，直接返回该任务以共享结果"""
+        self._purge()
+        with self._lock:
+            if key is not None:
+                for running in self._jobs.values():
+                    if running.key == key and running.state not in FINISHED_STATES and not running.cancel_requested:
+                        return running
+            job = Job(name, meta, key)
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """取消任务：排队中的直接取消，执行中的在下一个步骤边界中止，已结束的移除记录"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job.state in FINISHED_STATES:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            return job
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            job._finish(CANCELLED, error="任务已取消")
+        return job
+
+    def _run(self, job: Job, func: Callable, args, kwargs):
+        if job.cancel_requested:
+            job._finish(CANCELLED, error="任务已取消")
+            return
+        job.state = RUNNING
+        job.started_at = time.time()
+        with tracing(job.name, api_type=self._api_type, job_id=job.id) as job.trace:
+            try:
+                result = func(*args, progress=job.step, **kwargs)
+                job._finish(SUCCESS, result=result)
+            except JobCancelled:
+                job._finish(CANCELLED, error="任务已取消")
+            except Exception as e:
+                job._finish(FAILED, error=str(e))
+            job.trace.meta.update(state=job.state, error=job.error)
+
+    def _purge(self):
+        """清理超过保留时间的已结束任务"""
+        expire = time.time() - self._ttl
+        with self._lock:
+            for job_id in [k for k, j in self._jobs.items()
+                           if j.state in FINISHED_STATES and (j.finished_at or 0) < expire]:
+                del self._jobs[job_id]
+
+
+# 项目报告任务队列（全局实例）
+report_jobs = JobQueue(max_workers=REPORT_JOB_WORKERS, ttl=REPORT_JOB_TTL, name="report-job", api_type="project-report")
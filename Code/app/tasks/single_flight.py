@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""请求合并（single-flight）：同一key的并发生成只执行一次，其余调用等待并共享结果。
+进程内用事件等待；多进程（多个uvicorn worker）之间用锁文件互斥，并通过结果标记文件共享结果。"""
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path: sys.path.insert(0, str(project_root))
+
+from config.settings import LOCK_DIR, LOCK_WAIT_TIMEOUT, LOCK_STALE_AFTER
+
+
+class FileLock:
+    """基于 O_CREAT|O_EXCL 的跨进程锁文件（Windows/Linux通用）；超过 stale_after 秒的锁视为残留并清除"""
+
+    def __init__(self, path: Path, timeout: float = 3600, stale_after: float = 7200, poll: float = 0.5):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.poll = poll
+        self.waited = False  # 是否曾等待其它进程释放锁
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                fd = os.open(str(self.path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(fd, "w") as f:
+                    f.write(f"{os.getpid()} {time.time()}")
+                return self
+            except FileExistsError:
+                self.waited = True
+                try:
+                    if time.time() - self.path.stat().st_mtime > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"等待锁超时: {self.path.name}")
+                time.sleep(self.poll)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _Call:
+    """进程内一次进行中的调用"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.aborted = False  # 领头调用被中止（如任务取消 JobCancelled），等待者需自行重新执行
+
+
+class SingleFlight:
+    """按key合并并发调用；lock_name 相同的调用（如同一项目的不同结束天）互斥执行，避免写同一临时文件"""
+
+    def __init__(self, lock_dir: Path, wait_timeout: float = 3600, stale_after: float = 7200):
+        self.lock_dir = Path(lock_dir)
+        self.wait_timeout = wait_timeout
+        self.stale_after = stale_after
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, lock_name: Optional[str] = None, **kwargs) -> Any:
+        """
+        执行 func(*args, **kwargs)；若同key调用正在进行，则等待并返回其结果
+        只共享结果与普通异常；领头调用因 BaseException（如所属任务被取消）中止时，等待者改为自己执行
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if leader:
+                break
+            print(f"➡️ 相同请求正在生成，等待共享结果: {key}")
+            call.event.wait()
+            if call.aborted:
+                print(f"➡️ 共享的生成已中止，重新执行: {key}")
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_locked(key, func, args, kwargs, lock_name)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.aborted = True
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def lock(self, lock_name: str) -> FileLock:
+        """与 do(..., lock_name=lock_name) 相同的跨进程锁，供不经请求合并、但需与之互斥的操作使用（不可重入）"""
+        return FileLock(self.lock_dir / f"{lock_name}.lock", self.wait_timeout, self.stale_after)
+
+    def _run_locked(self, key, func, args, kwargs, lock_name):
+        token = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        done_path = self.lock_dir / f"{token}.done.json"
+        requested_at = time.time()
+
+        with self.lock(lock_name or token) as lock:
+            # 等锁期间其它进程已完成同key的生成，直接复用其结果
+            if lock.waited:
+                shared = self._read_done(done_path, requested_at)
+                if shared is not None:
+                    print(f"➡️ 复用其它进程的生成结果: {key}")
+                    return shared["result"]
+            result = func(*args, **kwargs)
+            self._write_done(done_path, result)
+            return result
+
+    @staticmethod
+    def _read_done(done_path: Path, since: float) -> Optional[Dict[str, Any]]:
+        try:
+            with open(done_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if data.get("finished_at", 0) >= since else None
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_done(done_path: Path, result):
+        try:
+            with open(done_path, "w", encoding="utf-8") as f:
+                json.dump({"finished_at": time.time(), "result": result}, f, ensure_ascii=False, default=str)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ 写入结果标记失败: {e}")
+
+
+# 项目报告/项目方案的请求合并实例（全局）
+report_flight = SingleFlight(Path(LOCK_DIR) / "project_report", LOCK_WAIT_TIMEOUT, LOCK_STALE_AFTER)
+plan_flight = SingleFlight(Path(LOCK_DIR) / "project_plan", LOCK_WAIT_TIMEOUT, LOCK_STALE_AFTER)
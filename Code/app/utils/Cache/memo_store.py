@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""持久化的小结果缓存（SQLite）：按键保存JSON值，跨进程共享；按最近访问时间（LRU）淘汰"""
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+class MemoStore:
+    """
+    用法：
+        memo = MemoStore(path, max_entries=20000)
+        memo.get_many([key1, key2])   # {命中的键: 值}
+        memo.put_many({key: value})
+    读写失败（如文件被锁、磁盘不可写）时静默降级为未命中，不影响调用方
+    """
+
+    def __init__(self, path, max_entries: int = 20000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        if not self._ready:
+            conn.execute("CREATE TABLE IF NOT EXISTS memo ("
+                         "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL, last_access REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS memo_last_access ON memo(last_access)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """返回命中的 {键: 值}，并刷新访问时间"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    for i in range(0, len(keys), 500):
+                        chunk = keys[i:i + 500]
+                        marks = ",".join("?" * len(chunk))
+                        for key, value in conn.execute(f"SELECT key, value FROM memo WHERE key IN ({marks})", chunk):
+                            found[key] = json.loads(value)
+                    if found:
+                        conn.executemany("UPDATE memo SET last_access = ? WHERE key = ?",
+                                         [(time.time(), k) for k in found])
+                        conn.commit()
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"⚠️ 读取结果缓存失败: {e}")
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        """写入多个值，超过条数上限时淘汰最久未访问的条目"""
+        if not items:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.executemany("INSERT OR REPLACE INTO memo (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                                     [(k, json.dumps(v, ensure_ascii=False), now, now) for k, v in items.items()])
+                    conn.execute("DELETE FROM memo WHERE key IN (SELECT key FROM memo ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                                 (self.max_entries,))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError, TypeError) as e:
+            print(f"⚠️ 写入结果缓存失败: {e}")
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many({key: value})
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM memo")
+                    conn.commit()
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ 清空结果缓存失败: {e}")
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""SQL查询结果缓存（SQLite）：按键保存DataFrame，每条有各自的有效期，跨进程共享（项目方案与项目报告API共用）；按最近访问时间（LRU）与总大小淘汰"""
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+
+class QueryCache:
+    """
+    用法：
+        cache = QueryCache(path, max_entries=2000, max_bytes=256 * 1024 ** 2)
+        cache.get(key)                            # DataFrame；未命中或已过期返回 None
+        cache.put(key, df, ttl=1800, tag="25P1186")
+        cache.invalidate("25P1186")               # 清除某项目（tag）的全部条目，不传则全部清除；返回清除条数
+    读写失败（如文件被锁、磁盘不可写）时静默降级为未命中，不影响调用方
+    """
+
+    def __init__(self, path, max_entries: int = 2000, max_bytes: int = 256 * 1024 ** 2):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        if not self._ready:
+            conn.execute("CREATE TABLE IF NOT EXISTS query ("
+                         "key TEXT PRIMARY KEY, value BLOB NOT NULL, tag TEXT, bytes INTEGER, "
+                         "created_at REAL, expires_at REAL, last_access REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS query_tag ON query(tag)")
+            conn.execute("CREATE INDEX IF NOT EXISTS query_last_access ON query(last_access)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """返回未过期的结果并刷新访问时间；已过期的条目顺带删除"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute("SELECT value, expires_at FROM query WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        return None
+                    now = time.time()
+                    if row[1] <= now:
+                        conn.execute("DELETE FROM query WHERE key = ?", (key,))
+                        conn.commit()
+                        return None
+                    conn.execute("UPDATE query SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                finally:
+                    conn.close()
+            return pickle.loads(row[0])
+        except (sqlite3.Error, OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"⚠️ 读取查询缓存失败: {e}")
+            return None
+
+    def put(self, key: str, df: pd.DataFrame, ttl: float, tag: Optional[str] = None) -> None:
+        """写入结果（ttl 秒后过期），并淘汰过期条目、超过条数或总大小上限的最久未访问条目"""
+        value = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("INSERT OR REPLACE INTO query (key, value, tag, bytes, created_at, expires_at, last_access) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, value, tag, len(value), now, now + ttl, now))
+                    conn.execute("DELETE FROM query WHERE expires_at <= ?", (now,))
+                    conn.execute("DELETE FROM query WHERE key IN (SELECT key FROM query ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                                 (self.max_entries,))
+                    conn.execute("DELETE FROM query WHERE key IN (SELECT key FROM ("
+                                 "SELECT key, SUM(bytes) OVER (ORDER BY last_access DESC, key) AS total FROM query"
+                                 ") WHERE total > ?)", (self.max_bytes,))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ 写入查询缓存失败: {e}")
+
+    def invalidate(self, tag: Optional[str] = None) -> int:
+        """清除 tag 的全部条目（tag 为 None 时全部清除），返回清除条数"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    if tag is None:
+                        removed = conn.execute("DELETE FROM query").rowcount
+                    else:
+                        removed = conn.execute("DELETE FROM query WHERE tag = ?", (tag,)).rowcount
+                    conn.commit()
+                finally:
+                    conn.close()
+            return removed
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ 清除查询缓存失败: {e}")
+            return 0
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""生成结果缓存：按输入指纹保存已生成的文件，指纹一致时直接复用；按最近访问时间（LRU）与总大小淘汰"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+META_FILE = "meta.json"
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """计算文件内容的sha256"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def frame_digest(*frames: pd.DataFrame) -> str:
+    """计算若干DataFrame（列名+内容）的sha256，用于判断SQL结果是否变化"""
+    h = hashlib.sha256()
+    for df in frames:
+        if df is None:
+            h.update(b"<none>")
+            continue
+        h.update(df.to_csv(index=False).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def fingerprint(parts: Dict[str, Any]) -> str:
+    """将各输入部分规范化为JSON后计算指纹"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """基于目录的结果缓存：root/<指纹>/ 下存放文件与 meta.json"""
+
+    def __init__(self, root, max_entries: int = 200, max_bytes: int = 2 * 1024 ** 3):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """命中时返回 {"files": {名称: 路径}, "meta": {...}}，并刷新访问时间；未命中返回None"""
+        entry = self.root / key
+        meta_path = entry / META_FILE
+        with self._lock:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return None
+            files = {name: entry / fname for name, fname in data.get("files", {}).items()}
+            if not all(p.exists() for p in files.values()):
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+            data["last_access"] = time.time()
+            self._write_meta(meta_path, data)
+        return {"files": {name: str(p) for name, p in files.items()}, "meta": data.get("meta", {})}
+
+    def put(self, key: str, files: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """复制文件进缓存；files 为 {名称: 源路径}，空路径的条目会被跳过"""
+        files = {name: Path(p) for name, p in files.items() if p}
+        entry = self.root / key
+        tmp = self.root / f"{key}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            names = {}
+            for name, src in files.items():
+                shutil.copy2(src, tmp / src.name)
+                names[name] = src.name
+            now = time.time()
+            self._write_meta(tmp / META_FILE, {
+                "files": names,
+                "meta": meta or {},
+                "created_at": now,
+                "last_access": now,
+                "size": sum((tmp / n).stat().st_size for n in names.values()),
+            })
+            with self._lock:
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+        except OSError as e:
+            print(f"⚠️ 写入结果缓存失败: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return None
+        self.evict()
+        return self.get(key)
+
+    def evict(self):
+        """按最近访问时间淘汰，直到条目数与总大小都在上限内"""
+        with self._lock:
+            entries = []
+            for entry in self.root.iterdir() if self.root.exists() else []:
+                meta_path = entry / META_FILE
+                if not meta_path.is_file():
+                    continue
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    shutil.rmtree(entry, ignore_errors=True)
+                    continue
+                entries.append((data.get("last_access", 0), data.get("size", 0), entry))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                _, size, entry = entries.pop(0)
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    @staticmethod
+    def _write_meta(meta_path: Path, data: Dict[str, Any]):
+        tmp = meta_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp, meta_path)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+结构化阶段记录（trace）：记录一次生成中各阶段的开始/结束/耗时/处理行数/读取字节数/错误，
+随API响应返回并写入JSON日志，用于定位耗时阶段（OSS、解密、Rscript、SMB、渲染等）
+
+用法：
+    with tracing("tumor-chinese-25P1186", api_type="project-report") as trace:
+        with stage("OSS下载") as st:
+            ...
+            st.set(bytes=len(content))
+    trace.to_dict()
+当前trace保存在contextvars中：无trace时 stage() 只计时不记录；线程池中需用 contextvars.copy_context() 传递
+"""
+import json
+import time
+import threading
+import contextvars
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# 默认日志目录：Code/docs/logs（与API日志相同）
+LOG_DIR = Path(__file__).parent.parent.parent.parent / "docs" / "logs"
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("trace_stage", default=None)
+
+
+def _fmt_time(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] if ts else None
+
+
+class Stage:
+    """单个阶段的记录"""
+
+    def __init__(self, name: str, parent: Optional[str] = None, **fields):
+        self.name = name
+        self.parent = parent
+        self.start = time.time()
+        self.end = None
+        self.error = None
+        self.fields: Dict[str, Any] = dict(fields)   # rows/bytes 等附加信息
+
+    def set(self, **fields):
+        """补充附加信息（如 rows=行数、bytes=字节数）"""
+        self.fields.update(fields)
+
+    def fail(self, error: str):
+        """标记阶段失败（不抛异常的失败，如返回失败标志的步骤）"""
+        self.error = error
+
+    @property
+    def duration(self) -> Optional[float]:
+        return round(self.end - self.start, 3) if self.end else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "stage": self.name,
+            "start": _fmt_time(self.start),
+            "end": _fmt_time(self.end),
+            "duration": self.duration,
+        }
+        if self.parent:
+            data["parent"] = self.parent
+        data.update(self.fields)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class Trace:
+    """一次生成的阶段记录集合（线程安全，依赖图中的并行阶段可同时写入）"""
+
+    def __init__(self, name: str, **meta):
+        self.name = name
+        self.meta = meta
+        self.start = time.time()
+        self.end = None
+        self.stages: List[Stage] = []
+        self._lock = threading.Lock()
+
+    def add(self, st: Stage):
+        with self._lock:
+            self.stages.append(st)
+
+    def finish(self):
+        self.end = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = sorted(self.stages, key=lambda s: s.start)
+        return {
+            "name": self.name,
+            **self.meta,
+            "start": _fmt_time(self.start),
+            "duration": round((self.end or time.time()) - self.start, 3),
+            "stages": [s.to_dict() for s in stages],
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """记录一个阶段；异常会记为该阶段的错误并继续抛出"""
+    trace = _current_trace.get()
+    st = Stage(name, _current_stage.get(), **fields)
+    token = _current_stage.set(name)
+    try:
+        yield st
+    except BaseException as e:
+        st.fail(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_stage.reset(token)
+        st.end = time.time()
+        if trace is not None:
+            trace.add(st)
+
+
+def traced(name: str, func, *args, **kwargs):
+    """在一个阶段中执行函数（用于依赖图节点等以函数形式提交的步骤）"""
+    with stage(name):
+        return func(*args, **kwargs)
+
+
+@contextmanager
+def tracing(name: str, api_type: Optional[str] = None, log_dir: Optional[Path] = None, **meta):
+    """开启一次trace；结束时若给定 api_type，则追加写入 {api_type}_{年-月}.log"""
+    trace = Trace(name, **meta)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        if api_type:
+            write_trace_log(trace, api_type, log_dir)
+
+
+def write_trace_log(trace: Trace, api_type: str, log_dir: Optional[Path] = None):
+    """以JSON行写入日志（与API日志同目录、同文件命名）"""
+    try:
+        log_dir = Path(log_dir or LOG_DIR)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        data = trace.to_dict()
+        entry = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "info": trace.name,
+            "duration": data["duration"],
+            **trace.meta,
+            "trace": data["stages"],
+        }
+        log_file = log_dir / f"{api_type}_{datetime.now().strftime('%Y-%m')}.log"
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    except Exception as e:
+        print(f"写入trace日志失败: {e}")
@@ -24,6 +24,35 @@ def clean_translated_text(text, translator, cache):
     except Exception as e:
         return text, None, str(e)
 
+def translate_texts(texts, direction=0, max_workers=20):
+    """并发翻译一组文本（重复文本只翻译一次）；返回 {原文: 译文}，翻译失败的原文不在结果中"""
+    from_lang, to_lang = ("en", "zh-cn") if direction == 1 else ("zh-cn", "en")
+    unique_texts = list(dict.fromkeys(texts))
+    if not unique_texts:
+        return {}
+    
+    translator = Translator(from_lang=from_lang, to_lang=to_lang)
+    translation_cache = {}
+    results = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(clean_translated_text, text, translator, translation_cache) for text in unique_texts]
+        for future in as_completed(futures):
+            original, translated, error = future.result()
+            if error:
+                print(f"翻译失败: {original[:20]}, 错误: {error}")
+            else:
+                results[original] = translated
+                print(f"翻译进度: {len(results)}/{len(unique_texts)} ({len(results)/len(unique_texts)*100:.1f}%)", end='\r')
+    return results
+
+def translate_values(values, direction=0, max_workers=20):
+    """翻译一组单元格值：只翻译需要翻译的字符串（中翻英时含中文、英翻中时不含中文），其余原样返回"""
+    def needs(v):
+        return isinstance(v, str) and v.strip() and ((direction == 1) != contains_chinese(v.strip()))
+    translated = translate_texts([v.strip() for v in values if needs(v)], direction, max_workers)
+    return [translated.get(v.strip(), v) if needs(v) else v for v in values]
+
 def translate_excel_region(file_path, sheet_name, start_row, end_row, start_col, end_col, direction=0, max_workers=20):
     """翻译Excel中指定区域的内容"""
     try:
@@ -34,7 +63,6 @@ def translate_excel_region(file_path, sheet_name, start_row, end_row, start_col,
             return False
         ws = wb[sheet_name]
         #设置翻译方向，1为英翻中，其他为中翻英
-        from_lang, to_lang = ("en", "zh-cn") if direction == 1 else ("zh-cn", "en")
         direction_text = "英翻中" if direction == 1 else "中翻英"
         
         # 收集需要翻译的单元格
@@ -54,28 +82,10 @@ def translate_excel_region(file_path, sheet_name, start_row, end_row, start_col,
             return False
             
         print(f"开始翻译工作表 '{sheet_name}' 中的 {len(cells_to_translate)} 个单元格 ({direction_text})")
-        
-        # 并发翻译
-        translator = Translator(from_lang=from_lang, to_lang=to_lang)
-        translation_cache = {}
-        completed_count = 0
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_cell = {
-                executor.submit(clean_translated_text, text, translator, translation_cache): (cell, text)
-                for cell, text in cells_to_translate
-            }
-            
-            for future in as_completed(future_to_cell):
-                cell, original_text = future_to_cell[future]
-                original, translated, error = future.result()
-                
-                if error:
-                    print(f"翻译失败: 行{cell.row}, 列{chr(cell.column+64)}, 错误: {error}")
-                else:
-                    cell.value = translated
-                    completed_count += 1
-                    print(f"翻译进度: {completed_count}/{len(cells_to_translate)} ({completed_count/len(cells_to_translate)*100:.1f}%)", end='\r')
+        translated = translate_texts([text for _, text in cells_to_translate], direction, max_workers)
+        for cell, text in cells_to_translate:
+            if text in translated:
+                cell.value = translated[text]
         
         wb.save(file_path)
         print(f"\n翻译完成，已保存到: {file_path}")
@@ -26,6 +26,27 @@ SUPPLIES_DB = {
     "charset": "utf8mb4"
 }
 
+# 异步数据库访问配置（app/data/async_connection.py）
+ASYNC_DB_DRIVER = "aiomysql"      # MySQL异步驱动：aiomysql / asyncmy
+ASYNC_DB_POOL_SIZE = 10           # 每个库的连接池大小（每个事件循环各一个连接池）
+ASYNC_DB_MAX_OVERFLOW = 10        # 连接池满时允许额外创建的连接数
+ASYNC_DB_QUERY_TIMEOUT = 30       # 单条查询的默认超时（秒）
+
+# SQL查询结果缓存配置（项目信息/给药方案/受试品信息，项目方案与项目报告API共用；请求传 bypass_cache=true 跳过缓存读取）
+QUERY_CACHE_FILE = PROJECT_ROOT / "docs" / "output" / "query_cache.sqlite3"
+QUERY_CACHE_TTL = {                 # 各查询结果的有效期（秒），0 表示不缓存；开启版本探测时只兜底探测未覆盖的字典表（org_tag/org_emp）
+    "project_info": 4 * 3600,
+    "dosage_plan": 4 * 3600,
+    "supplies_info": 4 * 3600,
+}
+QUERY_CACHE_VERSION_PROBE = True            # 查询前先执行版本探测（各表行数+内容校验和），数据变化后缓存立即失效；关闭则只按有效期失效
+QUERY_CACHE_MAX_ENTRIES = 2000              # 最多缓存的查询结果数（按最近访问淘汰）
+QUERY_CACHE_MAX_BYTES = 256 * 1024 ** 2     # 缓存总大小上限（字节）
+
+# org_tag 字典配置（动物名称/给药途径/给药频率等标签 id 在本地解码，app/data/org_tag.py）
+ORG_TAG_SNAPSHOT = PROJECT_ROOT / "docs" / "output" / "org_tag.json"  # 字典快照（进程启动时未过期则直接使用；数据库不可用时兜底）
+ORG_TAG_REFRESH = 3600                      # 字典刷新间隔（秒）
+
 # 文件路径配置
 # 项目方案相关路径
 PLAN_OUT = PROJECT_ROOT / "docs" / "output" / "project_plan"
@@ -75,3 +96,38 @@ SMB_CONFIG = {
 # 图片保存路径配置
 PHOTO_DIR = PROJECT_ROOT / "docs" / "temp" / "photo"
 PHOTO_DIR.mkdir(parents=True, exist_ok=True)
+
+# 后台任务队列配置（项目报告生成）
+REPORT_JOB_WORKERS = 2      # 同时执行的报告生成任务数
+REPORT_JOB_TTL = 24 * 3600  # 已结束任务的保留时间（秒），超时后清理
+REPORT_DAG_WORKERS = 4      # 报告依赖图执行器的线程数（表格统计、图片下载等互不依赖的步骤并发执行）
+
+# 请求合并（single-flight）锁文件配置
+LOCK_DIR = PROJECT_ROOT / "docs" / "temp" / "locks"
+LOCK_WAIT_TIMEOUT = 3600    # 等待同项目生成完成的最长时间（秒）
+LOCK_STALE_AFTER = 2 * 3600 # 超过该时间的锁文件视为进程异常退出的残留
+LOCK_DIR.mkdir(parents=True, exist_ok=True)
+
+# 项目报告结果缓存配置（输入指纹一致时直接复用已生成的文件）
+REPORT_CACHE_DIR = REPORT_OUT / "cache"
+REPORT_CACHE_MAX_ENTRIES = 200              # 最多缓存的报告数
+REPORT_CACHE_MAX_BYTES = 2 * 1024 ** 3      # 缓存总大小上限（字节）
+REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# 项目方案结果缓存配置（SQL结果与模板一致时直接复用已生成的文件）
+PLAN_CACHE_DIR = PLAN_OUT / "cache"
+PLAN_CACHE_MAX_ENTRIES = 500                # 最多缓存的方案数
+PLAN_CACHE_MAX_BYTES = 512 * 1024 ** 2      # 缓存总大小上限（字节）
+PLAN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# 统计检验配置
+DUNNETT_BACKEND = "python"  # Dunnett检验后端：python（原生实现，默认）/ r（调用Rscript，用于结果核对）
+REPORT_STATS_ALL_DAYS = False  # 是否额外计算体重/荷瘤体积每个测量天的P值（与结束天一起批量计算，结果写入明细Excel的"统计检验"页）
+STATS_CACHE_FILE = PROJECT_ROOT / "docs" / "output" / "stats_cache.sqlite3"  # Dunnett结果缓存（按数据集指纹复用，重复生成时跳过统计）
+STATS_CACHE_MAX_ENTRIES = 20000             # 最多缓存的数据集结果数（按最近访问淘汰）
+REPORT_DAY_TABLES = True  # 生成报告时是否预计算每个可选结束天的表格与P值（用于切换结束天时只重新渲染Word）
+REPORT_VERIFY_STATS = True  # 是否用个体值重算均数/标准误/TGITV/TGITW并与终版数据包中的数值核对（不一致处写入明细Excel的"数据核对"页）
+REPORT_USE_RECOMPUTED_STATS = False  # 表格是否改用重算的统计值（默认仍使用终版数据包中的数值）
+
+# Excel读取配置
+XLSX_READER_BACKEND = "calamine"  # 终版数据包/明细Excel的读取后端：calamine（python-calamine，默认）/ openpyxl；calamine 未安装或读取失败时自动回退到 openpyxl